@@ -0,0 +1,101 @@
+"""
+Batch compliance scoring vs. score_compliance called per company.
+
+Generates random company profiles and tenders (certifications, documents
+and amounts drawn from overlapping pools so every rule gets partial
+matches), checks that the batch scores and verdicts equal the scalar ones
+for every pair, and times both.
+
+    python benchmarks/bench_compliance_batch.py --companies 500 --tenders 50
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.compliance_batch import CompanyMatrix, rank_companies, score_batch, VERDICTS  # noqa: E402
+from services.compliance_engine import score_compliance  # noqa: E402
+
+CERTS = ["ISO 9001", "ISO 14001", "ISO 27001", "MSME Udyam", "GeM Registered", "NSIC", "BIS", "CMMI Level 3",
+         "OHSAS 18001", "STQC"]
+DOCS = ["GST Certificate", "PAN Card", "Audited Balance Sheet", "ITR", "Work Completion Certificate",
+        "EMD Receipt", "Power of Attorney", "Affidavit", "Udyam Certificate", "Bank Solvency Certificate"]
+
+
+def _company(rng: random.Random) -> dict:
+    projects = [{"name": f"P{i}", "value": rng.choice([5, 12.5, 40, 90, 250])} for i in range(rng.randint(0, 3))]
+    return {
+        "annual_turnover": rng.choice([0, 10, 35, 49.9, 50, 70, 120, 500]),
+        "years_in_operation": rng.randint(0, 15),
+        "certifications": [c if rng.random() < 0.5 else c.upper() for c in rng.sample(CERTS, rng.randint(0, 5))],
+        "max_single_project_value": rng.choice([0, 0, 20, 60, 300]),
+        "past_projects": projects,
+        "available_documents": rng.sample(DOCS + ["Balance Sheet", "GST"], rng.randint(0, 8)),
+        "msme_category": rng.choice(["", "", "micro", "small", "medium"]),
+    }
+
+
+def _tender(rng: random.Random) -> dict:
+    return {
+        "eligibility": {
+            "min_turnover": rng.choice([None, 0, 25, 50, 100, 300]),
+            "years_experience": rng.choice([None, 3, 5, 7]),
+            "required_certifications": rng.sample(CERTS, rng.randint(0, 3)),
+            "msme_preference": rng.random() < 0.5,
+            "min_single_project_value": rng.choice([None, 30, 80, 200]),
+        },
+        "documents_required": rng.sample(DOCS, rng.randint(0, 7)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--companies", type=int, default=500)
+    parser.add_argument("--tenders", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    companies = [_company(rng) for _ in range(args.companies)]
+    tenders = [_tender(rng) for _ in range(args.tenders)]
+
+    start = time.perf_counter()
+    matrix = CompanyMatrix(list(range(1, len(companies) + 1)), [f"Company {i}" for i in range(len(companies))], companies)
+    load_s = time.perf_counter() - start
+
+    mismatches = 0
+    scalar_s = batch_s = 0.0
+    for tender in tenders:
+        start = time.perf_counter()
+        expected = [score_compliance(tender, company) for company in companies]
+        scalar_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        scored = score_batch(tender, matrix)
+        batch_s += time.perf_counter() - start
+
+        for i, report in enumerate(expected):
+            if (round(float(scored["score"][i]), 1) != report["score"]
+                    or VERDICTS[scored["verdict"][i]] != report["verdict"]
+                    or int(scored["msme_bonus"][i]) != report["msme_bonus"]):
+                mismatches += 1
+
+    start = time.perf_counter()
+    for tender in tenders:
+        rank_companies(tender, matrix, top_n=10, details=True)
+    ranked_s = time.perf_counter() - start
+
+    pairs = len(companies) * len(tenders)
+    print(f"{len(companies)} companies x {len(tenders)} tenders = {pairs} pairs")
+    print(f"matrix load:           {load_s * 1000:8.1f} ms (once)")
+    print(f"scalar per tender:     {scalar_s / len(tenders) * 1000:8.2f} ms")
+    print(f"batch per tender:      {batch_s / len(tenders) * 1000:8.2f} ms  ({scalar_s / batch_s:.0f}x)")
+    print(f"ranked + top-10 detail:{ranked_s / len(tenders) * 1000:8.2f} ms per tender")
+    print(f"score/verdict mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
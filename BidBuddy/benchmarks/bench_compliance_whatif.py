@@ -0,0 +1,91 @@
+"""
+What-if simulation: exactness, plan minimality and latency.
+
+For random tenders, companies and hypothetical changes, checks that
+  - the scenario score/verdict equal score_compliance on the changed profile,
+  - the plan, applied on top, really is ELIGIBLE with the reported score,
+  - no smaller set of gap-closing actions reaches ELIGIBLE (brute force
+    over every subset, for cases with at most --max-brute actions),
+and prints simulate() latency (mean / p99; the budget is 50 ms).
+
+    python benchmarks/bench_compliance_whatif.py --runs 2000
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_compliance_batch import CERTS, DOCS, _company, _tender  # noqa: E402
+from services.compliance_engine import evaluate_rules, score_compliance  # noqa: E402
+from services.compliance_whatif import _actions, _merge, apply_changes, simulate  # noqa: E402
+
+
+def _changes(rng: random.Random) -> dict:
+    changes = {}
+    if rng.random() < 0.3:
+        changes["annual_turnover"] = rng.choice([50, 100, 300])
+    if rng.random() < 0.2:
+        changes["years_in_operation"] = rng.randint(3, 10)
+    if rng.random() < 0.5:
+        changes["add_certifications"] = rng.sample(CERTS, rng.randint(1, 2))
+    if rng.random() < 0.3:
+        changes["add_projects"] = [{"name": "New", "value": rng.choice([50, 200])}]
+    if rng.random() < 0.3:
+        changes["add_documents"] = rng.sample(DOCS, rng.randint(1, 3))
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--max-brute", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    timings = []
+    wrong_scenario = wrong_plan = not_minimal = brute_checked = 0
+    for _ in range(args.runs):
+        tender, company, changes = _tender(rng), _company(rng), _changes(rng)
+        tender["documents_required"] = rng.sample(DOCS, rng.randint(0, 10))
+
+        start = time.perf_counter()
+        result = simulate(tender, company, changes)
+        timings.append(time.perf_counter() - start)
+
+        scenario_company, _ = apply_changes(company, changes)
+        expected = score_compliance(tender, scenario_company)
+        if (result["scenario"]["score"], result["scenario"]["verdict"]) != (expected["score"], expected["verdict"]):
+            wrong_scenario += 1
+
+        plan = result["plan"]
+        planned, _ = apply_changes(scenario_company, plan["changes"])
+        report = score_compliance(tender, planned)
+        if (report["verdict"], report["score"]) != ("ELIGIBLE", plan["score"]):
+            wrong_plan += 1
+
+        steps = [step for steps in _actions(tender, evaluate_rules(tender, scenario_company)).values()
+                 for step in steps]
+        if len(steps) <= args.max_brute:
+            brute_checked += 1
+            for size in range(len(plan["steps"])):
+                if any(score_compliance(tender, apply_changes(scenario_company, _merge(list(subset)))[0])["verdict"]
+                       == "ELIGIBLE" for subset in itertools.combinations(steps, size)):
+                    not_minimal += 1
+                    break
+
+    timings.sort()
+    print(f"{args.runs} what-if runs (with plan search)")
+    print(f"simulate: mean {sum(timings) / len(timings) * 1000:.2f} ms, "
+          f"p99 {timings[int(len(timings) * 0.99)] * 1000:.2f} ms, max {timings[-1] * 1000:.2f} ms")
+    print(f"scenario mismatches: {wrong_scenario}")
+    print(f"plans not ELIGIBLE / wrong score: {wrong_plan}")
+    print(f"plans larger than the brute-force minimum: {not_minimal} (of {brute_checked} checked)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Wall-clock time of extract_text_from_pdf against page count, in-process
+vs. the process-pool mode.
+
+    python benchmarks/bench_pdf_extraction.py [--workers 4] [--pages 50 150 300]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_pdf import write_tender_pdf
+from services.pdf_extractor import extract_text_from_pdf
+
+
+def _timed(path: str, workers: int):
+    start = time.perf_counter()
+    result = extract_text_from_pdf(path, workers=workers)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 150, 300])
+    args = parser.parse_args()
+
+    print(f"{'pages':>6} {'serial s':>10} {'parallel s':>11} {'speedup':>8}  identical")
+    with tempfile.TemporaryDirectory() as tmp:
+        for page_count in args.pages:
+            path = os.path.join(tmp, f"tender_{page_count}.pdf")
+            write_tender_pdf(path, page_count)
+
+            serial_s, serial = _timed(path, workers=1)
+            parallel_s, parallel = _timed(path, workers=args.workers)
+            identical = (serial["full_text"] == parallel["full_text"]
+                         and serial["sections"] == parallel["sections"]
+                         and serial["is_image_based"] == parallel["is_image_based"])
+            print(f"{page_count:>6} {serial_s:>10.2f} {parallel_s:>11.2f} "
+                  f"{serial_s / parallel_s:>7.1f}x  {identical}")
+
+
+if __name__ == "__main__":
+    main()
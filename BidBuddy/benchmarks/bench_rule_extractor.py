@@ -0,0 +1,119 @@
+"""
+Rule-based eligibility fast path vs. the full-LLM extraction path.
+
+For each tender PDF: time extract_rule_fields against
+extract_tender_structure_async, report how many rule fields clear the
+confidence threshold, and how often the confident rule values agree with
+what the LLM extracted.
+
+    python benchmarks/bench_rule_extractor.py tender1.pdf tender2.pdf ...
+    python benchmarks/bench_rule_extractor.py --synthetic 60 --backend fake
+
+Agreement is only meaningful with --backend vertex (the fake backend
+returns an empty schema); latency numbers work with either.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _normalise(value):
+    if isinstance(value, list):
+        return sorted(str(v).strip().casefold() for v in value)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return round(float(value), 1)
+    if isinstance(value, str):
+        return value.strip().casefold()
+    return value
+
+
+async def _run(path: str, threshold: float):
+    from services.gemini_client import extract_tender_structure_async
+    from services.pdf_extractor import extract_text_from_pdf
+    from services.rule_extractor import _get_path, confident_fields, extract_rule_fields, pending_fields
+
+    extraction = extract_text_from_pdf(path)
+    if not extraction["success"]:
+        print(f"{path}: {extraction['error']}")
+        return None
+
+    start = time.perf_counter()
+    rules = extract_rule_fields(extraction["sections"], extraction["full_text"])
+    rules_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    llm = await extract_tender_structure_async(extraction["full_text"], extraction["sections"])
+    llm_s = time.perf_counter() - start
+
+    fields = pending_fields(rules, threshold)
+    start = time.perf_counter()
+    await extract_tender_structure_async(extraction["full_text"], extraction["sections"], fields)
+    narrowed_s = time.perf_counter() - start
+
+    confident = confident_fields(rules, threshold)
+    agree = [path for path in confident
+             if _normalise(_get_path(rules["data"], path)) == _normalise(_get_path(llm, path))]
+    return {
+        "file": os.path.basename(path),
+        "rules_ms": rules_s * 1000,
+        "llm_ms": llm_s * 1000,
+        "narrowed_ms": narrowed_s * 1000,
+        "confident": len(confident),
+        "agree": len(agree),
+        "disagree": sorted(set(confident) - set(agree)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("pdfs", nargs="*")
+    parser.add_argument("--synthetic", type=int, default=0, help="also benchmark a synthetic tender of N pages")
+    parser.add_argument("--backend", default="fake", choices=["fake", "vertex"])
+    parser.add_argument("--latency-ms", type=int, default=3000, help="fake backend per-call latency")
+    parser.add_argument("--threshold", type=float, default=None)
+    args = parser.parse_args()
+
+    os.environ["LLM_BACKEND"] = args.backend
+    os.environ["LLM_CACHE_ENABLED"] = "0"  # measure real calls, not cache hits
+    os.environ.setdefault("FAKE_LLM_INIT_MS", "0")
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.latency_ms)
+
+    from config import RULE_CONFIDENCE_THRESHOLD
+    threshold = args.threshold if args.threshold is not None else RULE_CONFIDENCE_THRESHOLD
+
+    pdfs = list(args.pdfs)
+    if args.synthetic:
+        from benchmarks.synthetic_pdf import write_tender_pdf
+        path = os.path.join(tempfile.mkdtemp(), f"synthetic_{args.synthetic}.pdf")
+        write_tender_pdf(path, args.synthetic)
+        pdfs.append(path)
+    if not pdfs:
+        parser.error("pass tender PDFs and/or --synthetic N")
+
+    print(f"backend={args.backend} threshold={threshold}")
+    print(f"{'file':<28}{'rules ms':>10}{'full LLM ms':>13}{'narrowed ms':>13}{'confident':>11}{'agree':>7}")
+    # One event loop for every run: the LLM limiter's semaphores bind to it
+    async def run_all():
+        return [await _run(path, threshold) for path in pdfs]
+    rows = [row for row in asyncio.run(run_all()) if row]
+    for row in rows:
+        print(f"{row['file'][:27]:<28}{row['rules_ms']:>10.1f}{row['llm_ms']:>13.0f}{row['narrowed_ms']:>13.0f}"
+              f"{row['confident']:>11}{row['agree']:>7}"
+              + (f"   disagree: {', '.join(row['disagree'])}" if row["disagree"] else ""))
+
+    if rows:
+        confident = sum(r["confident"] for r in rows)
+        agree = sum(r["agree"] for r in rows)
+        print(f"\ncritical path: {sum(r['rules_ms'] for r in rows) / len(rows):.1f} ms rules (LLM deferred) "
+              f"vs {sum(r['llm_ms'] for r in rows) / len(rows):.0f} ms full LLM, mean per tender")
+        if confident:
+            print(f"field agreement on confident rule fields: {agree}/{confident} ({agree / confident:.0%})")
+
+
+if __name__ == "__main__":
+    main()
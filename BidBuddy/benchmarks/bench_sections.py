@@ -0,0 +1,83 @@
+"""
+Micro-benchmark: _extract_sections (one find() sweep per keyword, O(K·n))
+vs. the previous nested per-keyword scan (up to K² full-text scans).
+
+    python benchmarks/bench_sections.py [--sizes 100000 1000000 5000000]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.pdf_extractor import SECTION_KEYWORDS, _extract_sections
+
+
+def legacy_extract_sections(full_text: str):
+    sections = {}
+    text_lower = full_text.lower()
+    for keyword in SECTION_KEYWORDS:
+        pos = text_lower.find(keyword)
+        if pos == -1:
+            continue
+        end_pos = len(full_text)
+        for other_keyword in SECTION_KEYWORDS:
+            if other_keyword == keyword:
+                continue
+            next_pos = text_lower.find(other_keyword, pos + len(keyword))
+            if next_pos != -1 and next_pos < end_pos:
+                end_pos = next_pos
+        sections[keyword] = full_text[pos:min(end_pos, pos + 3000)].strip()
+    return sections
+
+
+def synthetic_tender(size: int, heading_count: int, seed: int = 7) -> str:
+    """
+    Filler clauses with `heading_count` of the section headings dropped in
+    once each — real tenders rarely use more than a handful of them.
+    """
+    rng = random.Random(seed)
+    words = ("the contractor shall comply with all applicable rules standards works "
+             "materials payment security deposit clause schedule department").split()
+    headings = rng.sample(SECTION_KEYWORDS, heading_count)
+    step = size // (len(headings) + 1)
+    parts, length = [], 0
+    for i, heading in enumerate(headings, start=1):
+        while length < i * step:
+            line = " ".join(rng.choice(words) for _ in range(12)) + ".\n"
+            parts.append(line)
+            length += len(line)
+        parts.append(f"\n{heading.upper()}\n")
+    while length < size:
+        line = " ".join(rng.choice(words) for _ in range(12)) + ".\n"
+        parts.append(line)
+        length += len(line)
+    return "".join(parts)
+
+
+def _run(size: int, heading_count: int, repeat: int):
+    text = synthetic_tender(size, heading_count)
+    legacy = min(timeit.repeat(lambda: legacy_extract_sections(text), number=1, repeat=repeat))
+    new = min(timeit.repeat(lambda: _extract_sections(text), number=1, repeat=repeat))
+    identical = legacy_extract_sections(text) == _extract_sections(text)
+    print(f"{heading_count:>8} {size:>10} {legacy * 1000:>10.1f} {new * 1000:>10.1f} "
+          f"{legacy / new:>7.1f}x  {identical}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--headings", type=int, nargs="+", default=[3, 6, 15])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'headings':>8} {'chars':>10} {'legacy ms':>10} {'new ms':>10} {'speedup':>8}  identical")
+    for heading_count in args.headings:
+        for size in args.sizes:
+            _run(size, heading_count, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Tender matchmaking through the eligibility index vs. scoring every tender.
+
+Indexes N random tenders, then for random companies compares
+EligibilityIndex.matches against running score_compliance on every tender
+(and keeping those without a disqualifying gap): the two must return the
+same tenders with the same scores. Prints lookup and brute-force timings.
+
+    python benchmarks/bench_tender_matches.py --tenders 5000 --companies 50
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_compliance_batch import _company, _tender  # noqa: E402
+from services.compliance_engine import DISQUALIFYING, score_compliance  # noqa: E402
+from services.tender_index import EligibilityIndex  # noqa: E402
+
+SECTORS = ["Civil Construction", "IT Services", "Electrical", "Supply", "Consultancy"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tenders", type=int, default=5000)
+    parser.add_argument("--companies", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    tenders = []
+    for tender_id in range(1, args.tenders + 1):
+        data = _tender(rng)
+        data["sector"] = rng.choice(SECTORS)
+        tenders.append(types.SimpleNamespace(id=tender_id, user_id=1, parent_id=None, title=f"Tender {tender_id}",
+                                             sector=data["sector"], deadline=None, extracted_data=data, vocab_ids=None))
+
+    index = EligibilityIndex()
+    start = time.perf_counter()
+    for tender in tenders:
+        index.add(tender)
+    build_s = time.perf_counter() - start
+
+    mismatches = 0
+    index_s = brute_s = 0.0
+    candidates = matched = 0
+    for _ in range(args.companies):
+        company = _company(rng)
+
+        start = time.perf_counter()
+        count, results = index.matches(company)
+        index_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = []
+        for tender in tenders:
+            report = score_compliance(tender.extracted_data, company)
+            if not any(gap["severity"] == DISQUALIFYING for gap in report["gaps"]):
+                expected.append((tender.id, report["score"]))
+        brute_s += time.perf_counter() - start
+
+        candidates += count
+        matched += len(results)
+        if sorted(expected) != sorted((r["tender_id"], r["score"]) for r in results):
+            mismatches += 1
+
+    print(f"{args.tenders} tenders indexed in {build_s * 1000:.0f} ms")
+    print(f"index lookup + exact scoring: {index_s / args.companies * 1000:8.2f} ms per company")
+    print(f"score every tender:           {brute_s / args.companies * 1000:8.2f} ms per company")
+    print(f"mean candidates {candidates / args.companies:.0f}, mean matches {matched / args.companies:.0f}")
+    print(f"companies with a different match set: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
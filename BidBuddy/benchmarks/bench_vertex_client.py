@@ -0,0 +1,49 @@
+"""
+Offline benchmark of the shared model client vs. building the model
+handle on every call (the previous _call_vertex behaviour), using the
+fake backend.
+
+    python benchmarks/bench_vertex_client.py [--calls 20] [--init-ms 300] [--latency-ms 50]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--init-ms", type=int, default=300)
+    parser.add_argument("--latency-ms", type=int, default=50)
+    args = parser.parse_args()
+
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["FAKE_LLM_INIT_MS"] = str(args.init_ms)
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.latency_ms)
+
+    from services import gemini_client
+
+    prompt = "Summarise the eligibility criteria of this tender."
+
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        gemini_client.FakeTextModel(gemini_client.VERTEX_MODEL).predict(prompt)
+    per_call = (time.perf_counter() - start) / args.calls
+
+    warm_s = gemini_client.warm_up()
+    start = time.perf_counter()
+    for _ in range(args.calls):
+        gemini_client._call_vertex(prompt)
+    shared = (time.perf_counter() - start) / args.calls
+
+    print(f"warm-up:                  {warm_s * 1000:8.1f} ms (once)")
+    print(f"new handle per call:      {per_call * 1000:8.1f} ms/call")
+    print(f"shared handle:            {shared * 1000:8.1f} ms/call")
+    print(f"saved per call:           {(per_call - shared) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
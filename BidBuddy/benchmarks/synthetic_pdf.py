@@ -0,0 +1,80 @@
+"""
+Minimal text-only PDF writer for the extraction benchmarks.
+
+Produces tender-like documents (letterhead, body text, "Page X of Y"
+footer) without pulling in a PDF library.
+"""
+
+
+def _escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def tender_page_lines(page_num: int, page_count: int):
+    lines = [
+        "GOVERNMENT OF INDIA - CENTRAL PUBLIC WORKS DEPARTMENT",
+        "Tender No. CPWD/EE/2026/0417",
+        "",
+    ]
+    if page_num == page_count // 3:
+        lines += [
+            "ELIGIBILITY CRITERIA",
+            "Average annual turnover of Rs. 50 Lakhs during the last three financial years.",
+            "Minimum 5 years of experience in similar works.",
+            "Bidder must hold ISO 9001:2015 certification.",
+            "EMD of Rs. 2,00,000 shall be submitted.",
+        ]
+    elif page_num == page_count // 2:
+        lines += ["SCOPE OF WORK", "Construction of roads and drains as per specifications."]
+    elif page_num == (2 * page_count) // 3:
+        lines += ["DOCUMENTS REQUIRED", "1. GST Certificate", "2. PAN Card", "3. Audited Balance Sheet"]
+    lines += [f"Clause {page_num}.{i}: The contractor shall comply with all applicable rules and "
+              f"standards for works and materials." for i in range(1, 40)]
+    lines += ["This document is the property of CPWD. Unauthorised copying is prohibited.",
+              f"Page {page_num} of {page_count}"]
+    return lines
+
+
+def write_tender_pdf(path: str, page_count: int) -> None:
+    write_pdf(path, [tender_page_lines(page_num, page_count) for page_num in range(1, page_count + 1)])
+
+
+def write_pdf(path: str, pages) -> None:
+    """One page per list of lines; an empty list gives a page without text."""
+    objects = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = add(b"")          # patched once the kids are known
+    kids = []
+    for lines in pages:
+        stream = "BT /F1 9 Tf 12 TL 40 800 Td\n"
+        stream += "".join(f"({_escape(line)}) '\n" for line in lines)
+        stream += "ET"
+        data = stream.encode("latin-1")
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+        kids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_id, font_id, content_id)
+        ))
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % num + body + b"\nendobj\n"
+    xref_pos = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog_id, xref_pos)
+
+    with open(path, "wb") as f:
+        f.write(out)
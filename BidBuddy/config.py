@@ -6,4 +6,37 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
 DATABASE_URL = "sqlite:///./tender.db"
 
-GEMINI_API_KEY = "YOUR_GEMINI_KEY"
\ No newline at end of file
+GEMINI_API_KEY = "YOUR_GEMINI_KEY"
+
+# PDF extraction — process-pool workers for long tenders (1 = in-process)
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", "1"))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "40"))
+
+# Table-aware eligibility stage (pdfplumber table extraction on keyword-matched pages only)
+PDF_EXTRACT_TABLES = os.getenv("PDF_EXTRACT_TABLES", "0") == "1"
+PDF_MAX_TABLE_PAGES = int(os.getenv("PDF_MAX_TABLE_PAGES", "20"))
+
+# Low-memory extraction for very large PDFs: fixed page windows + peak RSS guard
+PDF_LOW_MEMORY = os.getenv("PDF_LOW_MEMORY", "0") == "1"
+PDF_LOW_MEMORY_WINDOW = int(os.getenv("PDF_LOW_MEMORY_WINDOW", "25"))
+PDF_MAX_RSS_MB = int(os.getenv("PDF_MAX_RSS_MB", "1536"))
+
+# Map-reduce tender extraction: per-call input budget (estimated tokens) and
+# cap on concurrent partial extractions per tender
+EXTRACT_CHUNK_TOKENS = int(os.getenv("EXTRACT_CHUNK_TOKENS", "1500"))
+EXTRACT_MAX_CHUNKS = int(os.getenv("EXTRACT_MAX_CHUNKS", "12"))
+
+# Rule-based eligibility fast path: fields at/above this confidence skip the LLM,
+# and (when deferring) the narrowed LLM call for the rest runs after the upload responds
+RULE_CONFIDENCE_THRESHOLD = float(os.getenv("RULE_CONFIDENCE_THRESHOLD", "0.8"))
+RULE_EXTRACT_DEFER_LLM = os.getenv("RULE_EXTRACT_DEFER_LLM", "1") == "1"
+
+# Copilot retrieval: BM25 chunk size over tender raw_text and chunks sent per turn
+RETRIEVAL_CHUNK_CHARS = int(os.getenv("RETRIEVAL_CHUNK_CHARS", "600"))
+COPILOT_TOP_K = int(os.getenv("COPILOT_TOP_K", "3"))
+
+# Copilot history: the last COPILOT_RECENT_MESSAGES go in the prompt verbatim;
+# older ones are folded into a rolling summary, refreshed in the background
+# once another COPILOT_SUMMARY_EVERY_TURNS turns have left the verbatim window
+COPILOT_RECENT_MESSAGES = int(os.getenv("COPILOT_RECENT_MESSAGES", "6"))
+COPILOT_SUMMARY_EVERY_TURNS = int(os.getenv("COPILOT_SUMMARY_EVERY_TURNS", "3"))
@@ -1,5 +1,10 @@
-from fastapi import FastAPI
-from database import Base, engine
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from database import Base, engine, migrate_schema
+from services.gemini_client import VERTEX_WARMUP, warm_up
+from services.copilot_service import migrate_json_histories
+from services.llm_limiter import LLMOverloaded
+from services.tender_service import resume_pending_extractions
 from routers import (
     auth_router,
     company_router,
@@ -9,8 +14,10 @@ from routers import (
     copilot_router
 )
 
-# Create tables
+# Create tables, then add any columns new since the database was created
 Base.metadata.create_all(bind=engine)
+migrate_schema()
+migrate_json_histories()
 
 app = FastAPI(title="AI Tender Intelligence & Bid Copilot")
 
@@ -20,4 +27,25 @@ app.include_router(company_router.router, prefix="/company", tags=["Company"])
 app.include_router(tender_router.router, prefix="/tender", tags=["Tender"])
 app.include_router(compliance_router.router, prefix="/compliance", tags=["Compliance"])
 app.include_router(bid_router.router, prefix="/bid", tags=["Bid Drafts"])
-app.include_router(copilot_router.router, prefix="/copilot", tags=["AI Copilot"])
\ No newline at end of file
+app.include_router(copilot_router.router, prefix="/copilot", tags=["AI Copilot"])
+
+@app.exception_handler(LLMOverloaded)
+async def llm_overloaded_handler(request: Request, exc: LLMOverloaded):
+    # Back-pressure from the LLM limiter — tell clients when to retry
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.on_event("startup")
+def warm_up_llm():
+    # Optional: build the shared Vertex client before the first request
+    if VERTEX_WARMUP:
+        warm_up()
+
+@app.on_event("startup")
+async def resume_extractions():
+    # Deferred extractions run as in-process background tasks; pick up
+    # the ones a restart interrupted
+    await resume_pending_extractions()
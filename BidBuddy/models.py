@@ -1,7 +1,7 @@
 
 from sqlalchemy import (
     Column, Integer, String, Float, Text,
-    DateTime, JSON, Boolean, ForeignKey
+    DateTime, JSON, Boolean, ForeignKey, Index
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -36,9 +36,31 @@ class Tender(Base):
     user_id         = Column(Integer, ForeignKey("users.id"), nullable=True)
     filename        = Column(String, nullable=False)
 
+    # SHA-256 of the uploaded PDF — key into the content-addressed store
+    # (uploads/tenders/<hash>.pdf) and the TenderExtraction cache
+    content_hash    = Column(String, index=True, nullable=True)
+
     # Raw text pulled out of the PDF by pdfplumber
     raw_text        = Column(Text)
 
+    # Per-page fingerprints for incremental re-extraction of corrigenda
+    # Shape: { pages: [{ content, text, start, end, keys }], boilerplate: [...] }
+    page_fingerprints = Column(JSON, nullable=True)
+
+    # BM25 index over raw_text chunks for copilot retrieval (services.retrieval)
+    retrieval_index = Column(JSON, nullable=True)
+
+    # Canonical FAQ answers built from extracted_data (services.tender_faq)
+    faq             = Column(JSON, nullable=True)
+
+    # Canonical IDs of the required certifications / documents
+    # (services.vocabulary): { v, certifications: [...], documents: [...] }
+    vocab_ids       = Column(JSON, nullable=True)
+
+    # Corrigendum / amended versions link back to the tender they revise
+    parent_id       = Column(Integer, ForeignKey("tenders.id"), nullable=True)
+    version         = Column(Integer, default=1)
+
     # Structured JSON extracted by Gemini
     # Shape: { title, issuing_authority, deadline, estimated_value,
     #           eligibility: { min_turnover, years_experience, ... },
@@ -65,6 +87,25 @@ class Tender(Base):
     copilot_sessions   = relationship("CopilotSession", back_populates="tender")
 
 
+# ------------------------------------------------------------------
+# 2b. TENDER EXTRACTION CACHE (one row per distinct PDF)
+# ------------------------------------------------------------------
+class TenderExtraction(Base):
+    __tablename__ = "tender_extractions"
+
+    # SHA-256 of the PDF bytes
+    content_hash    = Column(String, primary_key=True)
+
+    page_count      = Column(Integer)
+    raw_text        = Column(Text)
+    sections        = Column(JSON, default=dict)
+    page_fingerprints = Column(JSON, nullable=True)
+    retrieval_index = Column(JSON, nullable=True)
+    extracted_data  = Column(JSON)
+
+    created_at      = Column(DateTime, default=func.now())
+
+
 # ------------------------------------------------------------------
 # 3. COMPANY PROFILE
 # ------------------------------------------------------------------
@@ -101,6 +142,9 @@ class CompanyProfile(Base):
     # Documents company has ready:  ["GST Certificate", "Audited Balance Sheet"]
     available_documents = Column(JSON, default=list)
 
+    # Canonical IDs of certifications / available_documents (services.vocabulary)
+    vocab_ids           = Column(JSON, nullable=True)
+
     # MSME classification: micro | small | medium
     msme_category       = Column(String)
 
@@ -117,6 +161,10 @@ class CompanyProfile(Base):
 # ------------------------------------------------------------------
 class ComplianceReport(Base):
     __tablename__ = "compliance_reports"
+    __table_args__ = (
+        Index("ix_compliance_reports_tender_company", "tender_id", "company_id"),
+        Index("ix_compliance_reports_company", "company_id"),
+    )
 
     id         = Column(Integer, primary_key=True, index=True)
     tender_id  = Column(Integer, ForeignKey("tenders.id"), nullable=False)
@@ -139,7 +187,15 @@ class ComplianceReport(Base):
     # Full AI analysis text (narrative from Gemini)
     ai_analysis     = Column(Text, nullable=True)
 
+    # Inputs the report was computed from (services.compliance_reports):
+    # the profile's updated_at and a digest of the tender's extracted_data.
+    # Edits to either set stale; the report is recomputed on the next read.
+    profile_version = Column(DateTime, nullable=True)
+    tender_version  = Column(String, nullable=True)
+    stale           = Column(Boolean, default=False)
+
     created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
     # Relationships
     tender  = relationship("Tender", back_populates="compliance_reports")
@@ -159,6 +215,10 @@ class BidDraft(Base):
     # The full AI-generated draft text (Markdown format)
     draft_text = Column(Text)
 
+    # Per-section bodies when generated section by section:
+    # {"Cover Letter": "...", ...} — lets one section be regenerated alone
+    sections   = Column(JSON, nullable=True)
+
     # Draft version — allows iterative refinement
     version    = Column(Integer, default=1)
 
@@ -180,13 +240,42 @@ class CopilotSession(Base):
     id        = Column(Integer, primary_key=True, index=True)
     tender_id = Column(Integer, ForeignKey("tenders.id"), nullable=False)
 
-    # Full conversation as JSON list:
-    # [{ "role": "user", "content": "..." },
-    #  { "role": "assistant", "content": "..." }]
+    # Legacy: full conversation as a JSON list. Messages now live in
+    # copilot_messages; old histories are moved there at startup
+    # (services.copilot_service.migrate_json_histories) and this is cleared.
     messages  = Column(JSON, default=list)
 
+    # Number of rows in copilot_messages — the next message gets seq + 1
+    message_count = Column(Integer, default=0)
+
+    # Rolling summary of messages 1..summary_upto_seq; the prompt sends it
+    # in place of those turns (services.copilot_service.refresh_summary)
+    summary          = Column(Text, nullable=True)
+    summary_upto_seq = Column(Integer, default=0)
+
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
     # Relationships
     tender = relationship("Tender", back_populates="copilot_sessions")
+
+
+# ------------------------------------------------------------------
+# 7. COPILOT MESSAGE (one row per turn, append-only)
+# ------------------------------------------------------------------
+class CopilotMessage(Base):
+    __tablename__ = "copilot_messages"
+    __table_args__ = (
+        Index("ix_copilot_messages_session_seq", "session_id", "seq", unique=True),
+    )
+
+    id         = Column(Integer, primary_key=True)
+    session_id = Column(Integer, ForeignKey("copilot_sessions.id"), nullable=False)
+
+    # 1-based position within the session
+    seq        = Column(Integer, nullable=False)
+
+    role       = Column(String, nullable=False)     # user | assistant
+    content    = Column(Text, nullable=False)
+
+    created_at = Column(DateTime, default=func.now())
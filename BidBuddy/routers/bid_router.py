@@ -1,32 +1,144 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 
-from database import get_db
+from database import SessionLocal, get_db
 from models import BidDraft, Tender, CompanyProfile
 from schemas import BidDraftOut
-from ai_copilot import generate_bid_draft
+from services.gemini_client import (
+    BID_SECTION_TITLES,
+    generate_bid_draft_async,
+    generate_bid_sections_async,
+    regenerate_bid_section_async,
+    stitch_bid_sections,
+    stream_bid_draft,
+)
+from services.llm_limiter import LLMOverloaded
 from utils.security import get_current_user
 
 router = APIRouter()
 
 @router.post("/{tender_id}/{company_id}", response_model=BidDraftOut)
-def create_bid_draft(tender_id: int, company_id: int, additional_context: Optional[str] = None, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+async def create_bid_draft(tender_id: int, company_id: int, additional_context: Optional[str] = None, fresh: bool = False,
+                           parallel: bool = False, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    tender, company = await run_in_threadpool(_tender_and_company, db, tender_id, company_id)
+
+    # fresh=true bypasses the LLM response cache for a genuinely new draft
+    sections = None
+    if parallel:
+        # One concurrent LLM call per section, stitched into the usual layout
+        sections = await generate_bid_sections_async(tender.extracted_data, company.__dict__, additional_context, use_cache=not fresh)
+        draft_text = stitch_bid_sections(sections)
+    else:
+        draft_text = await generate_bid_draft_async(tender.extracted_data, company.__dict__, additional_context, use_cache=not fresh)
+    draft = BidDraft(tender_id=tender_id, company_id=company_id, draft_text=draft_text, sections=sections)
+    return await run_in_threadpool(_save_draft, db, draft)
+
+@router.post("/{draft_id}/sections/{section_number}", response_model=BidDraftOut)
+async def regenerate_bid_section(draft_id: int, section_number: int, additional_context: Optional[str] = None,
+                                 db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    """Regenerate one numbered section (1-9) of a draft created with parallel=true."""
+    draft = await run_in_threadpool(_get_draft, db, draft_id)
+    if not draft.sections:
+        raise HTTPException(status_code=400, detail="Draft was not generated section by section")
+    if not 1 <= section_number <= len(BID_SECTION_TITLES):
+        raise HTTPException(status_code=404, detail="Section not found")
+
+    tender, company = await run_in_threadpool(_tender_and_company, db, draft.tender_id, draft.company_id)
+
+    title = BID_SECTION_TITLES[section_number - 1]
+    sections = dict(draft.sections)
+    sections[title] = await regenerate_bid_section_async(title, tender.extracted_data, company.__dict__, additional_context)
+    draft.sections = sections
+    draft.draft_text = stitch_bid_sections(sections)
+    draft.version = (draft.version or 1) + 1
+    return await run_in_threadpool(_save_draft, db, draft)
+
+@router.post("/{tender_id}/{company_id}/stream")
+async def stream_bid_draft_sse(tender_id: int, company_id: int, request: Request, additional_context: Optional[str] = None,
+                               fresh: bool = False, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    """
+    Server-sent-events variant of create_bid_draft: tokens are forwarded as
+    `data: {"text": ...}` events while the model writes, then a final
+    `event: done` carries the id of the saved BidDraft.
+    """
+    tender, company = await run_in_threadpool(_tender_and_company, db, tender_id, company_id)
+
+    chunks = stream_bid_draft(tender.extracted_data, dict(company.__dict__), additional_context, use_cache=not fresh)
+    # Pull the first chunk before answering so a full LLM queue still
+    # surfaces as a 429 and upstream failures as a 502, not a broken stream
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = ""
+    except LLMOverloaded:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Vertex AI call failed: {e}")
+
+    return StreamingResponse(
+        _draft_events(request, chunks, first, tender_id, company_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def _draft_events(request: Request, chunks: AsyncIterator[str], first: str,
+                        tender_id: int, company_id: int) -> AsyncIterator[str]:
+    parts = [first]
+    try:
+        if first:
+            yield _sse({"text": first})
+        async for chunk in chunks:
+            if await request.is_disconnected():
+                return  # finally closes `chunks`, which stops the upstream call
+            parts.append(chunk)
+            yield _sse({"text": chunk})
+    except Exception as e:
+        yield _sse({"detail": f"Vertex AI call failed: {e}"}, event="error")
+        return
+    finally:
+        await chunks.aclose()
+
+    draft_id = await run_in_threadpool(_store_streamed_draft, tender_id, company_id, "".join(parts))
+    yield _sse({"draft_id": draft_id}, event="done")
+
+def _store_streamed_draft(tender_id: int, company_id: int, draft_text: str) -> int:
+    # The request's session is closed once the response starts, so the
+    # finished draft is saved with a session of its own
+    db = SessionLocal()
+    try:
+        draft = _save_draft(db, BidDraft(tender_id=tender_id, company_id=company_id, draft_text=draft_text))
+        return draft.id
+    finally:
+        db.close()
+
+def _tender_and_company(db: Session, tender_id: int, company_id: int):
     tender = db.query(Tender).filter(Tender.id == tender_id).first()
     company = db.query(CompanyProfile).filter(CompanyProfile.id == company_id).first()
     if not tender or not company:
         raise HTTPException(status_code=404, detail="Tender or Company not found")
+    return tender, company
+
+def _get_draft(db: Session, draft_id: int) -> BidDraft:
+    draft = db.query(BidDraft).filter(BidDraft.id == draft_id).first()
+    if not draft:
+        raise HTTPException(status_code=404, detail="Draft not found")
+    return draft
 
-    draft_text = generate_bid_draft(tender.extracted_data, company.__dict__, additional_context)
-    draft = BidDraft(tender_id=tender_id, company_id=company_id, draft_text=draft_text)
+def _save_draft(db: Session, draft: BidDraft) -> BidDraft:
     db.add(draft)
     db.commit()
     db.refresh(draft)
     return draft
 
+def _sse(payload: dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(payload)}\n\n"
+
 @router.get("/{draft_id}", response_model=BidDraftOut)
 def get_bid_draft(draft_id: int, db: Session = Depends(get_db)):
-    draft = db.query(BidDraft).filter(BidDraft.id == draft_id).first()
-    if not draft:
-        raise HTTPException(status_code=404, detail="Draft not found")
-    return draft
\ No newline at end of file
+    return _get_draft(db, draft_id)
\ No newline at end of file
@@ -5,6 +5,9 @@ from typing import List
 from database import get_db
 from models import CompanyProfile
 from schemas import CompanyProfileCreate, CompanyProfileOut
+from services.compliance_batch import invalidate_company_matrix
+from services.compliance_reports import invalidate_reports
+from services.vocabulary import vocab_ids
 from utils.security import get_current_user  # optional, implement JWT auth
 
 router = APIRouter()
@@ -12,9 +15,11 @@ router = APIRouter()
 @router.post("/", response_model=CompanyProfileOut)
 def create_company(profile: CompanyProfileCreate, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
     company = CompanyProfile(**profile.dict(), user_id=current_user.id)
+    company.vocab_ids = vocab_ids(company.certifications, company.available_documents)
     db.add(company)
     db.commit()
     db.refresh(company)
+    invalidate_company_matrix(current_user.id)
     return company
 
 @router.get("/", response_model=List[CompanyProfileOut])
@@ -35,8 +40,11 @@ def update_company(company_id: int, profile: CompanyProfileCreate, db: Session =
         raise HTTPException(status_code=404, detail="Company not found")
     for key, value in profile.dict().items():
         setattr(company, key, value)
+    company.vocab_ids = vocab_ids(company.certifications, company.available_documents)
+    invalidate_reports(db, company_id=company.id)
     db.commit()
     db.refresh(company)
+    invalidate_company_matrix(current_user.id)
     return company
 
 @router.delete("/{company_id}")
@@ -46,4 +54,5 @@ def delete_company(company_id: int, db: Session = Depends(get_db), current_user=
         raise HTTPException(status_code=404, detail="Company not found")
     db.delete(company)
     db.commit()
+    invalidate_company_matrix(current_user.id)
     return {"detail": "Company deleted"}
\ No newline at end of file
@@ -1,41 +1,75 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List, Dict
+from typing import Optional
 
 from database import get_db
-from models import ComplianceReport, Tender, CompanyProfile
-from schemas import ComplianceReportOut
-from ai_copilot import analyze_compliance_gaps
+from models import Tender, CompanyProfile
+from schemas import ComplianceReportOut, TenderRankingOut, WhatIfOut, WhatIfRequest
+from services.compliance_batch import company_matrix, profile_data, rank_companies
+from services.compliance_reports import get_report
+from services.compliance_whatif import simulate
 from utils.security import get_current_user
 
 router = APIRouter()
 
-@router.post("/{tender_id}/{company_id}", response_model=ComplianceReportOut)
-def create_compliance_report(tender_id: int, company_id: int, gaps: List[Dict], db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+# Declared before /{tender_id}/{company_id}, which would otherwise capture it
+@router.get("/batch/{tender_id}", response_model=TenderRankingOut)
+async def rank_companies_for_tender(tender_id: int,
+                                    top_n: Optional[int] = Query(None, ge=1),
+                                    details: bool = Query(False, description="Include full gap reports for the returned companies"),
+                                    db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    """Score every company profile of the current user against one tender, best first."""
+    tender, matrix = await run_in_threadpool(_tender_and_matrix, db, tender_id, current_user.id)
+    try:
+        results = await run_in_threadpool(rank_companies, tender.extracted_data or {}, matrix, top_n, details)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=422, detail="Tender requirements are not in a scorable form")
+    return {"tender_id": tender_id, "companies_scored": len(matrix), "results": results}
+
+def _tender_and_matrix(db: Session, tender_id: int, user_id: int):
+    tender = db.query(Tender).filter(Tender.id == tender_id).first()
+    if not tender:
+        raise HTTPException(status_code=404, detail="Tender not found")
+    return tender, company_matrix(db, user_id)
+
+@router.post("/whatif", response_model=WhatIfOut)
+def what_if(request: WhatIfRequest, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    """
+    Score hypothetical profile changes against a tender (nothing is saved),
+    with the fewest further changes that would make the company ELIGIBLE.
+    """
+    tender = db.query(Tender).filter(Tender.id == request.tender_id).first()
+    company = db.query(CompanyProfile).filter(CompanyProfile.id == request.company_id,
+                                              CompanyProfile.user_id == current_user.id).first()
+    if not tender or not company:
+        raise HTTPException(status_code=404, detail="Tender or Company not found")
+
+    try:
+        result = simulate(tender.extracted_data or {}, profile_data(company),
+                          request.changes.dict(exclude_none=True), request.plan)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=422, detail="Tender requirements are not in a scorable form")
+    return {"tender_id": tender.id, "company_id": company.id, **result}
+
+def _tender_and_company(db: Session, tender_id: int, company_id: int):
     tender = db.query(Tender).filter(Tender.id == tender_id).first()
     company = db.query(CompanyProfile).filter(CompanyProfile.id == company_id).first()
     if not tender or not company:
         raise HTTPException(status_code=404, detail="Tender or Company not found")
+    return tender, company
 
-    ai_analysis = analyze_compliance_gaps(tender.extracted_data, company.__dict__, gaps)
-
-    report = ComplianceReport(
-        tender_id=tender_id,
-        company_id=company_id,
-        score=0,  # initial, can calculate separately
-        verdict="Pending",
-        gaps=gaps,
-        recommendations=[],
-        ai_analysis=ai_analysis
-    )
-    db.add(report)
-    db.commit()
-    db.refresh(report)
-    return report
+@router.post("/{tender_id}/{company_id}", response_model=ComplianceReportOut)
+async def create_compliance_report(tender_id: int, company_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    """Score the company against the tender; an up-to-date stored report is returned as is."""
+    tender, company = await run_in_threadpool(_tender_and_company, db, tender_id, company_id)
+    return await get_report(db, tender, company)
 
 @router.get("/{tender_id}/{company_id}", response_model=ComplianceReportOut)
-def get_compliance_report(tender_id: int, company_id: int, db: Session = Depends(get_db)):
-    report = db.query(ComplianceReport).filter(ComplianceReport.tender_id == tender_id, ComplianceReport.company_id == company_id).first()
+async def get_compliance_report(tender_id: int, company_id: int, db: Session = Depends(get_db)):
+    """The stored report, recomputed first if the profile or tender changed since."""
+    tender, company = await run_in_threadpool(_tender_and_company, db, tender_id, company_id)
+    report = await get_report(db, tender, company, create=False)
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
-    return report
\ No newline at end of file
+    return report
@@ -1,38 +1,94 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import inspect
 from sqlalchemy.orm import Session
-from typing import List, Dict
+from typing import List, Dict, Optional
 
+from config import COPILOT_TOP_K
 from database import get_db
-from models import CopilotSession, Tender
+from models import Tender
 from schemas import CopilotSessionOut, CopilotMessage
-from ai_copilot import copilot_answer
+from services.copilot_service import (
+    append_messages, get_or_create_session, latest_session, message_page, prompt_history, refresh_summary, summary_due
+)
+from services.gemini_client import copilot_answer_async
+from services.retrieval import tender_context, top_chunks
+from services.tender_faq import FAQ_VERSION, build_faq, faq_stats, match_faq
 from utils.security import get_current_user
 
 router = APIRouter()
 
+PAGE_SIZE = 50
+
+def _session_out(db: Session, session, limit: int = PAGE_SIZE, before_seq: Optional[int] = None) -> CopilotSessionOut:
+    rows, has_more = message_page(db, session.id, limit, before_seq)
+    return CopilotSessionOut(
+        id=session.id,
+        messages=[CopilotMessage.model_validate(row) for row in rows],
+        message_count=session.message_count or 0,
+        has_more=has_more,
+    )
+
 @router.post("/{tender_id}", response_model=CopilotSessionOut)
-def send_copilot_message(tender_id: int, message: CopilotMessage, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+async def send_copilot_message(tender_id: int, message: CopilotMessage, background_tasks: BackgroundTasks, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    tender, session, summary, history = await run_in_threadpool(_open_turn, db, tender_id)
+    history.append({"role": "user", "content": message.content})
+
+    # Standard questions (deadline, EMD, documents, ...) come from the tender's FAQ, no LLM call
+    if tender.status != "pending" and (tender.faq or {}).get("v") != FAQ_VERSION:
+        tender.faq = build_faq(tender.extracted_data)  # tender ingested before the FAQ existed
+    response_text = match_faq(tender.faq, message.content)
+
+    if response_text is None:
+        # Only the top-k raw_text chunks for this question + compact extracted_data go in the prompt
+        context = await run_in_threadpool(tender_context, tender)
+        # Tender ingested before indexing existed; a pending tender's raw_text is still partial
+        if tender.retrieval_index is None and tender.status != "pending":
+            tender.retrieval_index = context.index
+        excerpts = top_chunks(context.index, tender.raw_text or "", message.content, COPILOT_TOP_K)
+
+        response_text = await copilot_answer_async(tender.extracted_data, message.content, history,
+                                                   excerpts, context.render(message.content),
+                                                   summary=summary, history_limit=None)
+
+    out, due = await run_in_threadpool(_close_turn, db, session, [
+        {"role": "user", "content": message.content},
+        {"role": "assistant", "content": response_text},
+    ])
+    if due:
+        background_tasks.add_task(refresh_summary, session.id)
+    return out
+
+def _open_turn(db: Session, tender_id: int):
     tender = db.query(Tender).filter(Tender.id == tender_id).first()
     if not tender:
         raise HTTPException(status_code=404, detail="Tender not found")
 
     # get last session or create new
-    session = db.query(CopilotSession).filter(CopilotSession.tender_id == tender_id).order_by(CopilotSession.id.desc()).first()
-    if not session:
-        session = CopilotSession(tender_id=tender_id, messages=[])
-    session.messages.append(message.dict())
+    session = get_or_create_session(db, tender_id)
+    if inspect(tender).expired_attributes:
+        db.refresh(tender)  # a new session was committed; reload here, not on the event loop
+    # Rolling summary + the turns after it, instead of the whole history
+    summary, history = prompt_history(db, session)
+    return tender, session, summary, history
 
-    response_text = copilot_answer(tender.extracted_data, message.content, session.messages)
-    session.messages.append({"role": "assistant", "content": response_text})
-
-    db.add(session)
+def _close_turn(db: Session, session, messages: List[Dict]):
+    # Append this turn's two rows; earlier messages are never rewritten
+    append_messages(db, session, messages)
     db.commit()
-    db.refresh(session)
-    return session
+    return _session_out(db, session), summary_due(session)
+
+@router.get("/faq/stats")
+def get_faq_stats(current_user=Depends(get_current_user)):
+    """Share of copilot questions answered from tender FAQs (this worker)."""
+    return faq_stats()
 
 @router.get("/{tender_id}", response_model=CopilotSessionOut)
-def get_copilot_session(tender_id: int, db: Session = Depends(get_db)):
-    session = db.query(CopilotSession).filter(CopilotSession.tender_id == tender_id).order_by(CopilotSession.id.desc()).first()
+def get_copilot_session(tender_id: int,
+                        limit: int = Query(PAGE_SIZE, ge=1, le=500),
+                        before_seq: Optional[int] = Query(None, description="Return messages older than this seq"),
+                        db: Session = Depends(get_db)):
+    session = latest_session(db, tender_id)
     if not session:
         raise HTTPException(status_code=404, detail="No session found")
-    return session
\ No newline at end of file
+    return _session_out(db, session, limit, before_seq)
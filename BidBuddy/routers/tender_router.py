@@ -1,53 +1,218 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from datetime import date
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
-import shutil, os
+from typing import List, Optional
 
+from config import RULE_EXTRACT_DEFER_LLM
 from database import get_db
-from models import Tender
-from schemas import TenderOut
-from utils.pdf_praser import extract_text_from_pdf
-from services.gemini_client import extract_tender_structure
+from models import CompanyProfile, Tender
+from schemas import TenderMatchesOut, TenderOut
+from services.compliance_batch import profile_data
+from services.pdf_extractor import extract_text_from_pdf, extract_text_incremental, extract_text_streaming
+from services.gemini_client import extract_tender_structure_async
+from services.retrieval import build_index
+from services.tender_faq import build_faq
+from services.tender_index import eligibility_index, index_tender, tender_vocab_ids
+from services.rule_extractor import extract_rule_fields
+from services.tender_service import (
+    get_cached_extraction, cache_extraction, revision_targets, merge_revision,
+    provisional_extraction, extract_with_rules, complete_extraction
+)
+from services.upload_store import save_upload
 from utils.security import get_current_user
 
-UPLOAD_DIR = "uploads/tenders"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
 router = APIRouter()
 
 @router.post("/", response_model=TenderOut)
-def upload_tender(file: UploadFile = File(...), db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
-    with open(file_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
+async def upload_tender(background_tasks: BackgroundTasks, file: UploadFile = File(...), db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    content_hash, file_path = await run_in_threadpool(save_upload, file.file)
+
+    # Same PDF seen before (any user) — reuse its extraction, no pdfplumber/LLM call
+    cached = await run_in_threadpool(get_cached_extraction, db, content_hash)
+    if not cached:
+        if RULE_EXTRACT_DEFER_LLM:
+            # Read pages only until the eligibility / documents / scope
+            # sections are complete and respond with the rule-based fields
+            # (status "pending"). complete_extraction reads the whole PDF and
+            # fills in the rest after the response is sent.
+            extraction = await run_in_threadpool(extract_text_streaming, file_path)
+            if not extraction["success"]:
+                tender = _failed_tender(extraction, file.filename, content_hash, current_user.id)
+                return await run_in_threadpool(_save, db, tender)
+            rules = await run_in_threadpool(extract_rule_fields, extraction["sections"], extraction["full_text"])
+            tender = _tender(content_hash, extraction["full_text"], None, None,
+                             provisional_extraction(rules), file.filename, current_user.id)
+            tender = await run_in_threadpool(_save, db, tender)
+            background_tasks.add_task(complete_extraction, content_hash, file_path)
+            return tender
+
+        # pdfplumber is CPU-bound — keep it off the event loop
+        extraction = await run_in_threadpool(extract_text_from_pdf, file_path)
+        if not extraction["success"]:
+            tender = _failed_tender(extraction, file.filename, content_hash, current_user.id)
+            return await run_in_threadpool(_save, db, tender)
+
+        extraction["retrieval_index"] = await run_in_threadpool(build_index, extraction["full_text"])
+
+        # Regex fast path for the standard eligibility fields; only what it
+        # isn't confident about (plus the free-text fields) goes to the LLM
+        rules = await run_in_threadpool(extract_rule_fields, extraction["sections"], extraction["full_text"])
+        extracted_data = await extract_with_rules(extraction["full_text"], extraction["sections"], rules)
+        if extraction.get("warning"):
+            tender = _uncached_tender(extraction, extracted_data, file.filename, content_hash, current_user.id)
+            return await run_in_threadpool(_save, db, tender)
+        return await run_in_threadpool(_save_extraction, db, content_hash, extraction, extracted_data,
+                                       file.filename, current_user.id)
+
+    return await run_in_threadpool(_save, db, _tender_from_cache(cached, file.filename, current_user.id))
+
+@router.post("/{tender_id}/revision", response_model=TenderOut)
+async def upload_tender_revision(tender_id: int, file: UploadFile = File(...), db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    """
+    Upload a corrigendum / amended PDF for an existing tender.
+    Only pages that changed are extracted, and only the extracted_data
+    fields their sections feed are re-analysed; everything else is reused.
+    """
+    parent = await run_in_threadpool(_user_tender, db, tender_id, current_user.id)
+    if parent.status == "pending":
+        # Its extracted_data is still provisional; merging onto it would lose the deferred fields
+        raise HTTPException(status_code=409, detail="Tender is still being extracted; upload the revision once it finishes")
+
+    content_hash, file_path = await run_in_threadpool(save_upload, file.file)
 
-    raw_text = extract_text_from_pdf(file_path)
-    extracted_data = extract_tender_structure(raw_text)
+    cached = await run_in_threadpool(get_cached_extraction, db, content_hash)
+    if not cached:
+        if parent.page_fingerprints and parent.raw_text:
+            extraction = await run_in_threadpool(
+                extract_text_incremental, file_path, parent.raw_text, parent.page_fingerprints)
+        else:
+            # Tender uploaded before fingerprints existed — full re-extraction
+            extraction = await run_in_threadpool(extract_text_from_pdf, file_path)
+            extraction["changed_pages"] = list(range(1, extraction["page_count"] + 1))
+
+        if not extraction["success"]:
+            tender = _failed_tender(extraction, file.filename, content_hash, current_user.id, parent)
+            return await run_in_threadpool(_save, db, tender)
+        extraction["retrieval_index"] = await run_in_threadpool(build_index, extraction["full_text"])
+
+        fields, sections, loose_text, complete = revision_targets(extraction, parent.raw_text, parent.page_fingerprints)
+        extracted_data = parent.extracted_data
+        text_to_send = "\n\n".join(
+            [f"=== {key.upper()} ===\n{text}" for key, text in sections.items()] + [loose_text]
+        )
+        if fields and text_to_send.strip():
+            revised = await extract_tender_structure_async(text_to_send)
+            extracted_data = merge_revision(parent.extracted_data, revised, fields, complete)
+        if extraction.get("warning"):
+            tender = _uncached_tender(extraction, extracted_data, file.filename, content_hash, current_user.id, parent)
+            return await run_in_threadpool(_save, db, tender)
+        return await run_in_threadpool(_save_extraction, db, content_hash, extraction, extracted_data,
+                                       file.filename, current_user.id, parent)
+
+    return await run_in_threadpool(_save, db, _tender_from_cache(cached, file.filename, current_user.id, parent))
+
+def _user_tender(db: Session, tender_id: int, user_id: int) -> Tender:
+    tender = db.query(Tender).filter(Tender.id == tender_id, Tender.user_id == user_id).first()
+    if not tender:
+        raise HTTPException(status_code=404, detail="Tender not found")
+    return tender
 
-    tender = Tender(
-        filename=file.filename,
+def _tender_from_cache(cached, filename: str, user_id: int, parent: Tender = None) -> Tender:
+    return _tender(cached.content_hash, cached.raw_text, cached.page_fingerprints, cached.retrieval_index,
+                   cached.extracted_data, filename, user_id, parent)
+
+def _uncached_tender(extraction: dict, extracted_data: dict, filename: str, content_hash: str, user_id: int,
+                    parent: Tender = None) -> Tender:
+    """
+    Tender from an incomplete extraction (low-memory stop). It isn't cached,
+    so the next upload of the PDF tries again; the warning is kept on the
+    tender.
+    """
+    tender = _tender(content_hash, extraction["full_text"], extraction.get("page_fingerprints"),
+                     extraction.get("retrieval_index"), extracted_data, filename, user_id, parent)
+    tender.error_message = extraction["warning"]
+    return tender
+
+def _tender(content_hash: str, raw_text: str, page_fingerprints, retrieval_index, extracted_data: dict,
+            filename: str, user_id: int, parent: Tender = None) -> Tender:
+    pending = bool(extracted_data.get("_pending_fields"))
+    return Tender(
+        filename=filename,
+        content_hash=content_hash,
         raw_text=raw_text,
+        page_fingerprints=page_fingerprints,
+        retrieval_index=retrieval_index,
         extracted_data=extracted_data,
+        faq=None if pending else build_faq(extracted_data),  # pending: built by complete_extraction
+        vocab_ids=tender_vocab_ids(extracted_data),
         title=extracted_data.get("title"),
         issuing_authority=extracted_data.get("issuing_authority"),
         deadline=extracted_data.get("deadline"),
         sector=extracted_data.get("sector"),
         estimated_value=extracted_data.get("estimated_value"),
-        user_id=current_user.id,
-        status="extracted"
+        user_id=user_id,
+        parent_id=parent.id if parent else None,
+        version=(parent.version or 1) + 1 if parent else 1,
+        status="pending" if pending else "extracted"
     )
+
+def _failed_tender(extraction: dict, filename: str, content_hash: str, user_id: int, parent: Tender = None) -> Tender:
+    return Tender(
+        filename=filename,
+        content_hash=content_hash,
+        raw_text=extraction["full_text"],
+        user_id=user_id,
+        parent_id=parent.id if parent else None,
+        version=(parent.version or 1) + 1 if parent else 1,
+        status="failed",
+        error_message=extraction["error"]
+    )
+
+def _save_extraction(db: Session, content_hash: str, extraction: dict, extracted_data: dict,
+                     filename: str, user_id: int, parent: Tender = None) -> Tender:
+    # One threadpool call: cache_extraction's commit expires `parent`
+    cached = cache_extraction(db, content_hash, extraction, extracted_data)
+    return _save(db, _tender_from_cache(cached, filename, user_id, parent))
+
+def _save(db: Session, tender: Tender) -> Tender:
     db.add(tender)
     db.commit()
     db.refresh(tender)
+    index_tender(tender)  # pending tenders are indexed by complete_extraction
     return tender
 
 @router.get("/", response_model=List[TenderOut])
 def list_tenders(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
     return db.query(Tender).filter(Tender.user_id == current_user.id).all()
 
+@router.get("/matches/{company_id}", response_model=TenderMatchesOut)
+def match_tenders(company_id: int,
+                  strict: bool = Query(False, description="Require every threshold to be met in full"),
+                  same_sector: bool = Query(False, description="Only tenders in one of the company's sectors"),
+                  open_only: bool = Query(True, description="Skip tenders whose deadline has passed"),
+                  limit: Optional[int] = Query(None, ge=1),
+                  db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+    """
+    The current user's tenders this company can bid on, best score first.
+    The eligibility index prunes to candidates; only those are scored.
+    """
+    company = db.query(CompanyProfile).filter(CompanyProfile.id == company_id, CompanyProfile.user_id == current_user.id).first()
+    if not company:
+        raise HTTPException(status_code=404, detail="Company not found")
+
+    eligibility_index.sync(db)
+    candidates, results = eligibility_index.matches(
+        profile_data(company),
+        strict=strict,
+        sectors=(company.sectors or []) if same_sector else None,
+        user_id=current_user.id,
+        open_on=date.today() if open_only else None,
+        limit=limit,
+    )
+    return {"company_id": company_id, "tenders_indexed": len(eligibility_index),
+            "candidates": candidates, "results": results}
+
 @router.get("/{tender_id}", response_model=TenderOut)
 def get_tender(tender_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    tender = db.query(Tender).filter(Tender.id == tender_id, Tender.user_id == current_user.id).first()
-    if not tender:
-        raise HTTPException(status_code=404, detail="Tender not found")
-    return tender
\ No newline at end of file
+    return _user_tender(db, tender_id, current_user.id)
\ No newline at end of file
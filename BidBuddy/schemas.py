@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List, Dict
 
@@ -50,28 +51,95 @@ class TenderOut(BaseModel):
     deadline: Optional[str]
     sector: Optional[str]
     estimated_value: Optional[float]
+    status: Optional[str] = None
+    error_message: Optional[str] = None   # failure reason, or why the text is incomplete
 
     class Config:
         orm_mode = True
 
+class TenderMatchOut(BaseModel):
+    tender_id: int
+    title: Optional[str]
+    sector: Optional[str]
+    deadline: Optional[str]
+    score: float
+    verdict: str
+
+class TenderMatchesOut(BaseModel):
+    company_id: int
+    tenders_indexed: int
+    candidates: int          # left after the index lookups, before exact scoring
+    results: List[TenderMatchOut]
+
 # ----------------- Compliance Report Schemas -----------------
 class ComplianceReportOut(BaseModel):
     id: int
+    tender_id: int
+    company_id: int
     score: float
     verdict: str
     gaps: List[Dict]
-    recommendations: List[Dict]
+    recommendations: List[str]
     ai_analysis: Optional[str]
+    updated_at: Optional[datetime] = None
 
     class Config:
         orm_mode = True
 
+class CompanyRankingOut(BaseModel):
+    company_id: int
+    name: str
+    score: float
+    verdict: str
+    msme_bonus: int
+    details: Optional[Dict] = None   # full score_compliance result, when requested
+
+class TenderRankingOut(BaseModel):
+    tender_id: int
+    companies_scored: int
+    results: List[CompanyRankingOut]
+
+class ProfileChanges(BaseModel):
+    """Hypothetical profile edits for a what-if run: set a value, or add to a list."""
+    annual_turnover: Optional[float] = None
+    years_in_operation: Optional[int] = None
+    max_single_project_value: Optional[float] = None
+    msme_category: Optional[str] = None
+    add_certifications: List[str] = []
+    add_documents: List[str] = []
+    add_projects: List[Dict] = []   # [{ "name": ..., "value": 200 }] (₹ Lakhs)
+
+class WhatIfRequest(BaseModel):
+    tender_id: int
+    company_id: int
+    changes: ProfileChanges = ProfileChanges()
+    plan: bool = True   # also search for the fewest changes that reach ELIGIBLE
+
+class WhatIfPlanOut(BaseModel):
+    steps: List[str]
+    changes: Dict
+    score: float
+    verdict: str
+
+class WhatIfOut(BaseModel):
+    tender_id: int
+    company_id: int
+    base: Dict             # { score, verdict } of the profile as it is
+    scenario: Dict         # { score, verdict } with the changes applied
+    score_delta: float
+    verdict_changed: bool
+    rules_changed: List[str]
+    gaps: List[Dict]
+    recommendations: List[str]
+    plan: Optional[WhatIfPlanOut] = None
+
 # ----------------- Bid Draft Schemas -----------------
 class BidDraftOut(BaseModel):
     id: int
     draft_text: str
     version: int
     status: str
+    sections: Optional[Dict[str, str]] = None
 
     class Config:
         from_attributes= True
@@ -80,10 +148,16 @@ class BidDraftOut(BaseModel):
 class CopilotMessage(BaseModel):
     role: str
     content: str
+    seq: Optional[int] = None
+
+    class Config:
+        from_attributes = True
 
 class CopilotSessionOut(BaseModel):
     id: int
-    messages: List[CopilotMessage]
+    messages: List[CopilotMessage]   # one page, oldest first
+    message_count: int = 0
+    has_more: bool = False           # older messages before messages[0].seq
 
     class Config:
         from_attributes = True
\ No newline at end of file
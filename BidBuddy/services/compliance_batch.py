@@ -0,0 +1,223 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+import models
+from services.compliance_engine import DEDUCTIONS, score_compliance
+from services.vocabulary import CERTIFICATION, DOCUMENT, company_term_ids, required_terms, stored_ids
+
+# Batch version of compliance_engine.score_compliance: one tender against
+# many company profiles at once.
+#
+# Profiles are loaded into columns (turnover, years, max project value,
+# MSME flag) plus bitsets over the canonical certification and document
+# IDs (services.vocabulary) seen across all of them, and each rule is
+# evaluated for every company in a handful of array operations. Deductions are summed in the same order and with the
+# same float arithmetic as the scalar function, so scores and verdicts are
+# identical; the gap/met-criteria dicts are only built (by score_compliance
+# itself) for the companies a caller asks details for.
+#
+# Building the matrix is most of a batch request, so each user's matrix is
+# kept (company_matrix) until their profiles change: company edits call
+# invalidate_company_matrix(), and a count / max(id) / max(updated_at)
+# check catches edits made through other workers.
+
+# Users whose CompanyMatrix is kept in memory (least recently used dropped)
+MATRIX_CACHE_USERS = 256
+
+VERDICTS = ["ELIGIBLE", "LIKELY ELIGIBLE", "BORDERLINE", "INELIGIBLE", "CONDITIONALLY INELIGIBLE"]
+
+
+def profile_data(company) -> Dict:
+    """
+    The CompanyProfile fields score_compliance reads, as a dict. Unset
+    columns become 0 / [] / "" - score_compliance can't compare None.
+    """
+    certifications = company.certifications or []
+    available_documents = company.available_documents or []
+    return {
+        "annual_turnover":          company.annual_turnover or 0,
+        "years_in_operation":       company.years_in_operation or 0,
+        "certifications":           certifications,
+        "max_single_project_value": company.max_single_project_value or 0,
+        "past_projects":            company.past_projects or [],
+        "available_documents":      available_documents,
+        "msme_category":            company.msme_category or "",
+        "vocab_ids":                stored_ids(company.vocab_ids, certifications, available_documents),
+    }
+
+
+class _Bitsets:
+    """Rows of bits over the IDs present in them, packed into uint64 words."""
+
+    def __init__(self, rows: List[List[int]]):
+        self.vocab: Dict[int, int] = {}
+        for row in rows:
+            for item in row:
+                self.vocab.setdefault(item, len(self.vocab))
+        words = max(1, (len(self.vocab) + 63) // 64)
+        self.bits = np.zeros((len(rows), words), dtype=np.uint64)
+        for i, row in enumerate(rows):
+            for item in row:
+                index = self.vocab[item]
+                self.bits[i, index // 64] |= np.uint64(1) << np.uint64(index % 64)
+
+    def has(self, item: int) -> np.ndarray:
+        """Rows containing `item`."""
+        index = self.vocab.get(item)
+        if index is None:
+            return np.zeros(len(self.bits), dtype=bool)
+        return ((self.bits[:, index // 64] >> np.uint64(index % 64)) & np.uint64(1)).astype(bool)
+
+
+class CompanyMatrix:
+    """Columnar view of company profiles for batch scoring."""
+
+    def __init__(self, ids: List[int], names: List[str], companies: List[Dict]):
+        self.ids = np.array(ids, dtype=np.int64)
+        self.names = names
+        self.companies = companies  # profile_data dicts, for detailed results
+        self.turnover = np.array([c.get("annual_turnover", 0) for c in companies], dtype=np.float64)
+        self.years = np.array([c.get("years_in_operation", 0) for c in companies], dtype=np.float64)
+        self.max_project = np.array([max_project_value(c) for c in companies], dtype=np.float64)
+        self.msme = np.array([bool(c.get("msme_category", "")) for c in companies], dtype=bool)
+        self.certs = _Bitsets([company_term_ids(c, CERTIFICATION) for c in companies])
+        self.docs = _Bitsets([company_term_ids(c, DOCUMENT) for c in companies])
+
+    @classmethod
+    def from_profiles(cls, profiles) -> "CompanyMatrix":
+        return cls([p.id for p in profiles], [p.name for p in profiles], [profile_data(p) for p in profiles])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+_matrices: "OrderedDict[int, Tuple[tuple, CompanyMatrix]]" = OrderedDict()
+_matrices_lock = threading.Lock()
+
+
+def company_matrix(db: Session, user_id: int) -> CompanyMatrix:
+    """CompanyMatrix of the user's profiles, rebuilt only when they changed."""
+    profiles = db.query(models.CompanyProfile).filter(models.CompanyProfile.user_id == user_id)
+    signature = tuple(profiles.with_entities(
+        func.count(models.CompanyProfile.id), func.max(models.CompanyProfile.id),
+        func.max(models.CompanyProfile.updated_at)).one())
+    with _matrices_lock:
+        cached = _matrices.get(user_id)
+        if cached and cached[0] == signature:
+            _matrices.move_to_end(user_id)
+            return cached[1]
+
+    matrix = CompanyMatrix.from_profiles(profiles.order_by(models.CompanyProfile.id).all())
+    with _matrices_lock:
+        _matrices[user_id] = (signature, matrix)
+        _matrices.move_to_end(user_id)
+        while len(_matrices) > MATRIX_CACHE_USERS:
+            _matrices.popitem(last=False)
+    return matrix
+
+
+def invalidate_company_matrix(user_id: int) -> None:
+    with _matrices_lock:
+        _matrices.pop(user_id, None)
+
+
+def max_project_value(company: Dict) -> float:
+    """Largest single past project, as score_compliance works it out."""
+    value = company.get("max_single_project_value", 0)
+    if not value:
+        past_projects = company.get("past_projects", [])
+        if past_projects:
+            value = max(p.get("value", 0) for p in past_projects)
+    return value or 0
+
+
+def score_batch(tender_data: Dict, matrix: CompanyMatrix) -> Dict[str, np.ndarray]:
+    """
+    Score every company in `matrix` against one tender. Returns arrays:
+    "score" (unrounded, as score_compliance computes it before rounding),
+    "verdict" (index into VERDICTS) and "msme_bonus".
+    """
+    n = len(matrix)
+    eligibility = tender_data.get("eligibility") or {}
+    deducted = np.zeros(n, dtype=np.float64)
+    disqualified = np.zeros(n, dtype=bool)
+
+    # Rule 1: turnover - half deduction within 70% of the requirement
+    required = eligibility.get("min_turnover")
+    if required:
+        short = matrix.turnover < required
+        near = (matrix.turnover / required) * 100 >= 70
+        deducted += np.where(short, np.where(near, DEDUCTIONS["turnover"] * 0.5, DEDUCTIONS["turnover"]), 0.0)
+        disqualified |= short & ~near
+
+    # Rule 2: years of experience
+    required = eligibility.get("years_experience")
+    if required:
+        short = matrix.years < required
+        deducted += np.where(short, float(DEDUCTIONS["years_experience"]), 0.0)
+        disqualified |= short
+
+    # Rule 3: certifications - proportional to the fraction missing
+    required_certs = required_terms(CERTIFICATION, eligibility.get("required_certifications", []))
+    if required_certs:
+        matched = np.zeros(n, dtype=np.int64)
+        for cert in required_certs:
+            matched += matrix.certs.has(cert)
+        missing = len(required_certs) - matched
+        fraction = missing / len(required_certs)
+        deducted += np.where(missing > 0, DEDUCTIONS["certifications"] * fraction, 0.0)
+        disqualified |= fraction == 1.0
+
+    # Rule 4: largest single past project
+    required = eligibility.get("min_single_project_value")
+    if required:
+        deducted += np.where(matrix.max_project < required, float(DEDUCTIONS["past_project"]), 0.0)
+
+    # Rule 5: documents - proportional to the fraction missing
+    required_docs = required_terms(DOCUMENT, tender_data.get("documents_required", []))
+    if required_docs:
+        missing = np.zeros(n, dtype=np.int64)
+        for doc in required_docs:
+            missing += ~matrix.docs.has(doc)
+        fraction = missing / len(required_docs)
+        deducted += np.where(missing > 0, DEDUCTIONS["documents"] * fraction, 0.0)
+
+    msme_bonus = np.where(matrix.msme, 5, 0) if eligibility.get("msme_preference", False) else np.zeros(n, dtype=np.int64)
+
+    score = np.clip(100.0 - deducted + msme_bonus, 0.0, 105.0)
+    verdict = np.select(
+        [disqualified & (score >= 60), disqualified, score >= 80, score >= 60, score >= 40],
+        [4, 3, 0, 1, 2],
+        default=3,
+    )
+    return {"score": score, "verdict": verdict, "msme_bonus": msme_bonus}
+
+
+def rank_companies(tender_data: Dict, matrix: CompanyMatrix, top_n: Optional[int] = None,
+                   details: bool = False) -> List[Dict]:
+    """
+    Companies best score first (ties by id), optionally cut to `top_n`.
+    With `details`, each result carries the full score_compliance report.
+    """
+    scored = score_batch(tender_data, matrix)
+    order = np.lexsort((matrix.ids, -scored["score"]))
+    if top_n is not None:
+        order = order[:top_n]
+    results = []
+    for i in order.tolist():
+        result = {
+            "company_id": int(matrix.ids[i]),
+            "name":       matrix.names[i],
+            "score":      round(float(scored["score"][i]), 1),
+            "verdict":    VERDICTS[scored["verdict"][i]],
+            "msme_bonus": int(scored["msme_bonus"][i]),
+        }
+        if details:
+            result["details"] = score_compliance(tender_data, matrix.companies[i])
+        results.append(result)
+    return results
@@ -1,6 +1,8 @@
 
 from typing import Dict, List, Tuple
 
+from services.vocabulary import CERTIFICATION, DOCUMENT, company_term_ids, required_terms
+
 DISQUALIFYING = "DISQUALIFYING"   
 MAJOR         = "MAJOR"           
 MINOR         = "MINOR"           
@@ -16,6 +18,22 @@ DEDUCTIONS = {
 }
 
 
+# Rule order matters: deductions are summed in this order, and
+# compliance_batch relies on the same order for identical floats
+RULES = ["turnover", "experience", "certifications", "past_project", "documents"]
+
+# Company fields each rule reads - a profile change only needs the rules
+# listed for the fields it touches re-evaluated (services.compliance_whatif)
+RULE_INPUTS = {
+    "turnover":       ["annual_turnover"],
+    "experience":     ["years_in_operation"],
+    "certifications": ["certifications", "vocab_ids"],
+    "past_project":   ["max_single_project_value", "past_projects"],
+    "documents":      ["available_documents", "vocab_ids"],
+    "msme":           ["msme_category"],
+}
+
+
 def score_compliance(tender_data: Dict, company_data: Dict) -> Dict:
     """
     Main compliance scoring function.
@@ -34,135 +52,193 @@ def score_compliance(tender_data: Dict, company_data: Dict) -> Dict:
             "breakdown": {...}
         }
     """
+    return combine_rules(tender_data, company_data, evaluate_rules(tender_data, company_data))
+
+
+def evaluate_rules(tender_data: Dict, company_data: Dict, rules=None) -> Dict[str, Dict]:
+    """
+    Evaluate `rules` (default: all of RULES plus "msme") on their own.
+    Each result is {"deduction", "gaps", "met", "breakdown"}; the msme one
+    carries "bonus" instead of a deduction.
+    """
+    eligibility = tender_data.get("eligibility", {})
+    results = {}
+    for rule in rules or RULE_INPUTS:
+        results[rule] = _RULE_FUNCTIONS[rule](tender_data, eligibility, company_data)
+    return results
+
+
+def combine_rules(tender_data: Dict, company_data: Dict, results: Dict[str, Dict]) -> Dict:
+    """The score_compliance report from per-rule results (every rule present)."""
     gaps          = []
     met_criteria  = []
-    deducted      = 0.0
     breakdown     = {}
 
-    eligibility   = tender_data.get("eligibility", {})
+    for rule in RULES:
+        result = results[rule]
+        met_criteria.extend(result["met"])
+        gaps.extend(result["gaps"])
+        breakdown.update(result["breakdown"])
 
-    
+    msme_bonus = results["msme"]["bonus"]
+    met_criteria.extend(results["msme"]["met"])
+
+    score, verdict = score_rules(results)
+    recommendations = _generate_recommendations(gaps, tender_data.get("eligibility", {}), company_data)
+
+    return {
+        "score":           round(score, 1),
+        "verdict":         verdict,
+        "gaps":            gaps,
+        "met_criteria":    met_criteria,
+        "recommendations": recommendations,
+        "breakdown":       breakdown,
+        "msme_bonus":      msme_bonus,
+    }
+
+
+def score_rules(results: Dict[str, Dict]) -> Tuple[float, str]:
+    """(unrounded score, verdict) from per-rule results, without building the report."""
+    deducted = 0.0
+    gaps     = []
+    for rule in RULES:
+        deducted += results[rule]["deduction"]
+        gaps.extend(results[rule]["gaps"])
+
+    # ── Final Score ───────────────────────────────────────────
+    raw_score = 100.0 - deducted + results["msme"]["bonus"]
+    score     = max(0.0, min(105.0, raw_score))    # Allow up to 105 with MSME bonus
+    return score, _determine_verdict(score, gaps)
+
+
+def _rule(deduction: float, gaps: List[Dict], met: List[Dict], breakdown: Dict) -> Dict:
+    return {"deduction": deduction, "gaps": gaps, "met": met, "breakdown": breakdown}
+
+
+# ── Rule 1: Annual Turnover ───────────────────────────────────
+def _turnover_rule(tender_data: Dict, eligibility: Dict, company_data: Dict) -> Dict:
     required_turnover = eligibility.get("min_turnover")
     company_turnover  = company_data.get("annual_turnover", 0)
 
-    if required_turnover:
-        if company_turnover >= required_turnover:
-            met_criteria.append({
-                "field": "Annual Turnover",
-                "detail": f"✓ ₹{company_turnover}L meets requirement of ₹{required_turnover}L"
-            })
-            breakdown["turnover"] = DEDUCTIONS["turnover"]  # Full points
-        else:
-            shortfall = required_turnover - company_turnover
-            pct_of_requirement = (company_turnover / required_turnover) * 100
-
-            # Partial credit: if within 30% of requirement, softer deduction
-            if pct_of_requirement >= 70:
-                deduction = DEDUCTIONS["turnover"] * 0.5   # 50% deduction
-                severity  = MAJOR
-            else:
-                deduction = DEDUCTIONS["turnover"]
-                severity  = DISQUALIFYING
-
-            gaps.append({
-                "field":     "Annual Turnover",
-                "required":  f"₹{required_turnover}L",
-                "actual":    f"₹{company_turnover}L",
-                "shortfall": f"₹{shortfall}L",
-                "severity":  severity,
-                "deduction": deduction,
-                "note": (
-                    f"Company turnover is {pct_of_requirement:.0f}% of the required amount. "
-                    "Consortium formation may bridge this gap."
-                )
-            })
-            deducted += deduction
-            breakdown["turnover"] = max(0, DEDUCTIONS["turnover"] - deduction)
+    if not required_turnover:
+        return _rule(0.0, [], [], {"turnover": DEDUCTIONS["turnover"]})   # No requirement = full score
+
+    if company_turnover >= required_turnover:
+        met = [{
+            "field": "Annual Turnover",
+            "detail": f"✓ ₹{company_turnover}L meets requirement of ₹{required_turnover}L"
+        }]
+        return _rule(0.0, [], met, {"turnover": DEDUCTIONS["turnover"]})   # Full points
+
+    shortfall = required_turnover - company_turnover
+    pct_of_requirement = (company_turnover / required_turnover) * 100
+
+    # Partial credit: if within 30% of requirement, softer deduction
+    if pct_of_requirement >= 70:
+        deduction = DEDUCTIONS["turnover"] * 0.5   # 50% deduction
+        severity  = MAJOR
     else:
-        breakdown["turnover"] = DEDUCTIONS["turnover"]   # No requirement = full score
+        deduction = DEDUCTIONS["turnover"]
+        severity  = DISQUALIFYING
+
+    gap = {
+        "field":     "Annual Turnover",
+        "required":  f"₹{required_turnover}L",
+        "actual":    f"₹{company_turnover}L",
+        "shortfall": f"₹{shortfall}L",
+        "severity":  severity,
+        "deduction": deduction,
+        "note": (
+            f"Company turnover is {pct_of_requirement:.0f}% of the required amount. "
+            "Consortium formation may bridge this gap."
+        )
+    }
+    return _rule(deduction, [gap], [], {"turnover": max(0, DEDUCTIONS["turnover"] - deduction)})
 
 
-    # ── Rule 2: Years of Experience ───────────────────────────
+# ── Rule 2: Years of Experience ───────────────────────────────
+def _experience_rule(tender_data: Dict, eligibility: Dict, company_data: Dict) -> Dict:
     required_years = eligibility.get("years_experience")
     company_years  = company_data.get("years_in_operation", 0)
 
-    if required_years:
-        if company_years >= required_years:
-            met_criteria.append({
-                "field": "Years of Experience",
-                "detail": f"✓ {company_years} years meets requirement of {required_years} years"
-            })
-            breakdown["experience"] = DEDUCTIONS["years_experience"]
-        else:
-            years_short = required_years - company_years
-            gaps.append({
-                "field":     "Years of Experience",
-                "required":  f"{required_years} years",
-                "actual":    f"{company_years} years",
-                "shortfall": f"{years_short} years",
-                "severity":  DISQUALIFYING,
-                "deduction": DEDUCTIONS["years_experience"],
-                "note": "Experience requirement is a common hard disqualification criterion."
-            })
-            deducted += DEDUCTIONS["years_experience"]
-            breakdown["experience"] = 0
-    else:
-        breakdown["experience"] = DEDUCTIONS["years_experience"]
-
-
-    # ── Rule 3: Required Certifications ───────────────────────
-    required_certs = set(eligibility.get("required_certifications", []))
-    company_certs  = set(company_data.get("certifications", []))
-
-    if required_certs:
-        # Case-insensitive matching
-        company_certs_lower   = {c.lower() for c in company_certs}
-        missing_certs         = []
-        certs_matched         = []
-
-        for cert in required_certs:
-            if cert.lower() in company_certs_lower:
-                certs_matched.append(cert)
-            else:
-                missing_certs.append(cert)
-
-        if certs_matched:
-            met_criteria.append({
-                "field": "Certifications (partial)",
-                "detail": f"✓ Has: {', '.join(certs_matched)}"
-            })
-
-        if missing_certs:
-            # Proportional deduction based on fraction missing
-            fraction_missing = len(missing_certs) / len(required_certs)
-            deduction = DEDUCTIONS["certifications"] * fraction_missing
-            severity  = DISQUALIFYING if fraction_missing == 1.0 else MAJOR
-
-            gaps.append({
-                "field":    "Required Certifications",
-                "required": list(required_certs),
-                "missing":  missing_certs,
-                "has":      certs_matched,
-                "severity": severity,
-                "deduction": round(deduction, 1),
-                "note": (
-                    "Missing certifications often cause technical bid rejection. "
-                    "Fast-track certification is available through QCI India, BIS, and STQC."
-                )
-            })
-            deducted += deduction
-            breakdown["certifications"] = round(DEDUCTIONS["certifications"] - deduction, 1)
+    if not required_years:
+        return _rule(0.0, [], [], {"experience": DEDUCTIONS["years_experience"]})
+
+    if company_years >= required_years:
+        met = [{
+            "field": "Years of Experience",
+            "detail": f"✓ {company_years} years meets requirement of {required_years} years"
+        }]
+        return _rule(0.0, [], met, {"experience": DEDUCTIONS["years_experience"]})
+
+    years_short = required_years - company_years
+    gap = {
+        "field":     "Years of Experience",
+        "required":  f"{required_years} years",
+        "actual":    f"{company_years} years",
+        "shortfall": f"{years_short} years",
+        "severity":  DISQUALIFYING,
+        "deduction": DEDUCTIONS["years_experience"],
+        "note": "Experience requirement is a common hard disqualification criterion."
+    }
+    return _rule(DEDUCTIONS["years_experience"], [gap], [], {"experience": 0})
+
+
+# ── Rule 3: Required Certifications ───────────────────────────
+# Matched on canonical IDs (services.vocabulary), so "ISO 9001:2015"
+# satisfies "ISO-9001"; one requirement per distinct ID
+def _certifications_rule(tender_data: Dict, eligibility: Dict, company_data: Dict) -> Dict:
+    required_certs = required_terms(CERTIFICATION, eligibility.get("required_certifications", []))
+
+    if not required_certs:
+        return _rule(0.0, [], [], {"certifications": DEDUCTIONS["certifications"]})
+
+    company_certs  = set(company_term_ids(company_data, CERTIFICATION))
+    missing_certs  = []
+    certs_matched  = []
+    met            = []
+
+    for cert_id, cert in required_certs.items():
+        if cert_id in company_certs:
+            certs_matched.append(cert)
         else:
-            met_criteria.append({
-                "field": "Certifications",
-                "detail": f"✓ All required certifications present: {', '.join(required_certs)}"
-            })
-            breakdown["certifications"] = DEDUCTIONS["certifications"]
-    else:
-        breakdown["certifications"] = DEDUCTIONS["certifications"]
+            missing_certs.append(cert)
+
+    if certs_matched:
+        met.append({
+            "field": "Certifications (partial)",
+            "detail": f"✓ Has: {', '.join(certs_matched)}"
+        })
+
+    if not missing_certs:
+        met.append({
+            "field": "Certifications",
+            "detail": f"✓ All required certifications present: {', '.join(required_certs.values())}"
+        })
+        return _rule(0.0, [], met, {"certifications": DEDUCTIONS["certifications"]})
+
+    # Proportional deduction based on fraction missing
+    fraction_missing = len(missing_certs) / len(required_certs)
+    deduction = DEDUCTIONS["certifications"] * fraction_missing
+    severity  = DISQUALIFYING if fraction_missing == 1.0 else MAJOR
+
+    gap = {
+        "field":    "Required Certifications",
+        "required": list(required_certs.values()),
+        "missing":  missing_certs,
+        "has":      certs_matched,
+        "severity": severity,
+        "deduction": round(deduction, 1),
+        "note": (
+            "Missing certifications often cause technical bid rejection. "
+            "Fast-track certification is available through QCI India, BIS, and STQC."
+        )
+    }
+    return _rule(deduction, [gap], met, {"certifications": round(DEDUCTIONS["certifications"] - deduction, 1)})
 
 
-    # ── Rule 4: Past Project Value ─────────────────────────────
+# ── Rule 4: Past Project Value ────────────────────────────────
+def _past_project_rule(tender_data: Dict, eligibility: Dict, company_data: Dict) -> Dict:
     required_project_value = eligibility.get("min_single_project_value")
     company_max_project    = company_data.get("max_single_project_value", 0)
 
@@ -172,101 +248,86 @@ def score_compliance(tender_data: Dict, company_data: Dict) -> Dict:
         if past_projects:
             company_max_project = max(p.get("value", 0) for p in past_projects)
 
-    if required_project_value:
-        if company_max_project >= required_project_value:
-            met_criteria.append({
-                "field": "Past Project Value",
-                "detail": f"✓ Max project ₹{company_max_project}L meets ₹{required_project_value}L requirement"
-            })
-            breakdown["past_project"] = DEDUCTIONS["past_project"]
-        else:
-            gaps.append({
-                "field":    "Past Project Value",
-                "required": f"₹{required_project_value}L (single project)",
-                "actual":   f"₹{company_max_project}L (highest single project)",
-                "severity": MAJOR,
-                "deduction": DEDUCTIONS["past_project"],
-                "note": (
-                    "Lack of qualifying past projects is a major weakness. "
-                    "Consider highlighting similar work, even from different sectors."
-                )
-            })
-            deducted += DEDUCTIONS["past_project"]
-            breakdown["past_project"] = 0
-    else:
-        breakdown["past_project"] = DEDUCTIONS["past_project"]
-
-
-    # ── Rule 5: Document Readiness ────────────────────────────
-    required_docs  = set(tender_data.get("documents_required", []))
-    available_docs = set(company_data.get("available_documents", []))
-
-    if required_docs:
-        missing_docs = []
-        for doc in required_docs:
-            # Fuzzy match: check if any available doc contains the required doc keyword
-            found = any(
-                doc.lower() in avail.lower() or avail.lower() in doc.lower()
-                for avail in available_docs
-            )
-            if not found:
-                missing_docs.append(doc)
-
-        if missing_docs:
-            fraction_missing = len(missing_docs) / len(required_docs)
-            deduction        = DEDUCTIONS["documents"] * fraction_missing
-
-            gaps.append({
-                "field":   "Document Readiness",
-                "missing": missing_docs,
-                "severity": MINOR if fraction_missing < 0.5 else MAJOR,
-                "deduction": round(deduction, 1),
-                "note": (
-                    "Some required documents are not listed as available. "
-                    "Gather these before bid submission."
-                )
-            })
-            deducted += deduction
-            breakdown["documents"] = round(DEDUCTIONS["documents"] - deduction, 1)
-        else:
-            met_criteria.append({
-                "field": "Document Readiness",
-                "detail": "✓ All required documents appear to be available"
-            })
-            breakdown["documents"] = DEDUCTIONS["documents"]
-    else:
-        breakdown["documents"] = DEDUCTIONS["documents"]
+    if not required_project_value:
+        return _rule(0.0, [], [], {"past_project": DEDUCTIONS["past_project"]})
+
+    if company_max_project >= required_project_value:
+        met = [{
+            "field": "Past Project Value",
+            "detail": f"✓ Max project ₹{company_max_project}L meets ₹{required_project_value}L requirement"
+        }]
+        return _rule(0.0, [], met, {"past_project": DEDUCTIONS["past_project"]})
+
+    gap = {
+        "field":    "Past Project Value",
+        "required": f"₹{required_project_value}L (single project)",
+        "actual":   f"₹{company_max_project}L (highest single project)",
+        "severity": MAJOR,
+        "deduction": DEDUCTIONS["past_project"],
+        "note": (
+            "Lack of qualifying past projects is a major weakness. "
+            "Consider highlighting similar work, even from different sectors."
+        )
+    }
+    return _rule(DEDUCTIONS["past_project"], [gap], [], {"past_project": 0})
+
+
+# ── Rule 5: Document Readiness ────────────────────────────────
+# Canonical IDs again: "Balance Sheet" covers "Audited Balance Sheet (3 years)"
+def _documents_rule(tender_data: Dict, eligibility: Dict, company_data: Dict) -> Dict:
+    required_docs = required_terms(DOCUMENT, tender_data.get("documents_required", []))
+
+    if not required_docs:
+        return _rule(0.0, [], [], {"documents": DEDUCTIONS["documents"]})
+
+    available_docs = set(company_term_ids(company_data, DOCUMENT))
+    missing_docs = [doc for doc_id, doc in required_docs.items() if doc_id not in available_docs]
+
+    if not missing_docs:
+        met = [{
+            "field": "Document Readiness",
+            "detail": "✓ All required documents appear to be available"
+        }]
+        return _rule(0.0, [], met, {"documents": DEDUCTIONS["documents"]})
+
+    fraction_missing = len(missing_docs) / len(required_docs)
+    deduction        = DEDUCTIONS["documents"] * fraction_missing
+
+    gap = {
+        "field":   "Document Readiness",
+        "missing": missing_docs,
+        "severity": MINOR if fraction_missing < 0.5 else MAJOR,
+        "deduction": round(deduction, 1),
+        "note": (
+            "Some required documents are not listed as available. "
+            "Gather these before bid submission."
+        )
+    }
+    return _rule(deduction, [gap], [], {"documents": round(DEDUCTIONS["documents"] - deduction, 1)})
 
 
-    # ── MSME Preference Bonus ─────────────────────────────────
+# ── MSME Preference Bonus ─────────────────────────────────────
+def _msme_rule(tender_data: Dict, eligibility: Dict, company_data: Dict) -> Dict:
     msme_preference = eligibility.get("msme_preference", False)
     msme_category   = company_data.get("msme_category", "")
-    msme_bonus      = 0
 
     if msme_preference and msme_category:
-        msme_bonus = 5
-        met_criteria.append({
+        met = [{
             "field": "MSME Preference",
             "detail": f"✓ Tender has MSME preference, company is registered as {msme_category} enterprise"
-        })
-
-
-    # ── Final Score ───────────────────────────────────────────
-    raw_score = 100.0 - deducted + msme_bonus
-    score     = max(0.0, min(105.0, raw_score))    # Allow up to 105 with MSME bonus
-
-    verdict = _determine_verdict(score, gaps)
-    recommendations = _generate_recommendations(gaps, eligibility, company_data)
-
-    return {
-        "score":           round(score, 1),
-        "verdict":         verdict,
-        "gaps":            gaps,
-        "met_criteria":    met_criteria,
-        "recommendations": recommendations,
-        "breakdown":       breakdown,
-        "msme_bonus":      msme_bonus,
-    }
+        }]
+        return {"bonus": 5, "met": met}
+    return {"bonus": 0, "met": []}
+
+
+_RULE_FUNCTIONS = {
+    "turnover":       _turnover_rule,
+    "experience":     _experience_rule,
+    "certifications": _certifications_rule,
+    "past_project":   _past_project_rule,
+    "documents":      _documents_rule,
+    "msme":           _msme_rule,
+}
 
 
 def _determine_verdict(score: float, gaps: List[Dict]) -> str:
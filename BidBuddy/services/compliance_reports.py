@@ -0,0 +1,104 @@
+import hashlib
+import json
+from typing import Iterable, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+import models
+from services.compliance_batch import profile_data
+from services.compliance_engine import score_compliance
+from services.gemini_client import VERTEX_ERROR_PREFIX, analyze_compliance_gaps_async
+
+# Stored compliance reports, one per (tender, company).
+#
+# A report records the inputs it was computed from: the profile's
+# updated_at (profile_version) and a digest of the tender's extracted_data
+# (tender_version). Reading a report returns the stored row as long as
+# neither input changed; otherwise it is recomputed in place through
+# score_compliance. Edits call invalidate_reports() for the rows they
+# affect, which catches changes the version check can't see (two profile
+# edits within the same second share an updated_at).
+#
+# The AI narrative is the expensive part, so a recompute keeps it when the
+# gaps come out the same and only asks the LLM again when they changed.
+# get_report is called from async handlers: its queries and the commit run
+# in the threadpool, only the LLM call is awaited on the event loop.
+
+
+def tender_version(tender: models.Tender) -> str:
+    """Digest of the tender's extracted_data - changes whenever its content does."""
+    payload = json.dumps(tender.extracted_data or {}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def latest_report(db: Session, tender_id: int, company_id: int) -> Optional[models.ComplianceReport]:
+    return db.query(models.ComplianceReport).filter(
+        models.ComplianceReport.tender_id == tender_id,
+        models.ComplianceReport.company_id == company_id,
+    ).order_by(models.ComplianceReport.id.desc()).first()
+
+
+def is_current(report: models.ComplianceReport, tender: models.Tender,
+               company: models.CompanyProfile) -> bool:
+    return (not report.stale
+            and report.profile_version == company.updated_at
+            and report.tender_version == tender_version(tender)
+            and not (report.ai_analysis or "").startswith(VERTEX_ERROR_PREFIX))
+
+
+def invalidate_reports(db: Session, company_id: Optional[int] = None,
+                       tender_ids: Optional[Iterable[int]] = None) -> None:
+    """Mark the reports of a company, or of some tenders, stale. The caller commits."""
+    query = update(models.ComplianceReport)
+    if company_id is not None:
+        query = query.where(models.ComplianceReport.company_id == company_id)
+    elif tender_ids is not None:
+        query = query.where(models.ComplianceReport.tender_id.in_(list(tender_ids)))
+    else:
+        return
+    db.execute(query.values(stale=True))
+
+
+async def get_report(db: Session, tender: models.Tender, company: models.CompanyProfile,
+                     create: bool = True) -> Optional[models.ComplianceReport]:
+    """
+    The stored report for (tender, company), recomputed first if its
+    inputs changed. Computes and stores a new one when there is none and
+    `create` is set; returns None otherwise.
+    """
+    report = await run_in_threadpool(latest_report, db, tender.id, company.id)
+    if report is None and not create:
+        return None
+    if report is not None and is_current(report, tender, company):
+        return report
+
+    # Versions of the inputs as read now, before the LLM call yields
+    profile_version, content_version = company.updated_at, tender_version(tender)
+    tender_data = tender.extracted_data or {}
+    company_data = profile_data(company)
+    result = score_compliance(tender_data, company_data)
+
+    if report is None:
+        report = models.ComplianceReport(tender_id=tender.id, company_id=company.id)
+    if (report.ai_analysis is None or report.gaps != result["gaps"]
+            or report.ai_analysis.startswith(VERTEX_ERROR_PREFIX)):
+        report.ai_analysis = await analyze_compliance_gaps_async(
+            tender_data, {**company_data, "name": company.name}, result["gaps"])
+
+    report.score = result["score"]
+    report.verdict = result["verdict"]
+    report.gaps = result["gaps"]
+    report.recommendations = result["recommendations"]
+    report.profile_version = profile_version
+    report.tender_version = content_version
+    report.stale = False
+    return await run_in_threadpool(_save_report, db, report)
+
+
+def _save_report(db: Session, report: models.ComplianceReport) -> models.ComplianceReport:
+    db.add(report)
+    db.commit()
+    db.refresh(report)
+    return report
@@ -0,0 +1,175 @@
+import itertools
+from typing import Dict, List, Optional, Set, Tuple
+
+from services.compliance_engine import (
+    RULE_INPUTS, RULES, combine_rules, evaluate_rules, score_rules,
+)
+from services.vocabulary import vocab_ids
+
+# What-if simulation on top of score_compliance: "if I get ISO 27001 and
+# add a ₹200L project, do I qualify?"
+#
+# The engine scores each rule on its own (compliance_engine.evaluate_rules),
+# so a hypothetical change only re-evaluates the rules that read the fields
+# it touches (RULE_INPUTS); the rest reuse the current profile's results.
+#
+# find_plan() then searches for the fewest further changes that make the
+# profile ELIGIBLE. Every remaining gap yields actions for one rule (raise
+# turnover, add a missing certification, ...). A rule's result only depends
+# on how many of its actions are taken, so each rule is evaluated once per
+# count and the search combines those cached results - a few hundred sums
+# even with a dozen missing documents, instead of re-scoring the profile
+# for every combination.
+
+# Hypothetical changes: fields that replace a value, and lists that extend one
+SET_FIELDS = ("annual_turnover", "years_in_operation", "max_single_project_value", "msme_category")
+ADD_FIELDS = {
+    "add_certifications": "certifications",
+    "add_documents":      "available_documents",
+    "add_projects":       "past_projects",
+}
+
+TARGET_VERDICT = "ELIGIBLE"
+
+
+def apply_changes(company: Dict, changes: Dict) -> Tuple[Dict, Set[str]]:
+    """
+    A copy of `company` (a compliance_batch.profile_data dict) with
+    `changes` applied, and the company fields that changed.
+    """
+    updated = dict(company)
+    touched = set()
+    for field in SET_FIELDS:
+        if changes.get(field) is not None:
+            updated[field] = changes[field]
+            touched.add(field)
+    for change, field in ADD_FIELDS.items():
+        if changes.get(change):
+            updated[field] = list(updated.get(field) or []) + list(changes[change])
+            touched.add(field)
+
+    # A new project bigger than the recorded maximum is the new maximum
+    projects = changes.get("add_projects") or []
+    if projects and updated.get("max_single_project_value"):
+        largest = max(p.get("value", 0) for p in projects)
+        if largest > updated["max_single_project_value"]:
+            updated["max_single_project_value"] = largest
+            touched.add("max_single_project_value")
+
+    if touched & {"certifications", "available_documents"}:
+        updated["vocab_ids"] = vocab_ids(updated.get("certifications"), updated.get("available_documents"))
+        touched.add("vocab_ids")
+    return updated, touched
+
+
+def affected_rules(touched: Set[str]) -> List[str]:
+    return [rule for rule, fields in RULE_INPUTS.items() if touched.intersection(fields)]
+
+
+def _actions(tender_data: Dict, results: Dict[str, Dict]) -> Dict[str, List[Dict]]:
+    """rule -> changes that close its gap, in the order they should be taken."""
+    eligibility = tender_data.get("eligibility", {})
+    actions = {}
+    for rule in RULES:
+        gaps = results[rule]["gaps"]
+        if not gaps:
+            continue
+        gap = gaps[0]
+        if rule == "turnover":
+            value = eligibility["min_turnover"]
+            actions[rule] = [{"changes": {"annual_turnover": value},
+                              "label": f"Raise annual turnover to ₹{value}L (a consortium or JV can count)"}]
+        elif rule == "experience":
+            value = eligibility["years_experience"]
+            actions[rule] = [{"changes": {"years_in_operation": value},
+                              "label": f"Show {value} years of experience (e.g. through a JV partner)"}]
+        elif rule == "certifications":
+            actions[rule] = [{"changes": {"add_certifications": [cert]}, "label": f"Obtain {cert}"}
+                             for cert in gap["missing"]]
+        elif rule == "past_project":
+            value = eligibility["min_single_project_value"]
+            actions[rule] = [{"changes": {"add_projects": [{"name": "Qualifying project", "value": value}]},
+                              "label": f"Add a completed project worth at least ₹{value}L"}]
+        elif rule == "documents":
+            actions[rule] = [{"changes": {"add_documents": [doc]}, "label": f"Prepare {doc}"}
+                             for doc in gap["missing"]]
+    return actions
+
+
+def _merge(steps: List[Dict]) -> Dict:
+    merged: Dict = {}
+    for step in steps:
+        for field, value in step["changes"].items():
+            if field in ADD_FIELDS:
+                merged[field] = merged.get(field, []) + value
+            else:
+                merged[field] = value
+    return merged
+
+
+def find_plan(tender_data: Dict, company: Dict, results: Optional[Dict[str, Dict]] = None) -> Optional[Dict]:
+    """
+    The fewest changes that make `company` ELIGIBLE for the tender (ties
+    go to the higher score), as {"steps", "changes", "score", "verdict"};
+    None if even closing every gap isn't enough. `results` are the
+    company's per-rule results, when the caller already has them.
+    """
+    results = results or evaluate_rules(tender_data, company)
+    actions = _actions(tender_data, results)
+
+    # options[rule][k]: the rule's result after taking its first k actions
+    options = {}
+    for rule in RULES:
+        options[rule] = [results[rule]]
+        for k in range(1, len(actions.get(rule, [])) + 1):
+            changed, _ = apply_changes(company, _merge(actions[rule][:k]))
+            options[rule].append(evaluate_rules(tender_data, changed, [rule])[rule])
+
+    best = None
+    for counts in itertools.product(*(range(len(options[rule])) for rule in RULES)):
+        combined = {rule: options[rule][k] for rule, k in zip(RULES, counts)}
+        combined["msme"] = results["msme"]
+        score, verdict = score_rules(combined)
+        if verdict != TARGET_VERDICT:
+            continue
+        key = (sum(counts), -score)
+        if best is None or key < best[0]:
+            best = (key, counts, score, verdict)
+
+    if best is None:
+        return None
+    _, counts, score, verdict = best
+    steps = [step for rule, k in zip(RULES, counts) for step in actions.get(rule, [])[:k]]
+    return {
+        "steps":   [step["label"] for step in steps],
+        "changes": _merge(steps),
+        "score":   round(score, 1),
+        "verdict": verdict,
+    }
+
+
+def simulate(tender_data: Dict, company: Dict, changes: Dict, plan: bool = True) -> Dict:
+    """
+    Score `company` as it is and with `changes` applied, and (with `plan`)
+    the smallest set of further changes that reaches ELIGIBLE.
+    """
+    base_results = evaluate_rules(tender_data, company)
+    base_score, base_verdict = score_rules(base_results)
+
+    scenario_company, touched = apply_changes(company, changes)
+    rules = affected_rules(touched)
+    results = {**base_results, **evaluate_rules(tender_data, scenario_company, rules)}
+    scenario = combine_rules(tender_data, scenario_company, results)
+
+    return {
+        "base":           {"score": round(base_score, 1), "verdict": base_verdict},
+        "scenario":       {"score": scenario["score"], "verdict": scenario["verdict"]},
+        "score_delta":    round(scenario["score"] - round(base_score, 1), 1),
+        "verdict_changed": scenario["verdict"] != base_verdict,
+        "rules_changed":  [rule for rule in rules
+                           if results[rule].get("deduction") != base_results[rule].get("deduction")
+                           or results[rule].get("bonus") != base_results[rule].get("bonus")],
+        "gaps":           scenario["gaps"],
+        "recommendations": scenario["recommendations"],
+        "plan":           find_plan(tender_data, scenario_company, results) if plan else None,
+    }
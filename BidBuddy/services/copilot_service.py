@@ -0,0 +1,170 @@
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+import models
+from config import COPILOT_RECENT_MESSAGES, COPILOT_SUMMARY_EVERY_TURNS
+from database import SessionLocal
+from services.gemini_client import VERTEX_ERROR_PREFIX, summarize_conversation_async
+
+# Copilot history is append-only: each turn inserts its messages into
+# copilot_messages instead of rewriting the session's JSON list, so a turn
+# costs the same on message 500 as on message 2 and reads fetch only the
+# page they need.
+#
+# Older turns reach the prompt through a rolling summary: once
+# COPILOT_SUMMARY_EVERY_TURNS more turns have aged out of the last
+# COPILOT_RECENT_MESSAGES, a background call folds them into
+# session.summary and advances summary_upto_seq. The prompt carries the
+# summary plus the messages after it - at most
+# COPILOT_RECENT_MESSAGES + 2 * COPILOT_SUMMARY_EVERY_TURNS of them, however
+# long the session gets.
+
+# Messages after the summary that may go in the prompt (the window plus
+# turns waiting to be summarised)
+MAX_UNSUMMARISED = COPILOT_RECENT_MESSAGES + 2 * COPILOT_SUMMARY_EVERY_TURNS
+
+
+def latest_session(db: Session, tender_id: int) -> Optional[models.CopilotSession]:
+    return db.query(models.CopilotSession).filter(
+        models.CopilotSession.tender_id == tender_id).order_by(models.CopilotSession.id.desc()).first()
+
+
+def get_or_create_session(db: Session, tender_id: int) -> models.CopilotSession:
+    """
+    The tender's latest session. A new one is committed straight away: a
+    flushed INSERT would hold SQLite's write lock until the turn commits,
+    i.e. through the whole LLM call. The commit expires the caller's
+    other loaded objects.
+    """
+    session = latest_session(db, tender_id)
+    if not session:
+        session = models.CopilotSession(tender_id=tender_id, messages=[], message_count=0)
+        db.add(session)
+        db.commit()
+    return session
+
+
+def append_messages(db: Session, session: models.CopilotSession, messages: List[Dict]) -> List[models.CopilotMessage]:
+    """
+    Insert `messages` ({role, content}) after the session's last message.
+    seq numbers are reserved with a single UPDATE ... SET message_count =
+    message_count + n, which holds SQLite's write lock until commit, so two
+    concurrent turns on one session can't take the same seq. Caller commits.
+    """
+    db.execute(
+        update(models.CopilotSession)
+        .where(models.CopilotSession.id == session.id)
+        .values(message_count=func.coalesce(models.CopilotSession.message_count, 0) + len(messages),
+                updated_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    db.refresh(session, ["message_count"])
+    first = session.message_count - len(messages) + 1
+    rows = [models.CopilotMessage(session_id=session.id, seq=first + i, role=msg["role"], content=msg["content"])
+            for i, msg in enumerate(messages)]
+    db.add_all(rows)
+    return rows
+
+
+def message_page(db: Session, session_id: int, limit: int,
+                 before_seq: Optional[int] = None) -> Tuple[List[models.CopilotMessage], bool]:
+    """
+    Up to `limit` messages before `before_seq` (default: the newest), oldest
+    first, and whether older messages remain. Served by the (session_id,
+    seq) index.
+    """
+    query = db.query(models.CopilotMessage).filter(models.CopilotMessage.session_id == session_id)
+    if before_seq is not None:
+        query = query.filter(models.CopilotMessage.seq < before_seq)
+    rows = query.order_by(models.CopilotMessage.seq.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    return list(reversed(rows[:limit])), has_more
+
+
+def prompt_history(db: Session, session: models.CopilotSession) -> Tuple[Optional[str], List[Dict]]:
+    """(summary, messages after it) for the next prompt."""
+    upto = session.summary_upto_seq or 0
+    rows = db.query(models.CopilotMessage).filter(
+        models.CopilotMessage.session_id == session.id, models.CopilotMessage.seq > upto,
+    ).order_by(models.CopilotMessage.seq.desc()).limit(MAX_UNSUMMARISED).all()
+    return session.summary, [{"role": row.role, "content": row.content} for row in reversed(rows)]
+
+
+def summary_due(session: models.CopilotSession) -> bool:
+    """True once enough turns have left the verbatim window since the last summary."""
+    aged_out = (session.message_count or 0) - COPILOT_RECENT_MESSAGES - (session.summary_upto_seq or 0)
+    return aged_out >= 2 * COPILOT_SUMMARY_EVERY_TURNS
+
+
+async def refresh_summary(session_id: int) -> None:
+    """
+    Background step after a copilot turn: fold the messages that have left
+    the verbatim window into the session summary. The update only lands if
+    no other refresh moved summary_upto_seq meanwhile.
+    """
+    db = SessionLocal()
+    try:
+        session = db.query(models.CopilotSession).filter(models.CopilotSession.id == session_id).first()
+        if not session or not summary_due(session):
+            return
+        upto = session.summary_upto_seq or 0
+        # A lagging summary catches up in steps, keeping each call small
+        new_upto = min(session.message_count - COPILOT_RECENT_MESSAGES, upto + MAX_UNSUMMARISED)
+        rows = db.query(models.CopilotMessage).filter(
+            models.CopilotMessage.session_id == session_id,
+            models.CopilotMessage.seq > upto, models.CopilotMessage.seq <= new_upto,
+        ).order_by(models.CopilotMessage.seq).all()
+        messages = [{"role": row.role, "content": row.content} for row in rows]
+        previous = session.summary
+        db.rollback()  # don't hold a read transaction across the LLM call
+
+        try:
+            summary = await summarize_conversation_async(previous, messages)
+        except Exception as e:
+            print(f"WARNING: copilot summary refresh failed for session {session_id}: {e}")
+            return
+        if not summary.strip() or summary.startswith(VERTEX_ERROR_PREFIX):
+            return
+
+        db.execute(
+            update(models.CopilotSession)
+            .where(models.CopilotSession.id == session_id,
+                   func.coalesce(models.CopilotSession.summary_upto_seq, 0) == upto)
+            .values(summary=summary.strip(), summary_upto_seq=new_upto)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def migrate_json_histories() -> int:
+    """
+    Move histories still held in copilot_sessions.messages into
+    copilot_messages and clear the JSON. Sessions that already have rows
+    are left alone, so this is safe to run on every startup. Returns the
+    number of sessions migrated.
+    """
+    db = SessionLocal()
+    try:
+        migrated = 0
+        sessions = db.query(models.CopilotSession).filter(
+            models.CopilotSession.messages.isnot(None),
+            func.coalesce(models.CopilotSession.message_count, 0) == 0,
+        ).all()
+        for session in sessions:
+            messages = [msg for msg in (session.messages or []) if isinstance(msg, dict) and msg.get("content")]
+            if not messages:
+                continue
+            db.add_all(models.CopilotMessage(session_id=session.id, seq=seq, role=msg.get("role", "user"),
+                                             content=msg["content"])
+                       for seq, msg in enumerate(messages, start=1))
+            session.message_count = len(messages)
+            session.messages = []
+            migrated += 1
+        db.commit()
+        return migrated
+    finally:
+        db.close()
@@ -1,9 +1,21 @@
 # ai_copilot.py
 from dotenv import load_dotenv
 import os
+import asyncio
 import json
 import re
-from typing import Dict, List, Optional
+import threading
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from config import EXTRACT_CHUNK_TOKENS, EXTRACT_MAX_CHUNKS
+from services import llm_cache
+from services.llm_limiter import LLM_MAX_CONCURRENCY, llm_slot
+from services.llm_json import coerce_to_schema, parse_llm_json
+from services.pdf_extractor import plan_extraction_chunks
+from services.rule_extractor import parse_amount_lakhs
 
 # Load environment variables from .env
 load_dotenv()
@@ -12,69 +24,490 @@ PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT")
 REGION = os.getenv("REGION", "us-central1")
 CREDENTIALS = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
 
-from google.cloud import aiplatform
+# Model + backend selection. LLM_BACKEND=fake swaps Vertex for a local,
+# deterministic stand-in so the whole pipeline can be benchmarked offline.
+VERTEX_MODEL = os.getenv("VERTEX_MODEL", "text-bison@001")  # Replace with Gemini model if available
+LLM_BACKEND = os.getenv("LLM_BACKEND", "vertex")
+VERTEX_WARMUP = os.getenv("VERTEX_WARMUP", "0") == "1"
 
-# Initialize Vertex AI
-aiplatform.init(project=PROJECT_ID, location=REGION)
+# Prefix of the text _call_vertex returns when the call fails (never cached)
+VERTEX_ERROR_PREFIX = "Vertex AI call failed:"
 
-def _call_vertex(prompt: str, temperature: float = 0.3, max_output_tokens: int = 2048) -> str:
+if LLM_BACKEND == "vertex":
+    from google.cloud import aiplatform
+
+    # Initialize Vertex AI
+    aiplatform.init(project=PROJECT_ID, location=REGION)
+
+
+# Process-wide model handles, one per (backend, model). Building a handle
+# sets up auth and the prediction transport, so it's done once and the
+# same handle (and its pooled connection) is shared by every request thread.
+_models: Dict[Tuple[str, str], object] = {}
+
+_models_lock = threading.Lock()
+
+# Blocking SDK calls run here rather than in the loop's default executor,
+# which is sized for CPU work (cpu_count + 4) and would cap concurrent
+# LLM calls below what llm_slot admits.
+_llm_executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="llm")
+
+
+def get_model(model_name: str = VERTEX_MODEL):
+    """Return the shared model handle for `model_name`, building it on first use."""
+    key = (LLM_BACKEND, model_name)
+    model = _models.get(key)
+    if model is None:
+        with _models_lock:
+            model = _models.get(key)
+            if model is None:
+                if LLM_BACKEND == "fake":
+                    model = FakeTextModel(model_name)
+                else:
+                    model = aiplatform.TextGenerationModel.from_prebuilt(model_name)
+                _models[key] = model
+    return model
+
+
+def warm_up(model_name: str = VERTEX_MODEL) -> float:
+    """
+    Build the model handle and send a tiny request so the first real call
+    doesn't pay for auth/connection setup. Returns the seconds taken.
+    """
+    start = time.perf_counter()
+    try:
+        get_model(model_name).predict("ping", temperature=0.0, max_output_tokens=1)
+    except Exception as e:
+        print(f"WARNING: Vertex warm-up failed: {e}")
+    return time.perf_counter() - start
+
+
+class FakeTextModel:
+    """
+    Offline stand-in for TextGenerationModel (LLM_BACKEND=fake).
+
+    Construction and each predict() sleep for FAKE_LLM_INIT_MS /
+    FAKE_LLM_LATENCY_MS to mimic Vertex. JSON prompts get the empty tender
+    schema back; anything else gets deterministic filler text.
+    """
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        time.sleep(int(os.getenv("FAKE_LLM_INIT_MS", "300")) / 1000)
+
+    def predict(self, prompt: str, temperature: float = 0.0, max_output_tokens: int = 1024):
+        time.sleep(int(os.getenv("FAKE_LLM_LATENCY_MS", "50")) / 1000)
+        return _FakeResponse(self._text(prompt))
+
+    def predict_streaming(self, prompt: str, temperature: float = 0.0, max_output_tokens: int = 1024):
+        # Same text as predict(), released a few words at a time over the same latency
+        words = self._text(prompt).split(" ")
+        chunks = [" ".join(words[i:i + 4]) + " " for i in range(0, len(words), 4)]
+        delay = int(os.getenv("FAKE_LLM_LATENCY_MS", "50")) / 1000 / len(chunks)
+        for chunk in chunks:
+            time.sleep(delay)
+            yield _FakeResponse(chunk)
+
+    def _text(self, prompt: str) -> str:
+        if "Return ONLY JSON" in prompt:
+            return json.dumps(_EMPTY_TENDER)
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        return f"[fake {self.model_name} response {digest}] " + "Lorem ipsum dolor sit amet. " * 8
+
+
+class _FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+_EMPTY_TENDER = {
+    "tender_id": None,
+    "title": "Fake Tender",
+    "issuing_authority": "Fake Authority",
+    "deadline": None,
+    "estimated_value": None,
+    "eligibility": {
+        "min_turnover": None,
+        "years_experience": None,
+        "required_certifications": [],
+        "msme_preference": False,
+        "past_project_requirement": None,
+        "min_single_project_value": None,
+        "other_requirements": []
+    },
+    "documents_required": [],
+    "key_clauses": [],
+    "sector": "Unknown",
+    "bid_security": None,
+    "contract_duration": None
+}
+
+
+def _call_vertex(prompt: str, temperature: float = 0.3, max_output_tokens: int = 2048, use_cache: bool = True) -> str:
     """
     Call Vertex AI Text Generation (Gemini) model.
+    Responses are served from / stored in the persistent LLM cache unless
+    `use_cache` is False (or LLM_CACHE_ENABLED=0).
+    """
+    key = _cache_key(prompt, temperature, max_output_tokens) if use_cache else None
+    if key:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            return cached
+
+    text = _predict(prompt, temperature, max_output_tokens)
+    if key and not text.startswith(VERTEX_ERROR_PREFIX):
+        llm_cache.put(key, _model_id(), text)
+    return text
+
+
+async def _call_vertex_async(prompt: str, temperature: float = 0.3, max_output_tokens: int = 2048, use_cache: bool = True) -> str:
+    """
+    Async _call_vertex: cache hits return without an LLM slot; misses wait
+    for one (global + per-model cap, raises LLMOverloaded when the queue
+    is full), then run the blocking SDK call off the event loop. The
+    SQLite cache is read and written in a worker thread too.
+    """
+    key = _cache_key(prompt, temperature, max_output_tokens) if use_cache else None
+    if key:
+        cached = await asyncio.to_thread(llm_cache.get, key)
+        if cached is not None:
+            return cached
+
+    async with llm_slot(VERTEX_MODEL):
+        text = await asyncio.get_running_loop().run_in_executor(
+            _llm_executor, _predict, prompt, temperature, max_output_tokens)
+    if key and not text.startswith(VERTEX_ERROR_PREFIX):
+        await asyncio.to_thread(llm_cache.put, key, _model_id(), text)
+    return text
+
+
+async def _stream_vertex_async(prompt: str, temperature: float = 0.3, max_output_tokens: int = 2048,
+                              use_cache: bool = True) -> AsyncIterator[str]:
     """
+    Stream a completion chunk by chunk as the model produces it.
+
+    The blocking SDK stream runs in a worker thread and hands chunks to the
+    event loop through a queue. Closing or cancelling this generator (e.g.
+    the client went away) tells the worker to stop and releases the LLM
+    slot. Only a stream that ran to completion is written to the cache;
+    SDK errors are raised to the caller.
+    """
+    key = _cache_key(prompt, temperature, max_output_tokens) if use_cache else None
+    if key:
+        cached = await asyncio.to_thread(llm_cache.get, key)
+        if cached is not None:
+            yield cached
+            return
+
+    parts: List[str] = []
+    async with llm_slot(VERTEX_MODEL):
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def _emit(item) -> None:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:  # loop already closed
+                pass
+
+        def _produce() -> None:
+            try:
+                stream = get_model().predict_streaming(
+                    prompt,
+                    temperature=temperature,
+                    max_output_tokens=max_output_tokens,
+                )
+                try:
+                    for chunk in stream:
+                        if stop.is_set():
+                            break
+                        if chunk.text:
+                            _emit(chunk.text)
+                finally:
+                    close = getattr(stream, "close", None)
+                    if close:
+                        close()
+            except Exception as e:
+                _emit(e)
+            finally:
+                _emit(_STREAM_END)
+
+        loop.run_in_executor(_llm_executor, _produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is _STREAM_END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                parts.append(item)
+                yield item
+        finally:
+            stop.set()
+
+    if key:
+        await asyncio.to_thread(llm_cache.put, key, _model_id(), "".join(parts))
+
+
+_STREAM_END = object()
+
+
+def _predict(prompt: str, temperature: float, max_output_tokens: int) -> str:
     try:
-        model = aiplatform.TextGenerationModel.from_prebuilt("text-bison@001")  # Replace with Gemini model if available
-        response = model.predict(
+        response = get_model().predict(
             prompt,
             temperature=temperature,
             max_output_tokens=max_output_tokens,
         )
         return response.text
     except Exception as e:
-        return f"Vertex AI call failed: {str(e)}"
+        return f"{VERTEX_ERROR_PREFIX} {str(e)}"
 
 
-def _parse_json(raw: str) -> Optional[Dict]:
-    text = raw.strip()
-    text = re.sub(r'^```(?:json)?\s*', '', text, flags=re.MULTILINE)
-    text = re.sub(r'```\s*$', '', text, flags=re.MULTILINE)
-    text = text.strip()
+def _model_id() -> str:
+    return f"{LLM_BACKEND}:{VERTEX_MODEL}"
 
-    # Try parsing directly
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        pass
-
-    # Extract first { … } block
-    start = text.find('{')
-    end = text.rfind('}')
-    if start != -1 and end != -1 and end > start:
-        candidate = text[start:end+1]
-        try:
-            return json.loads(candidate)
-        except json.JSONDecodeError:
-            pass
 
-    # Fix common trailing comma issues
-    try:
-        fixed = re.sub(r',\s*([}\]])', r'\1', text[start:end+1] if start != -1 else text)
-        return json.loads(fixed)
-    except Exception:
-        pass
+def _cache_key(prompt: str, temperature: float, max_output_tokens: int) -> Optional[str]:
+    if not llm_cache.LLM_CACHE_ENABLED:
+        return None
+    return llm_cache.cache_key(prompt, _model_id(), temperature, max_output_tokens)
 
-    return None
+
+def _parse_tender(raw: str) -> Optional[Dict]:
+    """
+    Tolerant parse of a tender extraction response, validated and coerced
+    against the schema. A response cut off at max_output_tokens still
+    yields whatever fields it got through (flagged with _note).
+    """
+    parsed, complete = parse_llm_json(raw)
+    if not isinstance(parsed, dict) or not parsed:
+        return None
+    tender, invalid = coerce_to_schema(parsed, _TENDER_TYPES)
+    if invalid:
+        tender["_invalid_fields"] = invalid
+    if not complete:
+        tender["_note"] = "AI response was cut off — partial extraction, check raw_text"
+    return tender
 
 
 def extract_tender_structure(raw_text: str, sections: Optional[Dict] = None) -> Dict:
+    raw_response = _call_vertex(_tender_structure_prompt(raw_text, sections), temperature=0.0, max_output_tokens=2048)
+    return _tender_structure_result(raw_response)
+
+
+async def extract_tender_structure_async(raw_text: str, sections: Optional[Dict] = None,
+                                        fields: Optional[List[str]] = None) -> Dict:
+    """
+    Short tenders go out as one call. Longer ones are map-reduced: the text
+    is split into EXTRACT_CHUNK_TOKENS-sized chunks (at most
+    EXTRACT_MAX_CHUNKS, see plan_extraction_chunks), each chunk gets its
+    own partial schema extraction concurrently, and the partial JSONs are
+    merged with merge_tender_extractions - so clauses past the first 6000
+    characters are no longer dropped. Chunks whose call fails are left out
+    (the result is flagged with _note); only if every call fails does the
+    error propagate.
+
+    `fields` (dotted schema paths) narrows the prompt to just those fields,
+    e.g. the ones the rule extractor couldn't fill confidently.
+    """
+    max_tokens = 1024 if fields else 2048
+    chunks = plan_extraction_chunks(raw_text, sections, EXTRACT_CHUNK_TOKENS, EXTRACT_MAX_CHUNKS)
+    if len(chunks) <= 1:
+        raw_response = await _call_vertex_async(_tender_structure_prompt(raw_text, sections, fields), temperature=0.0, max_output_tokens=max_tokens)
+        return _tender_structure_result(raw_response)
+
+    # One failed chunk (e.g. LLMOverloaded) shouldn't sink the others
+    results = await asyncio.gather(*[
+        _call_vertex_async(_tender_schema_prompt(chunk, part=(i + 1, len(chunks)), fields=fields), temperature=0.0, max_output_tokens=max_tokens)
+        for i, chunk in enumerate(chunks)
+    ], return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException) and not isinstance(result, Exception):
+            raise result  # cancellation
+    responses = [result for result in results if not isinstance(result, Exception)]
+    if not responses:
+        raise results[0]
+    partials = [parsed for parsed in map(_parse_tender, responses) if parsed is not None]
+    if not partials:
+        return _tender_structure_result(responses[0])
+    merged = merge_tender_extractions(partials)
+    failed = len(results) - len(responses)
+    if failed:
+        errors = [repr(result) for result in results if isinstance(result, Exception)]
+        print(f"WARNING: {failed} of {len(results)} extraction chunks failed: {'; '.join(errors)}")
+        merged["_note"] = f"AI extraction incomplete — {failed} of {len(results)} parts failed, check raw_text"
+    return merged
+
+
+# Values the model echoes from the schema template instead of real data
+PLACEHOLDER_STRINGS = {"", "string", "unknown", "n/a", "na", "null", "none", "not specified"}
+
+
+def merge_tender_extractions(partials: List[Dict]) -> Dict:
+    """
+    Deterministically merge partial extractions (in chunk order):
+    numbers take the max, booleans are OR-ed, lists are unioned in first-seen
+    order, nested dicts merge field by field, and strings take the first
+    non-placeholder value. Numbers beat strings for the same field.
+    """
+    merged = _merge_values([p for p in partials if isinstance(p, dict)]) or {}
+    return _with_schema_defaults(merged, _EMPTY_TENDER)
+
+
+def _with_schema_defaults(value, template):
+    """Lay `value` out in schema order, filling absent lists/flags with []/False."""
+    if isinstance(template, dict):
+        value = value if isinstance(value, dict) else {}
+        out = {k: _with_schema_defaults(value.get(k), t) for k, t in template.items()}
+        out.update({k: v for k, v in value.items() if k not in template})
+        return out
+    if value is None and isinstance(template, (list, bool)):
+        return type(template)()
+    return value
+
+
+def _merge_values(values: List):
+    values = [v for v in values if v is not None]
+    dicts = [v for v in values if isinstance(v, dict)]
+    if dicts:
+        keys: Dict = {}
+        for d in dicts:
+            keys.update(dict.fromkeys(d))
+        return {k: _merge_values([d.get(k) for d in dicts]) for k in keys}
+    lists = [v for v in values if isinstance(v, list)]
+    if lists:
+        seen, union = set(), []
+        for item in (item for lst in lists for item in lst):
+            marker = json.dumps(item, sort_keys=True, default=str).casefold() if not isinstance(item, str) else item.strip().casefold()
+            if marker and marker not in seen and marker not in PLACEHOLDER_STRINGS:
+                seen.add(marker)
+                union.append(item)
+        return union
+    bools = [v for v in values if isinstance(v, bool)]
+    numbers = [v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool)]
+    if numbers:
+        return max(numbers)
+    if bools:
+        return any(bools)
+    for v in values:
+        if isinstance(v, str) and v.strip().lower() not in PLACEHOLDER_STRINGS:
+            return v
+    return None
+
+
+# Extraction schema sent to the model (dotted paths select a subset, see _schema_for)
+_TENDER_SCHEMA = {
+    "tender_id": None,
+    "title": "string",
+    "issuing_authority": "string",
+    "deadline": "DD-MM-YYYY or null",
+    "estimated_value": None,
+    "eligibility": {
+        "min_turnover": None,
+        "years_experience": None,
+        "required_certifications": [],
+        "msme_preference": False,
+        "past_project_requirement": None,
+        "min_single_project_value": None,
+        "other_requirements": []
+    },
+    "documents_required": [],
+    "key_clauses": [],
+    "sector": "string",
+    "bid_security": None,
+    "contract_duration": None
+}
+
+
+def _amount(value) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return parse_amount_lakhs(str(value))
+
+
+def _amount_or_text(value):
+    """Bid security is usually an amount, but can be a clause ("Exempted for MSEs")."""
+    amount = _amount(value)
+    if amount is not None:
+        return amount
+    if isinstance(value, str) and value.strip():
+        return value.strip()
+    return None
+
+
+def _whole_number(value) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.search(r"\d+", str(value))
+    return int(match.group()) if match else None
+
+
+# Type of each schema field for validating / coercing model output
+# ("list" / "bool" / "str", a coercion callable, or None for any JSON value)
+_TENDER_TYPES = {
+    "tender_id": "str",
+    "title": "str",
+    "issuing_authority": "str",
+    "deadline": "str",
+    "estimated_value": _amount,
+    "eligibility": {
+        "min_turnover": _amount,
+        "years_experience": _whole_number,
+        "required_certifications": "list",
+        "msme_preference": "bool",
+        "past_project_requirement": None,
+        "min_single_project_value": _amount,
+        "other_requirements": "list",
+    },
+    "documents_required": "list",
+    "key_clauses": "list",
+    "sector": "str",
+    "bid_security": _amount_or_text,
+    "contract_duration": "str",
+}
+
+
+def _schema_for(fields: Optional[List[str]] = None) -> Dict:
+    """The full schema, or only the given dotted paths ("eligibility.min_turnover")."""
+    if not fields:
+        return _TENDER_SCHEMA
+    subset: Dict = {}
+    for path in fields:
+        *parents, leaf = path.split(".")
+        source, target = _TENDER_SCHEMA, subset
+        for part in parents:
+            source, target = source[part], target.setdefault(part, {})
+        target[leaf] = source[leaf]
+    return subset
+
+
+def _tender_structure_prompt(raw_text: str, sections: Optional[Dict] = None,
+                             fields: Optional[List[str]] = None) -> str:
     if sections:
         relevant = ""
         for key in ["eligibility criteria", "eligibility requirement", "pre-qualification",
-                    "financial requirement", "documents required", "scope of work"]:
+                    "financial requirement", "eligibility tables", "documents required", "scope of work"]:
             if key in sections:
                 relevant += f"\n\n=== {key.upper()} ===\n{sections[key]}"
         text_to_send = relevant[:6000] if len(relevant) > 500 else raw_text[:6000]
     else:
         text_to_send = raw_text[:6000]
+    return _tender_schema_prompt(text_to_send, fields=fields)
+
+
+def _tender_schema_prompt(text_to_send: str, part: Optional[Tuple[int, int]] = None,
+                          fields: Optional[List[str]] = None) -> str:
+    part_note = ""
+    if part:
+        part_note = (f"- This is part {part[0]} of {part[1]} of the tender. Fill only what this part supports;\n"
+                     f"  use null / [] / false for everything else\n")
 
     prompt = f"""You are a government tender analyst. Extract structured data from the tender text below.
 
@@ -82,35 +515,17 @@ CRITICAL INSTRUCTIONS:
 - Return ONLY JSON
 - Start with {{ and end with }}
 - Do NOT include text or markdown fences
-
+{part_note}
 Use this schema:
-{{
-  "tender_id": null,
-  "title": "string",
-  "issuing_authority": "string",
-  "deadline": "DD-MM-YYYY or null",
-  "estimated_value": null,
-  "eligibility": {{
-    "min_turnover": null,
-    "years_experience": null,
-    "required_certifications": [],
-    "msme_preference": false,
-    "past_project_requirement": null,
-    "min_single_project_value": null,
-    "other_requirements": []
-  }},
-  "documents_required": [],
-  "key_clauses": [],
-  "sector": "string",
-  "bid_security": null,
-  "contract_duration": null
-}}
+{json.dumps(_schema_for(fields), indent=2)}
 
 TENDER TEXT:
 {text_to_send}"""
+    return prompt
+
 
-    raw_response = _call_vertex(prompt, temperature=0.0, max_output_tokens=2048)
-    parsed = _parse_json(raw_response)
+def _tender_structure_result(raw_response: str) -> Dict:
+    parsed = _parse_tender(raw_response)
     if parsed is None:
         print(f"WARNING: Could not parse JSON. Preview: {raw_response[:200]}")
         return {
@@ -138,7 +553,25 @@ TENDER TEXT:
     return parsed
 
 
-def generate_bid_draft(tender_data: Dict, company_data: Dict, additional_context: Optional[str] = None) -> str:
+def generate_bid_draft(tender_data: Dict, company_data: Dict, additional_context: Optional[str] = None,
+                       use_cache: bool = True) -> str:
+    return _call_vertex(_bid_draft_prompt(tender_data, company_data, additional_context), temperature=0.4, max_output_tokens=4096,
+                        use_cache=use_cache)
+
+
+async def generate_bid_draft_async(tender_data: Dict, company_data: Dict, additional_context: Optional[str] = None,
+                                   use_cache: bool = True) -> str:
+    return await _call_vertex_async(_bid_draft_prompt(tender_data, company_data, additional_context), temperature=0.4, max_output_tokens=4096,
+                                    use_cache=use_cache)
+
+
+def stream_bid_draft(tender_data: Dict, company_data: Dict, additional_context: Optional[str] = None,
+                     use_cache: bool = True) -> AsyncIterator[str]:
+    return _stream_vertex_async(_bid_draft_prompt(tender_data, company_data, additional_context), temperature=0.4, max_output_tokens=4096,
+                                use_cache=use_cache)
+
+
+def _bid_draft_prompt(tender_data: Dict, company_data: Dict, additional_context: Optional[str] = None) -> str:
     projects = company_data.get("past_projects", [])
     projects_text = "\n".join([
         f"  - {p.get('name')}: Rs.{p.get('value')}L, Client: {p.get('client')}, Year: {p.get('year')}"
@@ -179,32 +612,202 @@ Write a complete bid proposal in Markdown with these sections:
 
 Use formal language and reference actual values from above.
 """
+    return prompt
+
+
+# --- Section-parallel bid drafts ---
+# Each section of the proposal is its own small LLM call that only sees the
+# tender/company fields it needs; the calls run concurrently and the results
+# are stitched back into the same Markdown layout as _bid_draft_prompt asks for.
+# (title, tender fields, company fields, what the section should cover)
+BID_SECTIONS: List[Tuple[str, List[str], List[str], str]] = [
+    ("Cover Letter",
+     ["tender_id", "title", "issuing_authority", "deadline"],
+     ["name", "msme_category"],
+     "a formal cover letter addressed to the issuing authority submitting the bid"),
+    ("Company Overview",
+     ["title", "sector"],
+     ["name", "msme_category", "annual_turnover", "years_in_operation", "certifications", "sectors"],
+     "the company's background, scale, registrations and core capabilities"),
+    ("Technical Compliance Statement",
+     ["title", "eligibility"],
+     ["annual_turnover", "net_worth", "years_in_operation", "certifications", "msme_category"],
+     "a point-by-point statement of how the company meets each eligibility requirement"),
+    ("Scope Understanding & Approach",
+     ["title", "sector", "estimated_value", "key_clauses", "contract_duration"],
+     ["name", "sectors"],
+     "the bidder's understanding of the scope of work and the proposed execution approach"),
+    ("Relevant Past Experience",
+     ["title", "sector", "eligibility"],
+     ["past_projects", "years_in_operation"],
+     "past projects that demonstrate relevant experience, with values, clients and years"),
+    ("Team & Resource Plan",
+     ["title", "sector", "contract_duration"],
+     ["name", "years_in_operation", "sectors"],
+     "the proposed team structure, key roles and resource deployment plan"),
+    ("Quality Assurance",
+     ["title", "sector", "key_clauses"],
+     ["certifications"],
+     "quality assurance processes, standards followed and reporting"),
+    ("Compliance Declarations",
+     ["title", "issuing_authority", "eligibility", "bid_security"],
+     ["name", "msme_category", "registration_number", "gst_number", "pan_number"],
+     "the standard declarations (no blacklisting, acceptance of terms, MSME status, bid security)"),
+    ("Document Index",
+     ["documents_required"],
+     ["certifications"],
+     "an index table of the documents enclosed with the bid, in the order the tender asks for them"),
+]
+
+BID_SECTION_TITLES = [title for title, _, _, _ in BID_SECTIONS]
+
+
+async def generate_bid_sections_async(tender_data: Dict, company_data: Dict, additional_context: Optional[str] = None,
+                                      use_cache: bool = True) -> Dict[str, str]:
+    """
+    Generate every bid section concurrently; returns {section title: Markdown
+    body} in BID_SECTIONS order. Wall-clock is roughly the slowest section.
+    """
+    bodies = await asyncio.gather(*[
+        _call_vertex_async(_bid_section_prompt(index, tender_data, company_data, additional_context),
+                           temperature=0.4, max_output_tokens=1024, use_cache=use_cache)
+        for index in range(len(BID_SECTIONS))
+    ])
+    return {title: body.strip() for title, body in zip(BID_SECTION_TITLES, bodies)}
+
+
+async def regenerate_bid_section_async(section_title: str, tender_data: Dict, company_data: Dict,
+                                       additional_context: Optional[str] = None) -> str:
+    """Re-run one section (bypassing the cache so the text actually changes)."""
+    index = BID_SECTION_TITLES.index(section_title)
+    body = await _call_vertex_async(_bid_section_prompt(index, tender_data, company_data, additional_context),
+                                    temperature=0.4, max_output_tokens=1024, use_cache=False)
+    return body.strip()
+
+
+def stitch_bid_sections(sections: Dict[str, str]) -> str:
+    """Join section bodies into the numbered Markdown layout of a full draft."""
+    parts = []
+    for number, title in enumerate(BID_SECTION_TITLES, start=1):
+        if title in sections:
+            parts.append(f"## {number}. {title}\n\n{sections[title]}")
+    return "\n\n".join(parts) + "\n"
+
 
-    return _call_vertex(prompt, temperature=0.4, max_output_tokens=4096)
+def _bid_section_prompt(index: int, tender_data: Dict, company_data: Dict, additional_context: Optional[str] = None) -> str:
+    title, tender_fields, company_fields, covers = BID_SECTIONS[index]
+    tender_ctx = {k: tender_data.get(k) for k in tender_fields if tender_data.get(k) not in (None, "", [], {})}
+    company_ctx = {k: company_data.get(k) for k in company_fields if company_data.get(k) not in (None, "", [], {})}
 
+    prompt = f"""You are a senior procurement consultant in India writing one section of a bid proposal.
 
-def copilot_answer(tender_data: Dict, question: str, conversation_history: List[Dict]) -> str:
+SECTION: {index + 1}. {title}
+This section should contain {covers}.
+
+TENDER:
+{json.dumps(tender_ctx, indent=2, default=str)}
+
+COMPANY:
+{json.dumps(company_ctx, indent=2, default=str)}
+
+{f'Additional Instructions: {additional_context}' if additional_context else ''}
+
+Write ONLY the body of this section in Markdown (no section heading, no other sections).
+Use formal language and reference actual values from above; amounts are in Rs. Lakhs.
+"""
+    return prompt
+
+
+def copilot_answer(tender_data: Dict, question: str, conversation_history: List[Dict],
+                   excerpts: Optional[List[str]] = None, context_json: Optional[str] = None,
+                   summary: Optional[str] = None, history_limit: Optional[int] = 6) -> str:
+    return _call_vertex(_copilot_prompt(tender_data, question, conversation_history, excerpts, context_json,
+                                        summary, history_limit),
+                        temperature=0.3, max_output_tokens=1024)
+
+
+async def copilot_answer_async(tender_data: Dict, question: str, conversation_history: List[Dict],
+                               excerpts: Optional[List[str]] = None, context_json: Optional[str] = None,
+                               summary: Optional[str] = None, history_limit: Optional[int] = 6) -> str:
+    return await _call_vertex_async(_copilot_prompt(tender_data, question, conversation_history, excerpts, context_json,
+                                                    summary, history_limit),
+                                    temperature=0.3, max_output_tokens=1024)
+
+
+def _copilot_prompt(tender_data: Dict, question: str, conversation_history: List[Dict],
+                    excerpts: Optional[List[str]] = None, context_json: Optional[str] = None,
+                    summary: Optional[str] = None, history_limit: Optional[int] = 6) -> str:
+    """
+    `context_json` (compact extracted_data, see retrieval.TenderContext)
+    replaces the indented dump of tender_data; `excerpts` are the raw_text
+    chunks retrieved for this question. `summary` stands in for the turns
+    before `conversation_history`; of that history the last `history_limit`
+    messages are sent (all of them with None - the caller has bounded it).
+    """
+    history = conversation_history[-history_limit:] if history_limit else conversation_history
     history_text = ""
-    for msg in conversation_history[-6:]:
+    for msg in history:
         role = "User" if msg["role"] == "user" else "Assistant"
         history_text += f"{role}: {msg['content']}\n"
 
+    context = context_json if context_json is not None else json.dumps(tender_data, indent=2)
+    excerpt_text = ""
+    if excerpts:
+        excerpt_text = "\n\nRELEVANT TENDER TEXT:\n" + "\n---\n".join(excerpts)
+    conversation_text = ""
+    if summary:
+        conversation_text += f"SUMMARY OF EARLIER CONVERSATION:\n{summary}\n\n"
+    if history_text:
+        conversation_text += f"PREVIOUS CONVERSATION:\n{history_text}"
+
     prompt = f"""You are an Indian government procurement consultant helping an MSME understand a tender.
 
 TENDER CONTEXT:
-{json.dumps(tender_data, indent=2)}
+{context}{excerpt_text}
 
-{f'PREVIOUS CONVERSATION:\n{history_text}' if history_text else ''}
+{conversation_text}
 
 USER QUESTION: {question}
 
 Answer clearly and specifically based on the tender context.
 Reference data directly. Be concise and actionable.
 """
-    return _call_vertex(prompt, temperature=0.3, max_output_tokens=1024)
+    return prompt
+
+
+async def summarize_conversation_async(previous_summary: Optional[str], messages: List[Dict]) -> str:
+    """
+    Fold `messages` into `previous_summary`. Kept cheap: short output, low
+    temperature, and the input is only the old summary plus the new turns.
+    """
+    return await _call_vertex_async(_conversation_summary_prompt(previous_summary, messages),
+                                    temperature=0.2, max_output_tokens=384)
+
+
+def _conversation_summary_prompt(previous_summary: Optional[str], messages: List[Dict]) -> str:
+    turns = "".join(f"{'User' if msg['role'] == 'user' else 'Assistant'}: {msg['content']}\n" for msg in messages)
+    return f"""Update the running summary of a conversation between an MSME and a tender consultant.
+
+SUMMARY SO FAR:
+{previous_summary or '(none)'}
+
+NEW TURNS:
+{turns}
+Rewrite the summary to cover both, in at most 150 words. Keep every decision, figure,
+commitment and open question the user raised; drop greetings and repetition.
+Return only the summary text.
+"""
 
 
 def analyze_compliance_gaps(tender_data: Dict, company_data: Dict, gaps: List[Dict]) -> str:
+    return _call_vertex(_compliance_gaps_prompt(tender_data, company_data, gaps), temperature=0.5, max_output_tokens=1024)
+
+
+async def analyze_compliance_gaps_async(tender_data: Dict, company_data: Dict, gaps: List[Dict]) -> str:
+    return await _call_vertex_async(_compliance_gaps_prompt(tender_data, company_data, gaps), temperature=0.5, max_output_tokens=1024)
+
+
+def _compliance_gaps_prompt(tender_data: Dict, company_data: Dict, gaps: List[Dict]) -> str:
     prompt = f"""You are a senior procurement consultant analyzing an MSME's eligibility for a government tender.
 
 TENDER: {tender_data.get('title')} | Authority: {tender_data.get('issuing_authority')}
@@ -227,4 +830,4 @@ Write a 3-4 paragraph strategic analysis:
 
 Be encouraging but realistic. Use Indian procurement context.
 """
-    return _call_vertex(prompt, temperature=0.5, max_output_tokens=1024)
\ No newline at end of file
+    return prompt
\ No newline at end of file
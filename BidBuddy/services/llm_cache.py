@@ -0,0 +1,178 @@
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+# Persistent LLM response cache, shared by all uvicorn workers on the host
+# through one SQLite file (WAL mode: concurrent readers, serialised writers)
+LLM_CACHE_PATH        = os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+LLM_CACHE_ENABLED     = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_MAX_MB      = int(os.getenv("LLM_CACHE_MAX_MB", "200"))
+LLM_CACHE_TTL_S       = int(os.getenv("LLM_CACHE_TTL_S", str(7 * 24 * 3600)))
+
+# Run LRU/TTL eviction every N writes rather than on every put
+_EVICT_EVERY = 50
+
+# Lookups only read. Hit/miss counts and last_used times are kept in
+# memory and written in one transaction on the next put, on stats(), or
+# once this many lookups / seconds have piled up.
+_FLUSH_EVERY      = 200
+_FLUSH_INTERVAL_S = 30
+
+_local = threading.local()
+_writes = 0
+
+_pending_lock = threading.Lock()
+_pending_counts: Counter = Counter()
+_pending_used: Dict[str, float] = {}
+_last_flush = time.monotonic()
+
+
+def cache_key(prompt: str, model: str, temperature: float, max_output_tokens: int) -> str:
+    payload = json.dumps([model, temperature, max_output_tokens, prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _conn() -> sqlite3.Connection:
+    """One connection per thread (sqlite3 connections aren't thread-safe)."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(LLM_CACHE_PATH, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, model TEXT, response TEXT,"
+            " size INTEGER, created_at REAL, last_used REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_last_used ON llm_cache (last_used)")
+        conn.execute("CREATE TABLE IF NOT EXISTS llm_cache_stats (name TEXT PRIMARY KEY, value INTEGER)")
+        _local.conn = conn
+    return conn
+
+
+def _record(name: str, key: Optional[str] = None, used_at: Optional[float] = None) -> bool:
+    """Note a hit/miss (and the entry's new last_used); True when a flush is due."""
+    with _pending_lock:
+        _pending_counts[name] += 1
+        if key is not None:
+            _pending_used[key] = used_at
+        return (sum(_pending_counts.values()) >= _FLUSH_EVERY
+                or time.monotonic() - _last_flush >= _FLUSH_INTERVAL_S)
+
+
+def flush() -> None:
+    """Write the buffered hit/miss counts and last_used times."""
+    global _last_flush
+    with _pending_lock:
+        counts, used = dict(_pending_counts), dict(_pending_used)
+        _pending_counts.clear()
+        _pending_used.clear()
+        _last_flush = time.monotonic()
+    if not counts:
+        return
+    conn = _conn()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany("UPDATE llm_cache SET last_used = MAX(last_used, ?) WHERE key = ?",
+                         [(used_at, key) for key, used_at in used.items()])
+        conn.executemany(
+            "INSERT INTO llm_cache_stats (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            list(counts.items()),
+        )
+        conn.execute("COMMIT")
+    except sqlite3.Error as e:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        print(f"WARNING: LLM cache stats write failed: {e}")
+
+
+atexit.register(flush)
+
+
+def get(key: str) -> Optional[str]:
+    """Cached response for `key`, or None. Cache errors count as a miss."""
+    try:
+        conn = _conn()
+        now = time.time()
+        row = conn.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row and now - row[1] > LLM_CACHE_TTL_S:
+            row = None  # expired; evict() deletes it
+        if _record("hits" if row else "misses", key if row else None, now):
+            flush()
+        return row[0] if row else None
+    except sqlite3.Error as e:
+        print(f"WARNING: LLM cache read failed: {e}")
+        return None
+
+
+def put(key: str, model: str, response: str) -> None:
+    global _writes
+    try:
+        conn = _conn()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, model, response, size, created_at, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, model, response, len(response.encode("utf-8")), now, now),
+        )
+        flush()
+        _writes += 1
+        if _writes % _EVICT_EVERY == 0:
+            evict()
+    except sqlite3.Error as e:
+        print(f"WARNING: LLM cache write failed: {e}")
+
+
+def evict() -> None:
+    """Drop expired entries, then least-recently-used ones beyond the size limits."""
+    conn = _conn()
+    conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - LLM_CACHE_TTL_S,))
+    conn.execute(
+        "DELETE FROM llm_cache WHERE key IN ("
+        " SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+        (LLM_CACHE_MAX_ENTRIES,),
+    )
+    max_bytes = LLM_CACHE_MAX_MB * 1024 * 1024
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+    if total > max_bytes:
+        # Walk from the oldest entry until enough bytes have been freed
+        freed, cutoff = 0, None
+        for last_used, size in conn.execute("SELECT last_used, size FROM llm_cache ORDER BY last_used"):
+            freed += size
+            cutoff = last_used
+            if total - freed <= max_bytes:
+                break
+        conn.execute("DELETE FROM llm_cache WHERE last_used <= ?", (cutoff,))
+
+
+def stats() -> Dict:
+    """Hit/miss counters (across all workers) and current cache size."""
+    flush()
+    conn = _conn()
+    counters = dict(conn.execute("SELECT name, value FROM llm_cache_stats").fetchall())
+    entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+    hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+        "entries": entries,
+        "size_mb": round(size / (1024 * 1024), 2),
+    }
+
+
+def clear() -> None:
+    with _pending_lock:
+        _pending_counts.clear()
+        _pending_used.clear()
+    conn = _conn()
+    conn.execute("DELETE FROM llm_cache")
+    conn.execute("DELETE FROM llm_cache_stats")
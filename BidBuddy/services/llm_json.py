@@ -0,0 +1,277 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Tolerant single-pass JSON reader for LLM responses.
+#
+# Scans once from the first "{" / "[" (so markdown fences and leading or
+# trailing prose are skipped without a separate cleanup pass). Valid JSON
+# goes straight through the C decoder; anything else is read by _Reader,
+# which repairs the usual model mistakes as it goes: trailing or missing
+# commas, single-quoted strings, Python literals (True/False/None),
+# // comments, numbers with a dangling exponent ("1e"), and - when
+# max_output_tokens cut the response off - unterminated strings and
+# unclosed objects/arrays, closed at end of input. A value that can't be
+# read at all is dropped up to the next "," so the rest still parses.
+
+_NUMBER_RE = re.compile(r"-?(?:\d+)(?:\.\d*)?(?:[eE][+-]?\d*)?")
+_DANGLING_EXPONENT_RE = re.compile(r"[eE][+-]?$")
+_STRING_BODY = {
+    '"': re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL),
+    "'": re.compile(r"(?:[^'\\]|\\.)*'", re.DOTALL),
+}
+_BARE_WORD_RE = re.compile(r"[A-Za-z_][\w\-]*")
+_DECODER = json.JSONDecoder()
+_LITERALS = {"true": True, "false": False, "null": None, "True": True, "False": False, "None": None}
+
+
+class _Truncated(Exception):
+    pass
+
+
+class _Reader:
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+        self.complete = True
+
+    def skip(self) -> None:
+        """Skip whitespace and // or /* */ comments."""
+        text, n = self.text, len(self.text)
+        while self.pos < n:
+            ch = text[self.pos]
+            if ch in " \t\r\n":
+                self.pos += 1
+            elif text.startswith("//", self.pos):
+                end = text.find("\n", self.pos)
+                self.pos = n if end == -1 else end + 1
+            elif text.startswith("/*", self.pos):
+                end = text.find("*/", self.pos + 2)
+                self.pos = n if end == -1 else end + 2
+            else:
+                return
+
+    def peek(self) -> str:
+        self.skip()
+        if self.pos >= len(self.text):
+            raise _Truncated()
+        return self.text[self.pos]
+
+    def value(self) -> Any:
+        ch = self.peek()
+        if ch == "{":
+            return self.obj()
+        if ch == "[":
+            return self.arr()
+        if ch in "\"'":
+            return self.string()
+        match = _NUMBER_RE.match(self.text, self.pos)
+        if match:
+            self.pos = match.end()
+            token = _DANGLING_EXPONENT_RE.sub("", match.group())
+            if self.pos >= len(self.text):
+                self.complete = False  # number may have been cut short
+            return float(token) if any(c in token for c in ".eE") else int(token)
+        match = _BARE_WORD_RE.match(self.text, self.pos)
+        if match:
+            self.pos = match.end()
+            return _LITERALS.get(match.group(), match.group())
+        raise ValueError(f"unexpected {ch!r} at {self.pos}")
+
+    def skip_value(self, closer: str) -> None:
+        """Move past an unreadable value, to the next "," or `closer` outside brackets and strings."""
+        text, depth, quote = self.text, 0, None
+        while self.pos < len(text):
+            ch = text[self.pos]
+            if quote:
+                if ch == "\\":
+                    self.pos += 1
+                elif ch == quote:
+                    quote = None
+            elif ch in "\"'":
+                quote = ch
+            elif ch in "[{":
+                depth += 1
+            elif ch in "]}":
+                if depth == 0:
+                    if ch == closer:
+                        return
+                else:
+                    depth -= 1
+            elif ch == "," and depth == 0:
+                return
+            self.pos += 1
+        raise _Truncated()
+
+    def item(self, closer: str) -> Tuple[bool, Any]:
+        """(True, value), or (False, None) when the value was unreadable and skipped."""
+        start = self.pos
+        try:
+            return True, self.value()
+        except ValueError:
+            self.pos = start
+            self.skip_value(closer)
+            return False, None
+
+    def string(self) -> str:
+        quote = self.text[self.pos]
+        self.pos += 1
+        match = _STRING_BODY[quote].match(self.text, self.pos)
+        if match:
+            body = match.group()[:-1]
+            self.pos = match.end()
+        else:
+            body = self.text[self.pos:].rstrip("\\")
+            self.pos = len(self.text)
+            self.complete = False
+        if quote == "'":
+            body = body.replace("\\'", "'").replace('"', '\\"')
+        try:
+            return json.loads(f'"{body}"', strict=False)
+        except json.JSONDecodeError:
+            return body
+
+    def obj(self) -> Dict:
+        self.pos += 1
+        result: Dict = {}
+        try:
+            while True:
+                ch = self.peek()
+                if ch == "}":
+                    self.pos += 1
+                    return result
+                if ch == ",":
+                    self.pos += 1
+                    continue
+                if ch not in "\"'" and not _BARE_WORD_RE.match(self.text, self.pos):
+                    self.skip_value("}")
+                    continue
+                key = self.string() if ch in "\"'" else self.bare_key()
+                if self.peek() == ":":
+                    self.pos += 1
+                ok, value = self.item("}")
+                if ok:
+                    result[key] = value
+        except _Truncated:
+            self.complete = False
+            return result
+
+    def bare_key(self) -> str:
+        match = _BARE_WORD_RE.match(self.text, self.pos)
+        if not match:
+            raise ValueError(f"bad key at {self.pos}")
+        self.pos = match.end()
+        return match.group()
+
+    def arr(self) -> List:
+        self.pos += 1
+        result: List = []
+        try:
+            while True:
+                ch = self.peek()
+                if ch == "]":
+                    self.pos += 1
+                    return result
+                if ch == ",":
+                    self.pos += 1
+                    continue
+                ok, value = self.item("]")
+                if ok:
+                    result.append(value)
+        except _Truncated:
+            self.complete = False
+            return result
+
+
+def parse_llm_json(raw: str) -> Tuple[Optional[Any], bool]:
+    """
+    Parse the first JSON object in `raw` (or the first array, if it has
+    no object).
+
+    Returns (value, complete): `complete` is False when the response was
+    cut off and brackets/strings had to be closed. (None, False) when
+    there's nothing usable.
+    """
+    start = raw.find("{")
+    if start == -1:
+        start = raw.find("[")
+    if start == -1:
+        return None, False
+    # Well-formed output (the common case) decodes at C speed; raw_decode
+    # stops at the end of the value, so trailing prose/fences don't matter
+    try:
+        return _DECODER.raw_decode(raw, start)[0], True
+    except json.JSONDecodeError:
+        pass
+    reader = _Reader(raw)
+    reader.pos = start
+    try:
+        return reader.value(), reader.complete
+    except (ValueError, _Truncated):
+        return None, False
+
+
+def coerce_to_schema(data: Dict, types: Dict[str, Any]) -> Tuple[Dict, List[str]]:
+    """
+    Validate `data` against `types` ({key: spec or nested dict}) and coerce
+    what can be coerced. A spec is "str", "bool", "list", or a callable
+    returning the coerced value (None when it can't). Returns (result in
+    schema order with every key present, dotted paths whose value was
+    unusable and reset to empty). Keys outside the schema pass through.
+    """
+    invalid: List[str] = []
+    return _walk_schema(data, types, "", invalid), invalid
+
+
+def _walk_schema(value, spec, path: str, invalid: List[str]):
+    if isinstance(spec, dict):
+        if value is not None and not isinstance(value, dict):
+            invalid.append(path.rstrip("."))
+        value = value if isinstance(value, dict) else {}
+        out = {key: _walk_schema(value.get(key), sub, f"{path}{key}." if isinstance(sub, dict) else f"{path}{key}", invalid)
+               for key, sub in spec.items()}
+        out.update({k: v for k, v in value.items() if k not in spec})
+        return out
+    coerced = _coerce(value, spec)
+    if coerced is _INVALID:
+        invalid.append(path)
+        return _coerce(None, spec)
+    return coerced
+
+
+_INVALID = object()
+
+
+def _coerce(value, spec):
+    if spec == "list":
+        if value is None:
+            return []
+        if isinstance(value, list):
+            return [v for v in value if v not in (None, "")]
+        if isinstance(value, dict):
+            return _INVALID
+        return [value] if value != "" else []
+    if spec == "bool":
+        if value is None or isinstance(value, bool):
+            return bool(value)
+        if isinstance(value, (int, float)):
+            return bool(value)
+        if isinstance(value, str):
+            word = value.strip().lower()
+            if word in ("true", "yes", "y", "1", "applicable"):
+                return True
+            if word in ("false", "no", "n", "0", "not applicable", ""):
+                return False
+        return _INVALID
+    if spec == "str":
+        if value is None:
+            return None
+        if isinstance(value, (dict, list)):
+            return _INVALID
+        return str(value).strip() or None
+    if callable(spec):
+        if value is None:
+            return None
+        coerced = spec(value)
+        return _INVALID if coerced is None else coerced
+    return value
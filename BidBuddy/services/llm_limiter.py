@@ -0,0 +1,65 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Dict
+
+# Caps on in-flight LLM calls (per uvicorn worker process)
+LLM_MAX_CONCURRENCY           = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_CONCURRENCY_PER_MODEL = int(os.getenv("LLM_MAX_CONCURRENCY_PER_MODEL", "4"))
+
+# Back-pressure: callers waiting for a slot beyond LLM_MAX_QUEUE, or for
+# longer than LLM_QUEUE_TIMEOUT_S, are rejected (HTTP 429 + Retry-After)
+LLM_MAX_QUEUE       = int(os.getenv("LLM_MAX_QUEUE", "32"))
+LLM_QUEUE_TIMEOUT_S = float(os.getenv("LLM_QUEUE_TIMEOUT_S", "30"))
+LLM_RETRY_AFTER_S   = int(os.getenv("LLM_RETRY_AFTER_S", "10"))
+
+
+class LLMOverloaded(Exception):
+    """Raised when the LLM queue is full; mapped to 429 in main.py."""
+
+    def __init__(self, retry_after: int = LLM_RETRY_AFTER_S):
+        super().__init__("Too many AI requests in progress — please retry shortly")
+        self.retry_after = retry_after
+
+
+_global_slots = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+_model_slots: Dict[str, asyncio.Semaphore] = {}
+_waiting = 0
+
+
+@asynccontextmanager
+async def llm_slot(model_name: str):
+    """
+    Hold one global and one per-model LLM slot for the duration of a call.
+
+    Usage:
+        async with llm_slot(VERTEX_MODEL):
+            ...
+    """
+    global _waiting
+    if _waiting >= LLM_MAX_QUEUE:
+        raise LLMOverloaded()
+
+    model_slots = _model_slots.setdefault(model_name, asyncio.Semaphore(LLM_MAX_CONCURRENCY_PER_MODEL))
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + LLM_QUEUE_TIMEOUT_S
+
+    _waiting += 1
+    try:
+        # Per-model first, so a slow model never holds global slots while queued
+        await asyncio.wait_for(model_slots.acquire(), LLM_QUEUE_TIMEOUT_S)
+        try:
+            await asyncio.wait_for(_global_slots.acquire(), max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            model_slots.release()
+            raise
+    except asyncio.TimeoutError:
+        raise LLMOverloaded()
+    finally:
+        _waiting -= 1
+
+    try:
+        yield
+    finally:
+        _global_slots.release()
+        model_slots.release()
@@ -0,0 +1,178 @@
+import json
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from config import RETRIEVAL_CHUNK_CHARS
+
+# Lexical retrieval over a tender's raw_text for copilot prompts.
+#
+# The text is cut into ~RETRIEVAL_CHUNK_CHARS chunks at line boundaries and
+# indexed once (BM25 postings) at ingestion. The index is plain JSON so it
+# can live on the Tender / TenderExtraction rows; chunks are stored as
+# (start, end) offsets into raw_text rather than copies of the text.
+
+INDEX_VERSION = 1
+
+BM25_K1 = 1.5
+BM25_B  = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or shall should "
+    "that the their this to was were will with which who what when where how any all "
+    "be been being do does not no can may must per than then there these those".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+def _chunk_spans(text: str, chunk_chars: int) -> List[Tuple[int, int]]:
+    """(start, end) offsets of ~chunk_chars pieces of `text`, cut after a newline."""
+    spans, start, n = [], 0, len(text)
+    while start < n:
+        end = min(n, start + chunk_chars)
+        if end < n:
+            newline = text.rfind("\n", start + chunk_chars // 2, end)
+            if newline != -1:
+                end = newline + 1
+        if text[start:end].strip():
+            spans.append((start, end))
+        start = end
+    return spans
+
+
+def build_index(text: str, chunk_chars: int = RETRIEVAL_CHUNK_CHARS) -> Dict:
+    """
+    BM25 index of `text`:
+    {
+        "v": 1,
+        "chunks": [[start, end], ...],       # offsets into text
+        "lengths": [tokens per chunk, ...],
+        "avgdl": 87.5,
+        "postings": {term: [[chunk, tf], ...]}
+    }
+    """
+    spans = _chunk_spans(text or "", chunk_chars)
+    lengths: List[int] = []
+    postings: Dict[str, List[List[int]]] = {}
+    for i, (start, end) in enumerate(spans):
+        counts = Counter(tokenize(text[start:end]))
+        lengths.append(sum(counts.values()))
+        for term, tf in counts.items():
+            postings.setdefault(term, []).append([i, tf])
+    return {
+        "v": INDEX_VERSION,
+        "chunks": [list(span) for span in spans],
+        "lengths": lengths,
+        "avgdl": (sum(lengths) / len(lengths)) if lengths else 0.0,
+        "postings": postings,
+    }
+
+
+def search(index: Dict, query: str, k: int = 3) -> List[Tuple[int, float]]:
+    """Top-k (chunk number, BM25 score) for `query`, best first."""
+    n = len(index["chunks"])
+    if not n:
+        return []
+    lengths, avgdl = index["lengths"], index["avgdl"] or 1.0
+    scores: Dict[int, float] = {}
+    for term in set(tokenize(query)):
+        postings = index["postings"].get(term)
+        if not postings:
+            continue
+        idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+        for chunk, tf in postings:
+            norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * lengths[chunk] / avgdl)
+            scores[chunk] = scores.get(chunk, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+def top_chunks(index: Dict, text: str, query: str, k: int = 3, min_ratio: float = 0.5) -> List[str]:
+    """
+    Text of the top-k chunks for `query`, in document order. Chunks scoring
+    under `min_ratio` of the best hit are dropped - they rarely help and
+    cost as many tokens as the good ones.
+    """
+    hits = search(index, query, k)
+    if not hits:
+        return []
+    floor = hits[0][1] * min_ratio
+    return [text[slice(*index["chunks"][chunk])].strip() for chunk in sorted(c for c, score in hits if score >= floor)]
+
+
+class TenderContext:
+    """
+    Prompt-ready view of one tender: its retrieval index plus extracted_data
+    with empty fields dropped. Scalar fields are always sent; list fields
+    (documents, clauses, other requirements) are sent whole only when the
+    question names them, otherwise just the items sharing a term with it.
+    """
+
+    def __init__(self, index: Dict, extracted_data: Optional[Dict]):
+        self.index = index
+        self.data = _drop_empty(extracted_data or {})
+        self._lists = {}
+        self._collect_lists(self.data, ())
+
+    def _collect_lists(self, data: Dict, path: Tuple[str, ...]) -> None:
+        for key, value in data.items():
+            if isinstance(value, dict):
+                self._collect_lists(value, path + (key,))
+            elif isinstance(value, list):
+                items = [(item, set(tokenize(json.dumps(item, default=str)))) for item in value]
+                self._lists[path + (key,)] = (set(tokenize(key.replace("_", " "))), items)
+
+    def render(self, query: str) -> str:
+        """Compact JSON of extracted_data for `query`."""
+        terms = set(tokenize(query))
+        out = json.loads(json.dumps(self.data, default=str)) if self._lists else self.data
+        for path, (name_terms, items) in self._lists.items():
+            target = out
+            for key in path[:-1]:
+                target = target[key]
+            if name_terms & terms:
+                continue
+            kept = [item for item, item_terms in items if item_terms & terms]
+            if kept:
+                target[path[-1]] = kept
+            else:
+                del target[path[-1]]
+        return json.dumps(out, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _drop_empty(value):
+    if isinstance(value, dict):
+        kept = {k: _drop_empty(v) for k, v in value.items() if not str(k).startswith("_")}
+        return {k: v for k, v in kept.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [_drop_empty(v) for v in value if v not in (None, "", [], {})]
+    return value
+
+
+# Per-process cache of TenderContext per tender, so a copilot turn doesn't
+# re-decode the stored index or re-prepare extracted_data. Keyed on what
+# changes them (content hash, status - a pending extraction is completed
+# in the background - and version).
+_contexts: Dict[Tuple, TenderContext] = {}
+_contexts_lock = threading.Lock()
+_MAX_CONTEXTS = 64
+
+
+def tender_context(tender) -> TenderContext:
+    key = (tender.id, tender.content_hash, tender.status, tender.version)
+    context = _contexts.get(key)
+    if context is None:
+        index = tender.retrieval_index
+        if not index or index.get("v") != INDEX_VERSION:
+            index = build_index(tender.raw_text or "")
+        context = TenderContext(index, tender.extracted_data)
+        with _contexts_lock:
+            if len(_contexts) >= _MAX_CONTEXTS:
+                _contexts.pop(next(iter(_contexts)))
+            _contexts[key] = context
+    return context
@@ -0,0 +1,323 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+from services.pdf_extractor import ELIGIBILITY_SECTIONS, ELIGIBILITY_TABLES_KEY
+
+# Deterministic fast path for the extract_tender_structure schema.
+#
+# Indian tenders state turnover, experience, EMD, certifications and the
+# MSE purchase-preference clause in a handful of standard phrasings, so
+# these fields are pulled out with regexes over the detected sections
+# (falling back to the full text). Every field gets a confidence in
+# [0, 1]; only fields at or above the threshold are trusted, the rest
+# (and the free-text fields below) are left to a narrowed LLM prompt.
+
+# Dotted schema paths this module can fill
+RULE_FIELDS = [
+    "tender_id",
+    "deadline",
+    "estimated_value",
+    "bid_security",
+    "eligibility.min_turnover",
+    "eligibility.years_experience",
+    "eligibility.required_certifications",
+    "eligibility.msme_preference",
+    "eligibility.min_single_project_value",
+]
+
+# Free-text fields that always need the LLM
+LLM_ONLY_FIELDS = [
+    "title",
+    "issuing_authority",
+    "sector",
+    "documents_required",
+    "key_clauses",
+    "contract_duration",
+    "eligibility.past_project_requirement",
+    "eligibility.other_requirements",
+]
+
+# Confidence multiplier when a value was only found outside the eligibility sections
+FULL_TEXT_PENALTY = 0.9
+
+# Chars after a keyword searched for its value (roughly one clause)
+WINDOW_CHARS = 250
+
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "twelve": 12, "fifteen": 15, "twenty": 20,
+}
+_NUM = r"(\d{1,2}|" + "|".join(_NUMBER_WORDS) + r")"
+
+# Money needs a currency prefix or a lakh/crore unit, so "3 years" never matches
+_AMOUNT_RE = re.compile(
+    r"(?:(?:rs\.?|inr|₹)\s*(\d[\d,]*(?:\.\d+)?)\s*(crores?|cr\b\.?|lakhs?|lacs?|million)?"
+    r"|(\d[\d,]*(?:\.\d+)?)\s*(crores?|cr\b\.?|lakhs?|lacs?|million)\b)",
+    re.IGNORECASE,
+)
+_SENTENCE_END_RE = re.compile(r"\.\s+(?=[A-Z])|\n\s*\n")
+_TURNOVER_RE = re.compile(r"turnover", re.IGNORECASE)
+_SINGLE_PROJECT_RE = re.compile(
+    r"(?:single|one)\s+(?:similar\s+)?(?:completed\s+)?(?:work|project|order|contract)", re.IGNORECASE)
+_BID_SECURITY_RE = re.compile(r"\b(?:emd|earnest\s+money(?:\s+deposit)?|bid\s+security)\b", re.IGNORECASE)
+_ESTIMATED_VALUE_RE = re.compile(
+    r"(?:estimated\s+(?:cost|value)|tender\s+value|value\s+of\s+(?:the\s+)?(?:work|contract)|project\s+cost)",
+    re.IGNORECASE)
+_YEARS_RES = [
+    re.compile(_NUM + r"\s*(?:\(\s*\w+\s*\)\s*)?\+?\s*years?\s+(?:of\s+)?(?:experience|standing|existence|operation)",
+               re.IGNORECASE),
+    re.compile(r"experience\s+of\s+(?:at\s+least\s+|minimum\s+|not\s+less\s+than\s+)?" + _NUM + r"\s*(?:\(\s*\w+\s*\)\s*)?years?",
+               re.IGNORECASE),
+    re.compile(r"in\s+(?:existence|operation|business)\s+(?:for\s+)?(?:at\s+least\s+|the\s+last\s+|minimum\s+)?" + _NUM
+               + r"\s*(?:\(\s*\w+\s*\)\s*)?years?", re.IGNORECASE),
+    # GeM bid documents: "Years of Past Experience Required for same/similar service 3 Year (s)"
+    re.compile(r"years?\s+of\s+(?:past\s+)?experience\b[^\n\d]{0,80}?\b" + _NUM + r"\s*years?", re.IGNORECASE),
+]
+_ISO_RE = re.compile(r"\bISO\s*(?:/\s*IEC\s*)?[:/-]?\s*(\d{4,5})\b")
+# BIS as a certification held by the bidder, not "conform to BIS standards"
+_BIS_RE = re.compile(r"\bBIS\b(?=[\s-]*(?i:licen[cs]e|certif|registration|registered|standard\s+mark|mark\b|CM/?L\b))"
+                     r"|(?i:certified|licensed|registered|approved)\s+(?i:by|with|under|from)\s+(?:the\s+)?BIS\b")
+_CMMI_RE = re.compile(r"\bCMMI\b(?:[\s-]*(?:maturity\s+)?(?:level|ML)[\s-]*(\d))?", re.IGNORECASE)
+# What may follow a recognised certification and still belong to it ("ISO 9001:2015 certification")
+_CERT_SUFFIX_RE = re.compile(
+    r"(?:\s*[:/-]?\s*\d{4}\b)?(?:[\s-]+(?:certified|certification|certificate|licen[cs]e|mark|registration)\b)?",
+    re.IGNORECASE)
+# Certification / licence wording; left over once the recognised ones are
+# taken out, it names something the rules can't read (NABL accreditation,
+# PSARA licence)
+_CERT_WORDING_RE = re.compile(r"\b(?:accredit\w*|licen[cs]e[ds]?|certified|certifications?|empanel\w*)\b",
+                              re.IGNORECASE)
+_MSME_RES = [
+    re.compile(r"\bpreference\b[^.]{0,200}?\b(?:mses?|msmes?|micro\s+(?:and|&)\s+small)", re.IGNORECASE),
+    re.compile(r"\b(?:mses?|msmes?|micro\s+(?:and|&)\s+small\s+enterprises?)\b[^.]{0,200}?(?:exempt\w*|preference)",
+               re.IGNORECASE),
+    re.compile(r"public\s+procurement\s+policy\s+for\s+(?:mses?|micro\s+(?:and|&)\s+small)", re.IGNORECASE),
+]
+_NEGATION_RE = re.compile(r"\bnot\s+(?:be\s+)?(?:eligible|exempt\w*|applicable|allowed)|:\s*no\b", re.IGNORECASE)
+_DEADLINE_RE = re.compile(
+    r"(?:last\s+date|due\s+date|closing\s+date|bid\s+(?:submission\s+)?end\s+date|submission\s+deadline)"
+    r"[^\n]{0,80}?(?:(\d{1,2})[-./](\d{1,2})[-./](\d{2,4})"
+    r"|(\d{1,2})(?:st|nd|rd|th)?\s+(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?,?\s+(\d{4}))",
+    re.IGNORECASE)
+_MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+_TENDER_ID_RE = re.compile(
+    r"\b(?:tender|nit|bid|rfp|e-?tender)\s*(?:no|number|ref(?:erence)?|id)\.?\s*[:\-]?\s*([A-Z0-9][A-Za-z0-9/_.\-]{3,60})",
+    re.IGNORECASE)
+
+
+def extract_rule_fields(sections: Dict[str, str], full_text: str = "") -> Dict:
+    """
+    Fill the rule-covered schema fields from `sections` (output of
+    pdf_extractor._extract_sections) and `full_text`.
+
+    Returns:
+    {
+        "data": { partial extract_tender_structure schema },
+        "confidence": { "eligibility.min_turnover": 0.95, ... }
+    }
+    """
+    eligibility_text = "\n\n".join(
+        sections[key] for key in ELIGIBILITY_SECTIONS + [ELIGIBILITY_TABLES_KEY] if sections.get(key)
+    )
+    data: Dict = {"eligibility": {}}
+    confidence: Dict[str, float] = {}
+
+    def fill(path: str, finder, prefer_eligibility: bool = True) -> None:
+        value, conf = None, 0.0
+        if prefer_eligibility and eligibility_text:
+            value, conf = finder(eligibility_text)
+        if value is None and full_text:
+            value, conf = finder(full_text)
+            conf *= FULL_TEXT_PENALTY if prefer_eligibility and eligibility_text else 1.0
+        _set_path(data, path, value)
+        confidence[path] = round(conf, 3)
+
+    fill("eligibility.min_turnover", lambda t: _keyword_amount(t, _TURNOVER_RE))
+    fill("eligibility.min_single_project_value", lambda t: _keyword_amount(t, _SINGLE_PROJECT_RE))
+    fill("eligibility.years_experience", _years_experience)
+    fill("bid_security", lambda t: _keyword_amount(t, _BID_SECURITY_RE), prefer_eligibility=False)
+    fill("estimated_value", lambda t: _keyword_amount(t, _ESTIMATED_VALUE_RE), prefer_eligibility=False)
+    fill("deadline", _deadline, prefer_eligibility=False)
+    fill("tender_id", _tender_id, prefer_eligibility=False)
+
+    certs, conf = _certifications(eligibility_text or full_text)
+    data["eligibility"]["required_certifications"] = certs
+    confidence["eligibility.required_certifications"] = conf if eligibility_text else round(conf * 0.8, 3)
+
+    msme, conf = _msme_preference(full_text or eligibility_text)
+    data["eligibility"]["msme_preference"] = msme
+    confidence["eligibility.msme_preference"] = conf
+
+    return {"data": data, "confidence": confidence}
+
+
+def confident_fields(rule_result: Dict, threshold: float) -> List[str]:
+    return [path for path, conf in rule_result["confidence"].items() if conf >= threshold]
+
+
+def pending_fields(rule_result: Dict, threshold: float) -> List[str]:
+    """Schema fields the LLM still has to fill: low-confidence rule fields + free-text ones."""
+    confident = set(confident_fields(rule_result, threshold))
+    return [path for path in RULE_FIELDS if path not in confident] + LLM_ONLY_FIELDS
+
+
+def apply_rule_fields(extracted: Dict, rule_result: Dict, threshold: float) -> Dict:
+    """
+    Overlay the confident rule values on `extracted`: rules win over the
+    LLM, except that for lists the LLM's extra entries are kept after the
+    rule ones.
+    """
+    merged = dict(extracted)
+    merged["eligibility"] = dict(extracted.get("eligibility") or {})
+    for path in confident_fields(rule_result, threshold):
+        value = _get_path(rule_result["data"], path)
+        existing = _get_path(merged, path)
+        if isinstance(value, list) and isinstance(existing, list):
+            seen = {str(item).strip().casefold() for item in value}
+            value = value + [item for item in existing if str(item).strip().casefold() not in seen]
+        _set_path(merged, path, value)
+    return merged
+
+
+def parse_amount_lakhs(text: str) -> Optional[float]:
+    """
+    Amount in lakhs from free text: "Rs. 5 Crore" -> 500, "Rs 2,00,000" -> 2.
+    A bare number without currency or unit is taken to be lakhs already.
+    """
+    amount = _first_amount(text)
+    if amount:
+        return amount[0]
+    match = re.search(r"\d[\d,]*(?:\.\d+)?", text)
+    return float(match.group().replace(",", "")) if match else None
+
+
+def _get_path(data: Dict, path: str):
+    for part in path.split("."):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(part)
+    return data
+
+
+def _set_path(data: Dict, path: str, value) -> None:
+    *parents, leaf = path.split(".")
+    for part in parents:
+        data = data.setdefault(part, {})
+    data[leaf] = value
+
+
+def _to_lakhs(number: str, unit: Optional[str]) -> float:
+    value = float(number.replace(",", ""))
+    unit = (unit or "").lower().rstrip(".")
+    if unit.startswith("cr"):
+        return round(value * 100, 2)
+    if unit.startswith("la"):
+        return round(value, 2)
+    if unit == "million":
+        return round(value * 10, 2)
+    return round(value / 100000, 2)  # bare rupees
+
+
+def _first_amount(window: str) -> Optional[Tuple[float, bool]]:
+    """(value in lakhs, had an explicit unit) for the first amount in `window`."""
+    match = _AMOUNT_RE.search(window)
+    if not match:
+        return None
+    number, unit = (match.group(1), match.group(2)) if match.group(1) else (match.group(3), match.group(4))
+    return _to_lakhs(number, unit), bool(unit)
+
+
+def _keyword_amount(text: str, keyword_re: re.Pattern) -> Tuple[Optional[float], float]:
+    """
+    The amount stated right after each keyword hit (same sentence). One
+    distinct value is high confidence; several conflicting ones are not.
+    """
+    found: List[Tuple[float, bool]] = []
+    for match in keyword_re.finditer(text):
+        window = _SENTENCE_END_RE.split(text[match.end():match.end() + WINDOW_CHARS], maxsplit=1)[0]
+        amount = _first_amount(window)
+        if amount and amount[0] > 0:
+            found.append(amount)
+    if not found:
+        return None, 0.0
+    value, has_unit = found[0]
+    if len({v for v, _ in found}) > 1:
+        return value, 0.6
+    return value, 0.95 if has_unit else 0.8
+
+
+def _years_experience(text: str) -> Tuple[Optional[int], float]:
+    values = []
+    for pattern in _YEARS_RES:
+        for match in pattern.finditer(text):
+            token = match.group(1).lower()
+            values.append(int(token) if token.isdigit() else _NUMBER_WORDS[token])
+    if not values:
+        return None, 0.0
+    if len(set(values)) > 1:
+        return max(values), 0.6
+    return values[0], 0.9
+
+
+def _certifications(text: str) -> Tuple[List[str], float]:
+    certs: List[str] = []
+    spans: List[Tuple[int, int]] = []
+
+    def found(match: re.Match, cert: str) -> None:
+        certs.append(cert)
+        spans.append((match.start(), _CERT_SUFFIX_RE.match(text, match.end()).end()))
+
+    for match in _ISO_RE.finditer(text):
+        found(match, f"ISO {match.group(1)}")
+    for match in _BIS_RE.finditer(text):
+        found(match, "BIS")
+    for match in _CMMI_RE.finditer(text):
+        found(match, f"CMMI Level {match.group(1)}" if match.group(1) else "CMMI")
+    certs = list(dict.fromkeys(certs))
+
+    rest, last = [], 0
+    for start, end in sorted(spans):
+        rest.append(text[last:start])
+        last = max(last, end)
+    rest.append(text[last:])
+    if _CERT_WORDING_RE.search(" ".join(rest)):
+        # Other certifications / licences are asked for too; the LLM lists them
+        return certs, 0.5
+    # An empty list is weaker evidence than a found one (wording may be unusual)
+    return certs, 0.9 if certs else 0.75
+
+
+def _msme_preference(text: str) -> Tuple[bool, float]:
+    for pattern in _MSME_RES:
+        match = pattern.search(text)
+        if match:
+            clause = text[max(0, match.start() - 100):match.end() + 100]
+            if _NEGATION_RE.search(clause):
+                return False, 0.5
+            return True, 0.9
+    # No clause found is not evidence of no preference (the wording varies)
+    return False, 0.5
+
+
+def _deadline(text: str) -> Tuple[Optional[str], float]:
+    dates = []
+    for match in _DEADLINE_RE.finditer(text):
+        if match.group(1):
+            day, month, year = int(match.group(1)), int(match.group(2)), match.group(3)
+        else:
+            day, month, year = int(match.group(4)), _MONTHS.index(match.group(5).lower()[:3]) + 1, match.group(6)
+        if len(year) == 2:
+            year = "20" + year
+        if 1 <= day <= 31 and 1 <= month <= 12:
+            dates.append(f"{day:02d}-{month:02d}-{year}")
+    if not dates:
+        return None, 0.0
+    return dates[0], 0.9 if len(set(dates)) == 1 else 0.6
+
+
+def _tender_id(text: str) -> Tuple[Optional[str], float]:
+    ids = [m.group(1).rstrip(".-/") for m in _TENDER_ID_RE.finditer(text[:20000])]
+    ids = [i for i in ids if any(ch.isdigit() for ch in i)]
+    if not ids:
+        return None, 0.0
+    return ids[0], 0.85 if len(set(ids)) == 1 else 0.7
@@ -0,0 +1,172 @@
+import threading
+from typing import Callable, Dict, FrozenSet, List, Optional
+
+from services.retrieval import tokenize
+
+# Canonical FAQ per tender, answered straight from extracted_data.
+#
+# Most copilot questions are one of a handful (deadline, EMD, documents,
+# turnover, MSME preference, duration). build_faq() writes their answers
+# once the extraction is final; match_faq() recognises a short question on
+# one of those topics and the copilot serves the stored answer without an
+# LLM call. Anything longer or less clear-cut still goes to the LLM: a
+# wrong canned answer costs more than the LLM call it saves.
+
+FAQ_VERSION = 2
+
+# A question may carry this many content words beyond the topic's own and
+# the generic filler below and still count as the canonical question
+MAX_EXTRA_TERMS = 0
+
+_FILLER = frozenset(
+    "tender bid bidder bidders amount value required requirement requirements needed need "
+    "criteria criterion minimum min date time period list details exact specified mentioned "
+    "please tell me us we our much long give provide submit submitted submission applicable "
+    "eligibility eligible rs lakh lakhs inr".split()
+)
+
+
+def _lakhs(value) -> str:
+    return f"Rs. {value:g} Lakhs" if isinstance(value, (int, float)) else str(value)
+
+
+def _deadline(data: Dict) -> Optional[str]:
+    if data.get("deadline"):
+        return f"The bid submission deadline is {data['deadline']}."
+    return None
+
+
+def _emd(data: Dict) -> Optional[str]:
+    value = data.get("bid_security")
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return f"The EMD (bid security) is {_lakhs(value)}."
+    return f"EMD (bid security): {value}"
+
+
+def _documents(data: Dict) -> Optional[str]:
+    documents = data.get("documents_required") or []
+    if not documents:
+        return None
+    return "Documents required:\n" + "\n".join(f"- {doc}" for doc in documents)
+
+
+def _turnover(data: Dict) -> Optional[str]:
+    value = (data.get("eligibility") or {}).get("min_turnover")
+    if value in (None, ""):
+        return None
+    return f"The minimum annual turnover required is {_lakhs(value)}."
+
+
+def _msme(data: Dict) -> Optional[str]:
+    # msme_preference False usually means "not mentioned", so only a
+    # positive answer is safe to give without reading the tender
+    if not (data.get("eligibility") or {}).get("msme_preference"):
+        return None
+    answer = "Yes. The tender extends MSME / MSE preference."
+    emd = _emd(data)
+    return f"{answer} {emd}" if emd else answer
+
+
+def _duration(data: Dict) -> Optional[str]:
+    if data.get("contract_duration"):
+        return f"The contract duration is {data['contract_duration']}."
+    return None
+
+
+class _Topic:
+    def __init__(self, topic_id: str, question: str, triggers: List[str], answer: Callable[[Dict], Optional[str]],
+                 vocabulary: str = "", excludes: str = ""):
+        self.id = topic_id
+        self.question = question
+        # Each trigger is a phrase; all of its terms must appear in the question
+        self.triggers = [frozenset(tokenize(trigger)) for trigger in triggers]
+        self.vocabulary: FrozenSet[str] = frozenset().union(*self.triggers, tokenize(vocabulary))
+        # Terms that make it a different question on the same words ("last date for queries")
+        self.excludes: FrozenSet[str] = frozenset(tokenize(excludes))
+        self.answer = answer
+
+
+FAQ_TOPICS = [
+    _Topic("deadline", "What is the bid submission deadline?",
+           ["deadline", "last date", "due date", "closing date", "submission date", "when submit", "when due"],
+           _deadline, vocabulary="last due closing bids final",
+           excludes="query queries clarification clarifications prebid pre meeting opening open opened "
+                    "visit sale download extension extended extend corrigendum"),
+    _Topic("emd", "What is the EMD / bid security?",
+           ["emd", "earnest money", "bid security"],
+           _emd, vocabulary="earnest money deposit security",
+           excludes="exemption exempt exempted waiver waived refund refunded return returned forfeit forfeited"),
+    _Topic("documents", "Which documents are required?",
+           ["documents", "document", "documentation", "papers"],
+           _documents, vocabulary="upload attach mandatory"),
+    _Topic("turnover", "What is the minimum turnover requirement?",
+           ["turnover"],
+           _turnover, vocabulary="annual average yearly financial"),
+    # msme_preference doesn't say what the preference covers, so exemption
+    # questions ("are MSMEs exempt from EMD?") are left to the LLM
+    _Topic("msme", "Is there an MSME preference?",
+           ["msme", "mse", "msmes", "mses", "micro small"],
+           _msme, vocabulary="preference benefit micro small medium enterprise enterprises",
+           excludes="exemption exempt exempted waiver waived relaxation"),
+    _Topic("duration", "What is the contract duration?",
+           ["contract duration", "duration", "completion period", "contract period", "how long contract",
+            "completion time"],
+           _duration, vocabulary="contract completion work works months years"),
+]
+
+
+def build_faq(extracted_data: Optional[Dict]) -> Dict:
+    """
+    {"v": FAQ_VERSION, "items": {topic_id: {"question": ..., "answer": ...}}} for
+    every topic the extraction has data for.
+    """
+    data = extracted_data or {}
+    items = {}
+    for topic in FAQ_TOPICS:
+        answer = topic.answer(data)
+        if answer:
+            items[topic.id] = {"question": topic.question, "answer": answer}
+    return {"v": FAQ_VERSION, "items": items}
+
+
+def match_topic(question: str) -> Optional[str]:
+    """Topic id when `question` is plainly one FAQ topic's question, else None."""
+    terms = set(tokenize(question))
+    if not terms:
+        return None
+    hits = [topic for topic in FAQ_TOPICS if any(trigger <= terms for trigger in topic.triggers)]
+    if len(hits) != 1 or terms & hits[0].excludes:
+        return None
+    extra = terms - hits[0].vocabulary - _FILLER
+    return hits[0].id if len(extra) <= MAX_EXTRA_TERMS else None
+
+
+# Per-process counters: copilot questions seen, and those answered from the FAQ
+_stats_lock = threading.Lock()
+_stats = {"lookups": 0, "hits": 0, "by_topic": {}}
+
+
+def match_faq(faq: Optional[Dict], question: str) -> Optional[str]:
+    """Stored answer for `question`, or None when the LLM should answer. Counts towards faq_stats()."""
+    topic_id = match_topic(question)
+    item = (faq or {}).get("items", {}).get(topic_id) if topic_id else None
+    with _stats_lock:
+        _stats["lookups"] += 1
+        if item:
+            _stats["hits"] += 1
+            _stats["by_topic"][topic_id] = _stats["by_topic"].get(topic_id, 0) + 1
+    return item["answer"] if item else None
+
+
+def faq_stats() -> Dict:
+    """FAQ hit counters for this worker process."""
+    with _stats_lock:
+        lookups, hits = _stats["lookups"], _stats["hits"]
+        return {
+            "lookups": lookups,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "by_topic": dict(_stats["by_topic"]),
+        }
@@ -0,0 +1,247 @@
+import bisect
+import threading
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+import models
+from services.compliance_batch import max_project_value
+from services.compliance_engine import DISQUALIFYING, score_compliance
+from services.vocabulary import CERTIFICATION, company_term_ids, stored_ids, vocab_ids
+
+# Eligibility index over every extracted tender, for "which tenders can
+# this company bid on?" without scoring each one.
+#
+# Numeric thresholds (min_turnover, years_experience,
+# min_single_project_value) are kept as sorted (threshold, tender_id)
+# lists, so the tenders a company clears are a prefix found by bisect;
+# required certifications (canonical IDs, see services.vocabulary) and
+# sectors map to sets of tender ids. A lookup intersects those to a
+# candidate set and only the candidates go through score_compliance.
+#
+# The index lives in process memory. Uploads add to it directly
+# (index_tender); sync() picks up tenders ingested by other workers or
+# finished by a background extraction, using a cheap count/max(id) check.
+
+# score_compliance disqualifies below this share of the required turnover
+TURNOVER_DISQUALIFY_PCT = 70
+
+_RANGE_FIELDS = ("min_turnover", "years_experience", "min_single_project_value")
+_DEADLINE_FORMATS = ("%d-%m-%Y", "%d/%m/%Y", "%d.%m.%Y", "%Y-%m-%d")
+
+
+def _threshold(value) -> Optional[float]:
+    """Numeric requirement, 0.0 for none, None when it isn't a number (always a candidate)."""
+    if not value:
+        return 0.0
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+def tender_vocab_ids(extracted_data: Optional[Dict]) -> Dict:
+    """Tender.vocab_ids: canonical IDs of the required certifications and documents."""
+    data = extracted_data or {}
+    return vocab_ids((data.get("eligibility") or {}).get("required_certifications"), data.get("documents_required"))
+
+
+def parse_deadline(value) -> Optional[date]:
+    if not isinstance(value, str):
+        return None
+    for fmt in _DEADLINE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+class _Entry:
+    def __init__(self, tender: models.Tender):
+        self.id = tender.id
+        self.user_id = tender.user_id
+        self.parent_id = tender.parent_id
+        self.title = tender.title
+        self.sector = tender.sector
+        self.deadline = tender.deadline
+        self.data = tender.extracted_data or {}
+        eligibility = self.data.get("eligibility") or {}
+        self.thresholds = {field: _threshold(eligibility.get(field)) for field in _RANGE_FIELDS}
+        self.certs = set(stored_ids(tender.vocab_ids, eligibility.get("required_certifications"),
+                                    self.data.get("documents_required"))["certifications"])
+        self.sector_key = (self.sector or "").strip().lower()
+
+
+class EligibilityIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries: Dict[int, _Entry] = {}
+        # field -> sorted [(threshold, tender_id)] for tenders with a numeric requirement
+        self._ranges: Dict[str, List[Tuple[float, int]]] = {field: [] for field in _RANGE_FIELDS}
+        # field -> tenders with no requirement, or one that isn't a number
+        self._unbounded: Dict[str, Set[int]] = {field: set() for field in _RANGE_FIELDS}
+        self._by_cert: Dict[int, Set[int]] = {}
+        self._no_certs: Set[int] = set()
+        self._by_sector: Dict[str, Set[int]] = {}
+        self._superseded: Dict[int, int] = {}  # tender id -> indexed revisions of it
+        self._signature: Optional[Tuple[int, int]] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ── maintenance ──────────────────────────────────────────
+    def add(self, tender: models.Tender) -> None:
+        """Index (or re-index) an extracted tender."""
+        entry = _Entry(tender)
+        with self._lock:
+            self._remove(entry.id)
+            self._entries[entry.id] = entry
+            for field, value in entry.thresholds.items():
+                if value:
+                    bisect.insort(self._ranges[field], (value, entry.id))
+                else:
+                    self._unbounded[field].add(entry.id)
+            for cert in entry.certs:
+                self._by_cert.setdefault(cert, set()).add(entry.id)
+            if not entry.certs:
+                self._no_certs.add(entry.id)
+            if entry.sector_key:
+                self._by_sector.setdefault(entry.sector_key, set()).add(entry.id)
+            if entry.parent_id:
+                self._superseded[entry.parent_id] = self._superseded.get(entry.parent_id, 0) + 1
+
+    def remove(self, tender_id: int) -> None:
+        with self._lock:
+            self._remove(tender_id)
+
+    def _remove(self, tender_id: int) -> None:
+        entry = self._entries.pop(tender_id, None)
+        if not entry:
+            return
+        for field, value in entry.thresholds.items():
+            if value:
+                ranges = self._ranges[field]
+                del ranges[bisect.bisect_left(ranges, (value, tender_id))]
+            else:
+                self._unbounded[field].discard(tender_id)
+        for cert in entry.certs:
+            self._by_cert[cert].discard(tender_id)
+        self._no_certs.discard(tender_id)
+        if entry.sector_key:
+            self._by_sector[entry.sector_key].discard(tender_id)
+        if entry.parent_id:
+            # Deleting the last revision makes its parent the current version again
+            remaining = self._superseded.pop(entry.parent_id) - 1
+            if remaining:
+                self._superseded[entry.parent_id] = remaining
+
+    def sync(self, db: Session) -> None:
+        """Bring the index up to date with the extracted tenders in the database."""
+        extracted = models.Tender.status == "extracted"
+        signature = tuple(db.query(func.count(models.Tender.id), func.max(models.Tender.id)).filter(extracted).one())
+        if signature == self._signature:
+            return
+        ids = {row[0] for row in db.query(models.Tender.id).filter(extracted)}
+        with self._lock:
+            for tender_id in set(self._entries) - ids:
+                self._remove(tender_id)
+            missing = ids - set(self._entries)
+        for start in range(0, len(missing), 500):
+            batch = sorted(missing)[start:start + 500]
+            for tender in db.query(models.Tender).filter(models.Tender.id.in_(batch)):
+                self.add(tender)
+        self._signature = signature
+
+    # ── lookup ───────────────────────────────────────────────
+    def _within(self, field: str, limit: float) -> Set[int]:
+        """Tenders whose `field` requirement is at most `limit` (or absent)."""
+        ranges = self._ranges[field]
+        end = bisect.bisect_right(ranges, (limit, float("inf")))
+        return self._unbounded[field].union(tender_id for _, tender_id in ranges[:end])
+
+    def candidates(self, company: Dict, strict: bool = False, sectors: Optional[Iterable[str]] = None,
+                   user_id: Optional[int] = None, open_on: Optional[date] = None) -> List[int]:
+        """
+        Tender ids `company` (a compliance_batch.profile_data dict) may
+        qualify for. By default that's every tender without a disqualifying
+        gap in score_compliance: turnover at least 70% of the requirement,
+        enough years, and at least one required certification held. With
+        `strict`, every threshold must be met in full, including the
+        largest past project, and all certifications must be held.
+        """
+        turnover = float(company.get("annual_turnover") or 0)
+        years = float(company.get("years_in_operation") or 0)
+        company_certs = set(company_term_ids(company, CERTIFICATION))
+
+        with self._lock:
+            if strict:
+                found = self._within("min_turnover", turnover)
+                found &= self._within("min_single_project_value", float(max_project_value(company)))
+            else:
+                # Slightly generous at the 70% boundary; the exact scoring settles it
+                found = self._within("min_turnover", turnover * 100 / TURNOVER_DISQUALIFY_PCT * (1 + 1e-9))
+            found &= self._within("years_experience", years)
+
+            with_certs = set(self._no_certs)
+            if strict:
+                with_certs |= {tender_id for tender_id in found if self._entries[tender_id].certs <= company_certs}
+            else:
+                for cert in company_certs:
+                    with_certs |= self._by_cert.get(cert, set())
+            found &= with_certs
+
+            if sectors is not None:
+                in_sectors = set()
+                for sector in sectors:
+                    in_sectors |= self._by_sector.get(str(sector).strip().lower(), set())
+                found &= in_sectors
+
+            found.difference_update(self._superseded)
+            entries = [self._entries[tender_id] for tender_id in found]
+        if user_id is not None:
+            entries = [entry for entry in entries if entry.user_id == user_id]
+        if open_on is not None:
+            entries = [entry for entry in entries
+                       if (parse_deadline(entry.deadline) or open_on) >= open_on]
+        return sorted(entry.id for entry in entries)
+
+    def matches(self, company: Dict, strict: bool = False, sectors: Optional[Iterable[str]] = None,
+                user_id: Optional[int] = None, open_on: Optional[date] = None,
+                limit: Optional[int] = None) -> Tuple[int, List[Dict]]:
+        """
+        (number of candidates, exact-scored matches best first). Candidates
+        that score_compliance still disqualifies are dropped.
+        """
+        candidate_ids = self.candidates(company, strict, sectors, user_id, open_on)
+        results = []
+        for tender_id in candidate_ids:
+            entry = self._entries.get(tender_id)
+            if entry is None:
+                continue
+            try:
+                report = score_compliance(entry.data, company)
+            except (TypeError, ValueError):
+                continue  # extracted_data from before values were coerced to numbers
+            if any(gap["severity"] == DISQUALIFYING for gap in report["gaps"]):
+                continue
+            results.append({
+                "tender_id": entry.id,
+                "title":     entry.title,
+                "sector":    entry.sector,
+                "deadline":  entry.deadline,
+                "score":     report["score"],
+                "verdict":   report["verdict"],
+            })
+        results.sort(key=lambda r: (-r["score"], r["tender_id"]))
+        return len(candidate_ids), results[:limit] if limit else results
+
+
+eligibility_index = EligibilityIndex()
+
+
+def index_tender(tender: models.Tender) -> None:
+    """Ingestion hook: index a newly extracted tender right away."""
+    if tender.status == "extracted":
+        eligibility_index.add(tender)
@@ -1,8 +1,44 @@
+import asyncio
+import copy
+import os
+from typing import Dict, List, Set, Tuple
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 import models, schemas
-from ai_copilot import extract_tender_structure
+from config import RULE_CONFIDENCE_THRESHOLD
+from database import SessionLocal
+from services.gemini_client import PLACEHOLDER_STRINGS, extract_tender_structure_async, merge_tender_extractions
+from services.pdf_extractor import (
+    ELIGIBILITY_SECTIONS, DOCUMENT_SECTIONS, ELIGIBILITY_TABLES_KEY, extract_text_from_pdf, section_spans
+)
+from services.retrieval import build_index
+from services.rule_extractor import apply_rule_fields, extract_rule_fields, pending_fields
+from services.tender_faq import build_faq
+from services.compliance_reports import invalidate_reports
+from services.tender_index import index_tender, tender_vocab_ids
+from services.upload_store import UPLOAD_DIR
+
+# extracted_data fields fed by each tender section (corrigendum re-analysis)
+SECTION_FIELDS = {
+    **{key: ["eligibility"] for key in ELIGIBILITY_SECTIONS + [ELIGIBILITY_TABLES_KEY]},
+    **{key: ["documents_required"] for key in DOCUMENT_SECTIONS},
+    "scope of work":        ["key_clauses", "contract_duration"],
+    "terms and conditions": ["key_clauses"],
+    "general conditions":   ["key_clauses"],
+    "special conditions":   ["key_clauses", "bid_security"],
+    "evaluation criteria":  ["key_clauses"],
+}
+
+# Changed pages outside any known section (NIT / cover pages, date
+# extensions) can touch any of the headline fields
+GENERAL_FIELDS = ["tender_id", "title", "issuing_authority", "deadline", "estimated_value",
+                  "sector", "bid_security", "contract_duration"]
 
 def upload_tender(db: Session, filename: str, raw_text: str, user_id: int):
+    # Legacy synchronous path; ai_copilot initialises Vertex AI on import,
+    # so it is only loaded when this is actually used
+    from ai_copilot import extract_tender_structure
     extracted = extract_tender_structure(raw_text)
     tender = models.Tender(
         user_id=user_id,
@@ -42,4 +78,274 @@ def delete_tender(db: Session, tender_id: int):
     tender = db.query(models.Tender).filter(models.Tender.id==tender_id).first()
     db.delete(tender)
     db.commit()
-    return True
\ No newline at end of file
+    return True
+
+def is_final_extraction(extracted_data: Dict) -> bool:
+    """False for rule-only results: still waiting on the LLM, or the LLM call failed."""
+    return not (extracted_data or {}).get("_pending_fields") and "_note" not in (extracted_data or {})
+
+def _cache_row(db: Session, content_hash: str):
+    return db.query(models.TenderExtraction).filter(models.TenderExtraction.content_hash==content_hash).first()
+
+def get_cached_extraction(db: Session, content_hash: str):
+    """
+    The cached extraction for a PDF. Rows stored before provisional and
+    failed results were kept out of the cache count as a miss, so the
+    PDF is extracted again and the row overwritten.
+    """
+    cached = _cache_row(db, content_hash)
+    return cached if cached and is_final_extraction(cached.extracted_data) else None
+
+def cache_extraction(db: Session, content_hash: str, extraction: dict, extracted_data: dict):
+    """Store pdfplumber + LLM results (and the retrieval index) for a PDF so repeat uploads skip both."""
+    cached = _cache_row(db, content_hash)
+    if cached is None:
+        cached = models.TenderExtraction(content_hash=content_hash)
+        db.add(cached)
+    cached.page_count = extraction["page_count"]
+    cached.raw_text = extraction["full_text"]
+    cached.sections = extraction["sections"]
+    cached.page_fingerprints = extraction.get("page_fingerprints")
+    cached.retrieval_index = extraction.get("retrieval_index")
+    cached.extracted_data = extracted_data
+    try:
+        db.commit()
+    except IntegrityError:
+        # Same PDF extracted concurrently by another request — keep theirs
+        db.rollback()
+        return _cache_row(db, content_hash)
+    db.refresh(cached)
+    return cached
+
+def _touched_sections(spans: Dict[str, Tuple[int, int]], page: Dict) -> List[str]:
+    return [key for key, (start, end) in spans.items() if start < page["end"] and end > page["start"]]
+
+def revision_targets(extraction: dict, previous_text: str = None,
+                     previous_fingerprints: Dict = None) -> Tuple[Set[str], Dict[str, str], str, Set[str]]:
+    """
+    Work out what a corrigendum changed: the extracted_data fields touched
+    by the changed pages, the sections to re-analyse, the text of the
+    changed pages that fall outside any known section, and the touched
+    fields whose every source section is re-analysed in full (for those an
+    empty list is a real removal, see merge_revision).
+
+    Pages deleted from the previous version (`removed_pages`, located with
+    `previous_text` / `previous_fingerprints`) touch the sections they sat
+    in there, or the general fields when they sat in none.
+    """
+    full_text = extraction["full_text"]
+    pages = extraction["page_fingerprints"]["pages"]
+    spans = section_spans(full_text)
+
+    fields: Set[str] = set()
+    sections: Dict[str, str] = {}
+    loose_text: List[str] = []
+
+    for page_number in extraction["changed_pages"]:
+        page = pages[page_number - 1]
+        touched = _touched_sections(spans, page)
+        for key in touched:
+            fields.update(SECTION_FIELDS.get(key, ["key_clauses"]))
+            sections[key] = extraction["sections"][key]
+        if not touched:
+            fields.update(GENERAL_FIELDS)
+            loose_text.append(full_text[page["start"]:page["end"]])
+
+    if extraction.get("removed_pages") and previous_fingerprints:
+        previous_pages = previous_fingerprints["pages"]
+        previous_spans = section_spans(previous_text or "")
+        for page_number in extraction["removed_pages"]:
+            touched = _touched_sections(previous_spans, previous_pages[page_number - 1])
+            for key in touched:
+                fields.update(SECTION_FIELDS.get(key, ["key_clauses"]))
+                if key in extraction["sections"]:
+                    sections[key] = extraction["sections"][key]
+            if not touched:
+                fields.update(GENERAL_FIELDS)
+
+    if ELIGIBILITY_TABLES_KEY in extraction["sections"] and "eligibility" in fields:
+        sections[ELIGIBILITY_TABLES_KEY] = extraction["sections"][ELIGIBILITY_TABLES_KEY]
+
+    complete = set()
+    for field in fields:
+        sources = [key for key in extraction["sections"] if field in SECTION_FIELDS.get(key, ["key_clauses"])]
+        if sources and all(key in sections for key in sources):
+            complete.add(field)
+
+    return fields, sections, "\n\n".join(loose_text), complete
+
+def _is_empty(value) -> bool:
+    """Nothing extracted: missing, empty, or a schema placeholder the model echoed back."""
+    return value in (None, [], "") or (isinstance(value, str) and value.strip().lower() in PLACEHOLDER_STRINGS)
+
+def merge_revision(previous: Dict, revised: Dict, fields: Set[str], complete: Set[str] = frozenset()) -> Dict:
+    """
+    Overlay re-extracted values for the touched fields onto the previous
+    version's extracted_data. Empty values never overwrite known ones,
+    except an empty list for a field in `complete`: all of its sections
+    were re-analysed, so the corrigendum really dropped those entries.
+
+    A failed re-extraction (the parse-failure stub, or a cut-off response,
+    both flagged with _note) changes nothing: the previous values are kept
+    and the note carried over, so the result isn't cached as final.
+    """
+    merged = copy.deepcopy(previous or {})
+    merged.pop("_pending_fields", None)  # previous version's deferred fill never lands here
+    if "_note" in revised:
+        merged["_note"] = revised["_note"]
+        return merged
+    for field in fields:
+        value = revised.get(field)
+        removable = field in complete
+        if field == "eligibility" and isinstance(value, dict):
+            eligibility = dict(merged.get("eligibility") or {})
+            eligibility.update({k: v for k, v in value.items() if not _is_empty(v) or (removable and v == [])})
+            merged["eligibility"] = eligibility
+        elif not _is_empty(value) or (removable and value == []):
+            merged[field] = value
+    return merged
+
+def provisional_extraction(rule_result: Dict) -> Dict:
+    """
+    extracted_data from the rule extractor alone: confident fields filled,
+    everything else empty, and `_pending_fields` listing what the LLM
+    still has to supply.
+    """
+    extracted = apply_rule_fields(merge_tender_extractions([{}]), rule_result, RULE_CONFIDENCE_THRESHOLD)
+    extracted["_pending_fields"] = pending_fields(rule_result, RULE_CONFIDENCE_THRESHOLD)
+    return extracted
+
+async def extract_with_rules(full_text: str, sections: Dict, rule_result: Dict) -> Dict:
+    """Narrowed LLM call for the pending fields, with the confident rule values on top."""
+    fields = pending_fields(rule_result, RULE_CONFIDENCE_THRESHOLD)
+    llm_data = await extract_tender_structure_async(full_text, sections, fields)
+    return apply_rule_fields(merge_tender_extractions([llm_data]), rule_result, RULE_CONFIDENCE_THRESHOLD)
+
+# content hash -> set once the completion running for it has finished
+_in_flight: Dict[str, asyncio.Event] = {}
+_resumed: Set[asyncio.Task] = set()
+
+async def complete_extraction(content_hash: str, file_path: str):
+    """
+    Background step after a streamed upload, which only read the pages up
+    to the eligibility / documents / scope sections: extract the whole PDF,
+    fill the pending fields with the narrowed LLM call, cache the result
+    and finish every tender still pending on it (including their copilot
+    FAQ, which waits for the final extraction).
+
+    One completion runs per PDF at a time; a second upload waits for it
+    and then finishes its own tender from the cache.
+    """
+    while content_hash in _in_flight:
+        await _in_flight[content_hash].wait()
+    done = _in_flight[content_hash] = asyncio.Event()
+    try:
+        if not await run_in_threadpool(_finish_from_cache, content_hash):
+            await _complete_extraction(content_hash, file_path)
+    finally:
+        del _in_flight[content_hash]
+        done.set()
+
+async def resume_pending_extractions() -> int:
+    """
+    Startup step: completions only live in the worker that accepted the
+    upload, so tenders a restart left pending are picked up again from the
+    stored PDF (or failed when it is gone). Returns the number resumed.
+    """
+    resumed = 0
+    for content_hash in await run_in_threadpool(_pending_hashes):
+        file_path = os.path.join(UPLOAD_DIR, f"{content_hash}.pdf")
+        if not os.path.exists(file_path):
+            await run_in_threadpool(_fail_pending, content_hash, "Uploaded PDF is no longer available; please upload it again")
+            continue
+        task = asyncio.create_task(complete_extraction(content_hash, file_path))
+        _resumed.add(task)  # keep a reference until it finishes
+        task.add_done_callback(_resumed.discard)
+        resumed += 1
+    return resumed
+
+async def _complete_extraction(content_hash: str, file_path: str):
+    extraction = await run_in_threadpool(extract_text_from_pdf, file_path)
+    if not extraction["success"]:
+        await run_in_threadpool(_fail_pending, content_hash, extraction["error"])
+        return
+    extraction["retrieval_index"] = await run_in_threadpool(build_index, extraction["full_text"])
+    rules = await run_in_threadpool(extract_rule_fields, extraction["sections"], extraction["full_text"])
+
+    try:
+        extracted = await extract_with_rules(extraction["full_text"], extraction["sections"], rules)
+    except Exception as e:
+        print(f"WARNING: deferred tender extraction failed for {content_hash[:12]}: {e}")
+        extracted = provisional_extraction(rules)
+        extracted.pop("_pending_fields")
+        extracted["_note"] = "AI extraction failed — rule-based fields only"
+
+    await run_in_threadpool(_finish_pending, content_hash, extraction, extracted)
+
+def _finish_pending(content_hash: str, extraction: dict, extracted: Dict) -> None:
+    # Runs after the response, so it can't use the request's session
+    db = SessionLocal()
+    try:
+        # Incomplete text (low-memory stop) and rule-only fallbacks aren't
+        # cached, so the next upload of the PDF tries again
+        if not extraction.get("warning") and is_final_extraction(extracted):
+            cache_extraction(db, content_hash, extraction, extracted)
+        _apply_to_pending(db, content_hash, extraction, extracted)
+    finally:
+        db.close()
+
+def _finish_from_cache(content_hash: str) -> bool:
+    """Finish the pending tenders of an already cached PDF; False when it isn't cached."""
+    db = SessionLocal()
+    try:
+        cached = get_cached_extraction(db, content_hash)
+        if cached is None:
+            return False
+        extraction = {"full_text": cached.raw_text, "page_fingerprints": cached.page_fingerprints,
+                      "retrieval_index": cached.retrieval_index}
+        _apply_to_pending(db, content_hash, extraction, cached.extracted_data)
+        return True
+    finally:
+        db.close()
+
+def _apply_to_pending(db: Session, content_hash: str, extraction: dict, extracted: Dict) -> None:
+    pending = db.query(models.Tender).filter(
+        models.Tender.content_hash == content_hash, models.Tender.status == "pending").all()
+    faq = build_faq(extracted) if pending else None
+    for tender in pending:
+        tender.raw_text = extraction["full_text"]
+        tender.page_fingerprints = extraction.get("page_fingerprints")
+        tender.retrieval_index = extraction.get("retrieval_index")
+        tender.extracted_data = extracted
+        tender.faq = faq
+        tender.vocab_ids = tender_vocab_ids(extracted)
+        tender.title = extracted.get("title")
+        tender.issuing_authority = extracted.get("issuing_authority")
+        tender.deadline = extracted.get("deadline")
+        tender.sector = extracted.get("sector")
+        tender.estimated_value = extracted.get("estimated_value")
+        tender.error_message = extraction.get("warning")
+        tender.status = "extracted"
+    invalidate_reports(db, tender_ids=[tender.id for tender in pending])
+    db.commit()
+    for tender in pending:
+        index_tender(tender)
+
+def _pending_hashes() -> List[str]:
+    db = SessionLocal()
+    try:
+        rows = db.query(models.Tender.content_hash).filter(
+            models.Tender.status == "pending", models.Tender.content_hash.isnot(None)).distinct()
+        return [row[0] for row in rows]
+    finally:
+        db.close()
+
+def _fail_pending(content_hash: str, error: str) -> None:
+    db = SessionLocal()
+    try:
+        db.query(models.Tender).filter(
+            models.Tender.content_hash == content_hash, models.Tender.status == "pending"
+        ).update({"status": "failed", "error_message": error}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
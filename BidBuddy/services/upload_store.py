@@ -0,0 +1,46 @@
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, Tuple
+
+UPLOAD_DIR = "uploads/tenders"
+
+# Read uploads in 1 MB chunks so large tenders never sit in memory
+CHUNK_SIZE = 1024 * 1024
+
+
+def save_upload(fileobj: BinaryIO, upload_dir: str = UPLOAD_DIR) -> Tuple[str, str]:
+    """
+    Stream an uploaded file to disk while hashing it, and store it under
+    its SHA-256 (uploads/tenders/<hash>.pdf).
+
+    Identical PDFs uploaded under different names share one file, and
+    different PDFs with the same name no longer overwrite each other.
+
+    Returns (content_hash, file_path).
+    """
+    os.makedirs(upload_dir, exist_ok=True)
+    digest = hashlib.sha256()
+
+    fd, tmp_path = tempfile.mkstemp(dir=upload_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = fileobj.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+
+        content_hash = digest.hexdigest()
+        file_path = os.path.join(upload_dir, f"{content_hash}.pdf")
+        if os.path.exists(file_path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, file_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return content_hash, file_path
@@ -0,0 +1,225 @@
+import hashlib
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Canonical vocabulary for certifications and documents.
+#
+# Tenders and profiles write the same thing many ways ("ISO 9001:2015",
+# "ISO-9001", "iso9001 certificate"; "Audited Balance Sheet (3 years)",
+# "balance sheet"). term_id() maps free text to one integer ID per concept:
+#   1. alias table - a curated alias appearing in the text as a whole
+#      phrase (the longest such alias wins)
+#   2. trigram similarity to an alias, for typos ("Audted balance sheet")
+#   3. anything else gets a stable ID hashed from its normalised text, so
+#      unknown terms still match their own spelling variants
+# A name listing several terms ("PAN and GST", "ISO 9001, ISO 14001") is
+# split first, as long as every part is a curated term on its own - that
+# keeps "Goods and Services Tax" whole. Aliases are specific phrases only:
+# a generic one ("registration certificate") outranks the word that
+# actually names the document ("EPF Registration Certificate").
+# Results are cached, so each distinct string is normalised once per
+# process. Curated IDs are fixed here and are safe to store; bump
+# VOCAB_VERSION when the table changes so stored IDs get recomputed.
+
+VOCAB_VERSION = 2
+
+CERTIFICATION = "certification"
+DOCUMENT = "document"
+
+# (id, canonical name, aliases); the canonical name is an alias too
+CERTIFICATIONS: List[Tuple[int, str, List[str]]] = [
+    (1,  "ISO 9001",        ["iso 9001", "quality management system certificate", "qms certificate"]),
+    (2,  "ISO 14001",       ["iso 14001", "environmental management system certificate", "ems certificate"]),
+    (3,  "ISO 27001",       ["iso 27001", "iso iec 27001", "information security management system"]),
+    (4,  "ISO 45001",       ["iso 45001", "occupational health and safety management system"]),
+    (5,  "OHSAS 18001",     ["ohsas 18001"]),
+    (6,  "ISO 20000",       ["iso 20000", "iso iec 20000"]),
+    (7,  "MSME Udyam",      ["udyam", "msme registration", "msme certificate", "udyog aadhaar", "udyog aadhar",
+                             "uam", "udyam registration"]),
+    (8,  "NSIC",            ["nsic", "national small industries corporation"]),
+    (9,  "GeM Registered",  ["gem", "gem registered", "gem registration", "gem seller", "government e marketplace"]),
+    (10, "BIS",             ["bis", "bureau of indian standards", "bis licence", "bis license"]),
+    (11, "ISI Mark",        ["isi mark", "isi marked", "isi"]),
+    (12, "CMMI Level 3",    ["cmmi level 3", "cmmi 3", "cmmi maturity level 3", "cmmi ml3", "cmmi l3"]),
+    (13, "CMMI Level 5",    ["cmmi level 5", "cmmi 5", "cmmi maturity level 5", "cmmi ml5", "cmmi l5"]),
+    (14, "STQC",            ["stqc"]),
+    (15, "CE Marking",      ["ce marking", "ce mark", "ce certified"]),
+    (16, "DIPP Startup",    ["dpiit", "dipp", "startup india", "dpiit recognition"]),
+    (17, "Electrical Contractor Licence", ["electrical contractor licence", "electrical contractor license",
+                                           "electrical licence", "electrical license"]),
+    (18, "CPWD Registration", ["cpwd registration", "cpwd enlistment", "registered with cpwd"]),
+    (19, "PSARA Licence",   ["psara", "private security agencies regulation"]),
+    (20, "FSSAI Licence",   ["fssai"]),
+]
+
+DOCUMENTS: List[Tuple[int, str, List[str]]] = [
+    (101, "GST Certificate",        ["gst", "gstin", "goods and services tax"]),
+    (102, "PAN Card",               ["pan", "pan card", "permanent account number"]),
+    (103, "Audited Balance Sheet",  ["balance sheet", "audited financial statements", "audited accounts",
+                                     "audited financials"]),
+    (104, "Income Tax Returns",     ["itr", "income tax return", "income tax returns", "it returns"]),
+    (105, "Work Completion Certificate", ["completion certificate", "work completion", "work order completion"]),
+    (106, "Experience Certificate", ["experience certificate", "work experience certificate",
+                                     "performance certificate", "client certificate"]),
+    (107, "EMD",                    ["emd", "earnest money", "bid security", "bid security declaration"]),
+    (108, "Power of Attorney",      ["power of attorney", "poa", "authorisation letter", "authorization letter"]),
+    (109, "Affidavit",              ["affidavit", "notarised undertaking", "notarized undertaking"]),
+    (110, "Non-Blacklisting Declaration", ["blacklisting", "non blacklisting", "not blacklisted", "debarment"]),
+    (111, "Udyam Certificate",      ["udyam", "msme certificate", "udyog aadhaar", "udyog aadhar", "nsic certificate"]),
+    (112, "Bank Solvency Certificate", ["solvency", "bank solvency"]),
+    (113, "Turnover Certificate",   ["turnover certificate", "ca turnover certificate"]),
+    (114, "Certificate of Incorporation", ["certificate of incorporation", "incorporation certificate",
+                                           "memorandum of association", "partnership deed"]),
+    (115, "Cancelled Cheque",       ["cancelled cheque", "canceled cheque", "bank mandate"]),
+    (116, "EPF Registration",       ["epf", "pf registration", "provident fund"]),
+    (117, "ESI Registration",       ["esi", "esic", "employees state insurance"]),
+    (118, "Labour Licence",         ["labour licence", "labour license", "labor license", "clra"]),
+    (119, "Integrity Pact",         ["integrity pact"]),
+    (120, "Technical Bid",          ["technical bid", "technical proposal"]),
+    (121, "Financial Bid",          ["financial bid", "price bid", "boq", "bill of quantities", "commercial bid"]),
+]
+
+# Trigram similarity needed to accept an alias as a misspelling
+TRIGRAM_THRESHOLD = 0.55
+
+# Unknown terms get an ID at or above this; curated ones stay below it
+UNKNOWN_ID_BASE = 1 << 20
+
+_YEAR_RE = re.compile(r"\b(?:19|20)\d{2}\b")
+_LETTER_DIGIT_RE = re.compile(r"(?<=[a-z])(?=\d)|(?<=\d)(?=[a-z])")
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+# Words too common in these names to count towards a fuzzy match ("CA
+# certificate" is not "QMS certificate")
+_GENERIC_WORDS = frozenset("certificate certificates certification certified registration registered "
+                           "copy copies of the valid self attested document documents".split())
+# Separators between the terms of a compound name ("or" is left alone:
+# "ISO 9001 or equivalent" asks for one thing)
+_SPLIT_RE = re.compile(r"\s*(?:,|;|&|\+|\band\b)\s*", re.IGNORECASE)
+
+
+def normalise(text: str) -> str:
+    """Lowercase, letters and digits split ("iso9001"), punctuation and years dropped."""
+    text = _LETTER_DIGIT_RE.sub(" ", str(text).lower())
+    text = _YEAR_RE.sub(" ", _NON_WORD_RE.sub(" ", text))
+    return " ".join(text.split())
+
+
+def _trigrams(text: str) -> frozenset:
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _distinctive(key: str) -> str:
+    return " ".join(word for word in key.split() if word not in _GENERIC_WORDS)
+
+
+def _numbers(text: str) -> frozenset:
+    return frozenset(token for token in text.split() if token.isdigit())
+
+
+class _Table:
+    def __init__(self, entries: List[Tuple[int, str, List[str]]]):
+        self.names: Dict[int, str] = {}
+        # (" alias text ", trigrams of its distinctive words, numbers, id), longest alias first
+        self.aliases = []
+        for term_id, name, aliases in entries:
+            self.names[term_id] = name
+            for alias in [name] + aliases:
+                key = normalise(alias)
+                self.aliases.append((f" {key} ", _trigrams(_distinctive(key)), _numbers(key), term_id))
+        self.aliases.sort(key=lambda alias: (-alias[0].count(" "), -len(alias[0])))
+
+    def match(self, key: str) -> Optional[int]:
+        padded = f" {key} "
+        for alias, _, _, term_id in self.aliases:
+            if alias in padded:
+                return term_id
+        distinctive = _distinctive(key)
+        if len(distinctive) < 4:
+            return None
+        grams, numbers = _trigrams(distinctive), _numbers(key)
+        best, best_score = None, 0.0
+        for _, alias_grams, alias_numbers, term_id in self.aliases:
+            # "ISO 9001" vs "ISO 14001" look alike; the numbers have to agree
+            if alias_numbers != numbers:
+                continue
+            score = len(grams & alias_grams) / len(grams | alias_grams)
+            if score > best_score:
+                best, best_score = term_id, score
+        return best if best_score >= TRIGRAM_THRESHOLD else None
+
+
+_TABLES = {CERTIFICATION: _Table(CERTIFICATIONS), DOCUMENT: _Table(DOCUMENTS)}
+
+
+@lru_cache(maxsize=8192)
+def term_id(kind: str, text: str) -> Optional[int]:
+    """Canonical ID of `text` as a `kind` term (CERTIFICATION / DOCUMENT); None for blank text."""
+    key = normalise(text)
+    if not key:
+        return None
+    found = _TABLES[kind].match(key)
+    if found is not None:
+        return found
+    digest = hashlib.blake2b(f"{kind}:{key}".encode(), digest_size=6).digest()
+    return UNKNOWN_ID_BASE + int.from_bytes(digest, "big")
+
+
+@lru_cache(maxsize=8192)
+def _terms(kind: str, text: str) -> Tuple[Tuple[int, str], ...]:
+    """(ID, name) for each term `text` lists; usually just one."""
+    parts = [part.strip() for part in _SPLIT_RE.split(text)]
+    if len(parts) > 1 and all(part and _TABLES[kind].match(normalise(part)) is not None for part in parts):
+        return tuple((term_id(kind, part), part) for part in parts)
+    found = term_id(kind, text)
+    return ((found, text),) if found is not None else ()
+
+
+def term_ids(kind: str, texts: Optional[Iterable]) -> List[int]:
+    """Distinct IDs of `texts`, in first-seen order."""
+    seen: Dict[int, None] = {}
+    for text in texts or []:
+        for found, _ in _terms(kind, text) if isinstance(text, str) else ():
+            seen.setdefault(found, None)
+    return list(seen)
+
+
+def required_terms(kind: str, names: Optional[Iterable]) -> Dict[int, str]:
+    """Canonical ID -> the first name a tender used for it ("PAN and GST" gives two)."""
+    required: Dict[int, str] = {}
+    for name in names or []:
+        for found, part in _terms(kind, name) if isinstance(name, str) else ():
+            required.setdefault(found, part)
+    return required
+
+
+def company_term_ids(company_data: Dict, kind: str) -> List[int]:
+    """IDs a company holds: its stored `vocab_ids` when current, else from its name lists."""
+    field = "certifications" if kind == CERTIFICATION else "documents"
+    stored = company_data.get("vocab_ids")
+    if stored and stored.get("v") == VOCAB_VERSION:
+        return stored[field]
+    return term_ids(kind, company_data.get("certifications" if kind == CERTIFICATION else "available_documents"))
+
+
+def term_name(kind: str, term: int) -> str:
+    """Canonical name of a curated ID; unknown IDs only have the text they came from."""
+    return _TABLES[kind].names.get(term) or str(term)
+
+
+def vocab_ids(certifications: Optional[Iterable], documents: Optional[Iterable]) -> Dict:
+    """The stored form on profiles and tenders: {"v", "certifications": [ids], "documents": [ids]}."""
+    return {
+        "v": VOCAB_VERSION,
+        "certifications": term_ids(CERTIFICATION, certifications),
+        "documents": term_ids(DOCUMENT, documents),
+    }
+
+
+def stored_ids(stored: Optional[Dict], certifications: Optional[Iterable],
+               documents: Optional[Iterable]) -> Dict:
+    """`stored` when it is current, otherwise recomputed from the text."""
+    if stored and stored.get("v") == VOCAB_VERSION:
+        return stored
+    return vocab_ids(certifications, documents)
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Tests import the app's modules the way main.py does (from the BidBuddy
+# directory) and never reach Vertex AI or the shared LLM cache file
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("FAKE_LLM_INIT_MS", "0")
+os.environ.setdefault("LLM_CACHE_ENABLED", "0")
+
+
+@pytest.fixture
+def db():
+    """A session on a fresh in-memory database with every table created."""
+    import models  # noqa: F401  (registers the tables on Base)
+    from database import Base
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
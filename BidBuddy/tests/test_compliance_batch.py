@@ -0,0 +1,62 @@
+import random
+
+import models
+from benchmarks.bench_compliance_batch import _company, _tender
+from services.compliance_batch import (
+    VERDICTS, CompanyMatrix, company_matrix, invalidate_company_matrix, rank_companies, score_batch,
+)
+from services.compliance_engine import score_compliance
+
+
+def test_batch_scores_equal_scalar_scores():
+    rng = random.Random(11)
+    companies = [_company(rng) for _ in range(200)]
+    matrix = CompanyMatrix(list(range(1, len(companies) + 1)), [f"Company {i}" for i in range(len(companies))],
+                           companies)
+    for tender in [_tender(rng) for _ in range(30)] + [{}]:
+        scored = score_batch(tender, matrix)
+        for i, company in enumerate(companies):
+            report = score_compliance(tender, company)
+            assert round(float(scored["score"][i]), 1) == report["score"]
+            assert VERDICTS[scored["verdict"][i]] == report["verdict"]
+            assert int(scored["msme_bonus"][i]) == report["msme_bonus"]
+
+
+def test_ranking_details_are_the_scalar_report():
+    rng = random.Random(5)
+    companies = [_company(rng) for _ in range(40)]
+    matrix = CompanyMatrix(list(range(1, 41)), [f"Company {i}" for i in range(40)], companies)
+    tender = _tender(rng)
+    results = rank_companies(tender, matrix, top_n=5, details=True)
+    assert len(results) == 5
+    assert [r["score"] for r in results] == sorted((r["score"] for r in results), reverse=True)
+    for result in results:
+        assert result["details"] == score_compliance(tender, companies[result["company_id"] - 1])
+        assert result["score"] == result["details"]["score"]
+
+
+def _profile(db, user_id, name, turnover):
+    profile = models.CompanyProfile(user_id=user_id, name=name, annual_turnover=turnover,
+                                    certifications=["ISO 9001"], available_documents=["PAN Card"])
+    db.add(profile)
+    db.commit()
+    return profile
+
+
+def test_company_matrix_is_reused_until_profiles_change(db):
+    invalidate_company_matrix(1)
+    _profile(db, 1, "Acme", 10)
+    _profile(db, 2, "Other user", 99)
+
+    matrix = company_matrix(db, 1)
+    assert matrix.names == ["Acme"]
+    assert company_matrix(db, 1) is matrix
+
+    # A profile added elsewhere (no invalidate call) still changes the signature
+    _profile(db, 1, "Beta", 20)
+    matrix = company_matrix(db, 1)
+    assert matrix.names == ["Acme", "Beta"]
+
+    # Same-second edits are covered by the router's explicit invalidation
+    invalidate_company_matrix(1)
+    assert company_matrix(db, 1) is not matrix
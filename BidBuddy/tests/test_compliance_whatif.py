@@ -0,0 +1,59 @@
+import itertools
+import random
+
+from benchmarks.bench_compliance_batch import DOCS, _company, _tender
+from benchmarks.bench_compliance_whatif import _changes
+from services.compliance_engine import evaluate_rules, score_compliance
+from services.compliance_whatif import _actions, _merge, apply_changes, find_plan, simulate
+
+
+def _eligible(tender, company, steps):
+    changed, _ = apply_changes(company, _merge(list(steps)))
+    return score_compliance(tender, changed)["verdict"] == "ELIGIBLE"
+
+
+def test_scenario_and_plan_match_the_scalar_engine():
+    rng = random.Random(3)
+    for _ in range(200):
+        tender, company, changes = _tender(rng), _company(rng), _changes(rng)
+        result = simulate(tender, company, changes)
+
+        scenario_company, _ = apply_changes(company, changes)
+        expected = score_compliance(tender, scenario_company)
+        assert (result["scenario"]["score"], result["scenario"]["verdict"]) == (expected["score"], expected["verdict"])
+
+        plan = result["plan"]
+        if plan is None:
+            assert not _eligible(tender, scenario_company, [step for steps in _actions(
+                tender, evaluate_rules(tender, scenario_company)).values() for step in steps])
+            continue
+        planned, _ = apply_changes(scenario_company, plan["changes"])
+        report = score_compliance(tender, planned)
+        assert (report["verdict"], report["score"]) == ("ELIGIBLE", plan["score"])
+
+
+def test_plan_is_the_smallest_set_of_actions():
+    rng = random.Random(9)
+    checked = 0
+    while checked < 150:
+        tender, company = _tender(rng), _company(rng)
+        tender["documents_required"] = rng.sample(DOCS, rng.randint(0, 10))
+        steps = [step for steps in _actions(tender, evaluate_rules(tender, company)).values() for step in steps]
+        if len(steps) > 8:
+            continue
+        checked += 1
+        plan = find_plan(tender, company)
+        if plan is None:
+            continue
+        for size in range(len(plan["steps"])):
+            assert not any(_eligible(tender, company, subset) for subset in itertools.combinations(steps, size))
+
+
+def test_plan_for_a_compound_certification_requirement():
+    tender = {"eligibility": {"min_turnover": 50, "required_certifications": ["ISO 9001 and ISO 14001"]},
+              "documents_required": ["PAN Card"]}
+    company = {"annual_turnover": 80, "certifications": [], "available_documents": ["PAN"]}
+    # Each certification is its own action; holding one of the two is enough
+    plan = find_plan(tender, company)
+    assert plan["steps"] == ["Obtain ISO 9001"]
+    assert plan["verdict"] == "ELIGIBLE"
@@ -0,0 +1,56 @@
+import models
+from services.copilot_service import (
+    MAX_UNSUMMARISED, append_messages, get_or_create_session, message_page, prompt_history,
+)
+
+
+def _turns(db, session, count):
+    for n in range(1, count + 1):
+        append_messages(db, session, [{"role": "user", "content": f"question {n}"},
+                                      {"role": "assistant", "content": f"answer {n}"}])
+        db.commit()
+
+
+def test_new_session_is_committed_before_the_turn(db):
+    session = get_or_create_session(db, tender_id=1)
+    assert not db.in_transaction()  # no INSERT left holding the write lock
+    assert get_or_create_session(db, tender_id=1).id == session.id
+    assert db.query(models.CopilotSession).count() == 1
+
+
+def test_messages_get_consecutive_seq_numbers(db):
+    session = get_or_create_session(db, tender_id=1)
+    _turns(db, session, 3)
+    rows = db.query(models.CopilotMessage).order_by(models.CopilotMessage.seq).all()
+    assert [row.seq for row in rows] == [1, 2, 3, 4, 5, 6]
+    assert [row.role for row in rows[:2]] == ["user", "assistant"]
+    assert session.message_count == 6
+
+
+def test_message_pages_walk_back_through_history(db):
+    session = get_or_create_session(db, tender_id=1)
+    _turns(db, session, 5)
+
+    rows, has_more = message_page(db, session.id, limit=4)
+    assert [row.seq for row in rows] == [7, 8, 9, 10] and has_more
+    rows, has_more = message_page(db, session.id, limit=4, before_seq=7)
+    assert [row.seq for row in rows] == [3, 4, 5, 6] and has_more
+    rows, has_more = message_page(db, session.id, limit=4, before_seq=3)
+    assert [row.seq for row in rows] == [1, 2] and not has_more
+
+
+def test_prompt_history_starts_after_the_summary(db):
+    session = get_or_create_session(db, tender_id=1)
+    _turns(db, session, 2)
+    session.summary, session.summary_upto_seq = "Asked about the deadline.", 2
+    db.commit()
+
+    summary, history = prompt_history(db, session)
+    assert summary == "Asked about the deadline."
+    assert history[0] == {"role": "user", "content": "question 2"}
+    assert len(history) == 2
+
+    _turns(db, session, MAX_UNSUMMARISED)
+    _, history = prompt_history(db, session)
+    assert len(history) == MAX_UNSUMMARISED
+    assert history[-1]["content"] == f"answer {MAX_UNSUMMARISED}"
@@ -0,0 +1,33 @@
+import asyncio
+import json
+
+import pytest
+
+from services import gemini_client
+from services.llm_limiter import LLMOverloaded
+
+LONG_TENDER = "Clause text here. " * 5000
+
+
+def _chunk_calls(monkeypatch, fail):
+    """Each chunk call answers with its part number, or raises when fail(part) is true."""
+    async def call(prompt, **kwargs):
+        part = int(prompt.split("This is part ")[1].split()[0])
+        if fail(part):
+            raise LLMOverloaded()
+        return json.dumps({"title": "Road works", "key_clauses": [f"clause {part}"]})
+    monkeypatch.setattr(gemini_client, "_call_vertex_async", call)
+
+
+def test_failed_chunks_leave_the_others_merged(monkeypatch):
+    _chunk_calls(monkeypatch, lambda part: part == 2)
+    result = asyncio.run(gemini_client.extract_tender_structure_async(LONG_TENDER))
+    assert result["title"] == "Road works"
+    assert "clause 1" in result["key_clauses"] and "clause 2" not in result["key_clauses"]
+    assert "1 of" in result["_note"]  # incomplete, so never cached as final
+
+
+def test_all_chunks_failing_raises(monkeypatch):
+    _chunk_calls(monkeypatch, lambda part: True)
+    with pytest.raises(LLMOverloaded):
+        asyncio.run(gemini_client.extract_tender_structure_async(LONG_TENDER))
@@ -0,0 +1,45 @@
+import pytest
+
+from services import llm_cache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_PATH", str(tmp_path / "llm_cache.db"))
+    monkeypatch.delattr(llm_cache._local, "conn", raising=False)
+    llm_cache.clear()
+    yield llm_cache
+    llm_cache._local.conn.close()
+    del llm_cache._local.conn
+
+
+def test_lookups_only_read(cache):
+    cache.put("a", "model", "response a")
+    conn = cache._conn()
+    changes = conn.total_changes
+
+    assert cache.get("a") == "response a"
+    assert cache.get("missing") is None
+    assert conn.total_changes == changes
+
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_buffered_last_used_drives_eviction(cache, monkeypatch):
+    cache.put("old", "model", "x")
+    cache.put("new", "model", "y")
+    assert cache.get("old") == "x"  # now the most recently used
+
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_MAX_ENTRIES", 1)
+    cache.flush()
+    cache.evict()
+    assert cache.get("old") == "x"
+    assert cache.get("new") is None
+
+
+def test_expired_entry_is_a_miss(cache, monkeypatch):
+    cache.put("a", "model", "x")
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_TTL_S", -1)
+    assert cache.get("a") is None
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,97 @@
+import pytest
+
+from services.gemini_client import _TENDER_TYPES
+from services.llm_json import coerce_to_schema, parse_llm_json
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ('{"a": 1, "b": [true, null]}', {"a": 1, "b": [True, None]}),
+    ('Here you go:\n```json\n{"a": 1}\n```\nAnything else?', {"a": 1}),
+    ('```json\n{"a": 1, "b": [1, 2,],}\n```', {"a": 1, "b": [1, 2]}),
+    ("{'title': 'Bidder\\'s guide', 'flag': True, 'x': None}", {"title": "Bidder's guide", "flag": True, "x": None}),
+    ('{"a": 1 "b": 2}', {"a": 1, "b": 2}),
+    ('{"a": 1, // the amount\n "b": 2}', {"a": 1, "b": 2}),
+    ('{key: "bare"}', {"key": "bare"}),
+    ('[1, 2, 3]', [1, 2, 3]),
+])
+def test_repairs_keep_the_whole_value(raw, expected):
+    assert parse_llm_json(raw) == (expected, True)
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ('{"title": "Road wo', {"title": "Road wo"}),
+    ('{"a": [1, 2', {"a": [1, 2]}),
+    ('{"a": {"b": [{"c": 1}, {"d": "x', {"a": {"b": [{"c": 1}, {"d": "x"}]}}),
+    ('{"a": 1, "b": 12', {"a": 1, "b": 12}),
+])
+def test_truncated_responses_are_closed(raw, expected):
+    assert parse_llm_json(raw) == (expected, False)
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ('{"k": 1e}', {"k": 1}),
+    ('{"k": 2.5E+, "j": 3}', {"k": 2.5, "j": 3}),
+    ('{"a": 1, "b": @@, "c": 2}', {"a": 1, "c": 2}),
+    ('{"a": [1, #, 3], "b": {"x": ?}, "c": "ok"}', {"a": [1, 3], "b": {}, "c": "ok"}),
+    ('{"a": 1, @: 2, "b": 3}', {"a": 1, "b": 3}),
+])
+def test_bad_tokens_drop_only_their_value(raw, expected):
+    assert parse_llm_json(raw) == (expected, True)
+
+
+@pytest.mark.parametrize("raw", ["", "no json here", "]"])
+def test_nothing_usable(raw):
+    assert parse_llm_json(raw) == (None, False)
+
+
+def test_coercion_to_the_tender_schema():
+    data = {
+        "title": "  Road works ",
+        "estimated_value": "Rs. 4.5 Crore",
+        "bid_security": "Exempted for MSEs",
+        "eligibility": {
+            "min_turnover": 50,
+            "years_experience": "5 years",
+            "msme_preference": "Yes",
+            "required_certifications": "ISO 9001",
+            "other_requirements": ["Valid PAN", None, ""],
+            "min_single_project_value": "not specified",
+        },
+        "documents_required": {"gst": True},
+        "key_clauses": None,
+        "extra": 1,
+    }
+    tender, invalid = coerce_to_schema(data, _TENDER_TYPES)
+    eligibility = tender["eligibility"]
+    assert tender["title"] == "Road works"
+    assert tender["estimated_value"] == 450.0
+    assert tender["bid_security"] == "Exempted for MSEs"
+    assert eligibility["min_turnover"] == 50.0
+    assert eligibility["years_experience"] == 5
+    assert eligibility["msme_preference"] is True
+    assert eligibility["required_certifications"] == ["ISO 9001"]
+    assert eligibility["other_requirements"] == ["Valid PAN"]
+    assert eligibility["min_single_project_value"] is None
+    assert tender["documents_required"] == [] and tender["key_clauses"] == []
+    assert tender["deadline"] is None  # every schema key present
+    assert tender["extra"] == 1
+    assert sorted(invalid) == ["documents_required", "eligibility.min_single_project_value"]
+
+
+@pytest.mark.parametrize("value, expected, valid", [
+    ("no", False, True),
+    ("not applicable", False, True),
+    (1, True, True),
+    ("maybe", False, False),
+    ([True], False, False),
+])
+def test_bool_coercion(value, expected, valid):
+    tender, invalid = coerce_to_schema({"eligibility": {"msme_preference": value}}, _TENDER_TYPES)
+    assert tender["eligibility"]["msme_preference"] is expected
+    assert ("eligibility.msme_preference" not in invalid) is valid
+
+
+def test_non_dict_section_is_reset():
+    tender, invalid = coerce_to_schema({"eligibility": ["ISO 9001"]}, _TENDER_TYPES)
+    assert tender["eligibility"]["required_certifications"] == []
+    assert invalid == ["eligibility"]
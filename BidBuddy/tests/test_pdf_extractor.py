@@ -0,0 +1,108 @@
+import pytest
+
+from benchmarks.synthetic_pdf import write_pdf, write_tender_pdf
+from services import pdf_extractor
+from services.pdf_extractor import (
+    extract_text_from_pdf, extract_text_incremental, extract_text_streaming, find_repeated_lines,
+    remove_repeated_lines,
+)
+from services.rule_extractor import extract_rule_fields
+
+TENDER_NO = "Tender No. CPWD/EE/2026/0417"
+AUTHORITY = "GOVERNMENT OF INDIA - CENTRAL PUBLIC WORKS DEPARTMENT"
+
+
+@pytest.fixture(scope="module")
+def tender_pdf(tmp_path_factory):
+    path = tmp_path_factory.mktemp("pdf") / "tender.pdf"
+    write_tender_pdf(str(path), 6)
+    return str(path)
+
+
+def _pages(count):
+    return [f"{AUTHORITY}\n{TENDER_NO}\nBody text of page {n}, clause {n}.1 applies.\nPage {n} of {count}"
+            for n in range(1, count + 1)]
+
+
+def test_repeated_lines_keep_first_occurrence():
+    pages = _pages(5)
+    repeated = find_repeated_lines(pages)
+    assert ("top", "tender no. cpwd/ee/#/#") in repeated
+    assert ("top", AUTHORITY.lower()) in repeated
+
+    cleaned, stats = remove_repeated_lines(pages, repeated)
+    text = "\n\n".join(cleaned)
+    assert text.count(AUTHORITY) == 1
+    assert text.count(TENDER_NO) == 1
+    assert cleaned[0].startswith(AUTHORITY)
+    assert stats["lines_removed"] > 0
+
+
+def test_repeated_lines_seen_across_calls():
+    pages = _pages(5)
+    repeated = find_repeated_lines(pages)
+    seen = set()
+    first, _ = remove_repeated_lines(pages[:2], repeated, seen)
+    rest, _ = remove_repeated_lines(pages[2:], repeated, seen)
+    assert "\n\n".join(first + rest).count(AUTHORITY) == 1
+
+
+def test_extraction_keeps_cover_page_identifiers(tender_pdf):
+    result = extract_text_from_pdf(tender_pdf, workers=1)
+    assert result["success"]
+    assert result["boilerplate"]["lines_removed"] > 0
+    assert result["full_text"].count(TENDER_NO) == 1
+    assert "CENTRAL PUBLIC WORKS DEPARTMENT" in result["full_text"]
+
+    rules = extract_rule_fields(result["sections"], result["full_text"])
+    assert rules["data"]["tender_id"] == "CPWD/EE/2026/0417"
+
+
+def test_streaming_keeps_cover_page_identifiers(tender_pdf):
+    result = extract_text_streaming(tender_pdf, sections_only=False)
+    assert result["success"] and result["complete"]
+    assert result["full_text"].count(TENDER_NO) == 1
+    assert result["full_text"] == extract_text_from_pdf(tender_pdf, workers=1)["full_text"]
+
+
+def test_low_memory_hashes_pages_in_the_bounded_loop(tender_pdf, monkeypatch):
+    expected = pdf_extractor.page_content_hashes(tender_pdf)
+
+    def reopen(_):
+        raise AssertionError("low-memory mode must not reopen the whole PDF")
+
+    monkeypatch.setattr(pdf_extractor, "page_content_hashes", reopen)
+    result = extract_text_from_pdf(tender_pdf, workers=1, low_memory=True)
+    assert result["success"] and result["warning"] is None
+    assert [page["content"] for page in result["page_fingerprints"]["pages"]] == expected
+
+
+def test_low_memory_stop_is_reported(tender_pdf, monkeypatch):
+    monkeypatch.setattr(pdf_extractor, "PDF_MAX_RSS_MB", 1)
+    result = extract_text_from_pdf(tender_pdf, workers=1, low_memory=True)
+    assert result["success"]
+    stopped_at = result["memory"]["stopped_at_page"]
+    assert stopped_at and stopped_at <= 6
+    assert result["warning"].startswith(f"Extraction stopped at page {stopped_at} of 6")
+    contents = [page["content"] for page in result["page_fingerprints"]["pages"]]
+    assert all(contents[:stopped_at - 1]) and not any(contents[stopped_at - 1:])
+
+
+def _body(name):
+    return [AUTHORITY, TENDER_NO, "", f"{name.upper()}"] + [
+        f"Clause {name}.{i}: the contractor shall comply with the {name} conditions." for i in range(1, 6)]
+
+
+def test_incremental_rederives_positional_text(tmp_path):
+    original, revised = str(tmp_path / "original.pdf"), str(tmp_path / "revised.pdf")
+    write_pdf(original, [_body("cover"), _body("scope"), [], _body("eligibility"), _body("documents")])
+    # Corrigendum drops the cover page: "scope" becomes page 1, the scanned page moves up
+    write_pdf(revised, [_body("scope"), [], _body("eligibility"), _body("documents")])
+
+    previous = extract_text_from_pdf(original, workers=1)
+    result = extract_text_incremental(revised, previous["full_text"], previous["page_fingerprints"])
+    assert result["success"]
+    assert result["changed_pages"] == []
+    assert result["full_text"] == extract_text_from_pdf(revised, workers=1)["full_text"]
+    assert result["full_text"].startswith(AUTHORITY)
+    assert "[Page 2: No extractable text" in result["full_text"]
@@ -0,0 +1,101 @@
+import pytest
+
+from services.rule_extractor import (
+    LLM_ONLY_FIELDS, apply_rule_fields, extract_rule_fields, parse_amount_lakhs, pending_fields,
+)
+
+ELIGIBILITY = """Average annual turnover of Rs. 50 Lakhs during the last three financial years.
+Minimum 5 years of experience in similar works.
+Bidder must hold ISO 9001:2015 certification.
+At least one similar completed work of value not less than Rs. 1.5 Crore.
+MSEs registered with Udyam are exempted from payment of EMD."""
+
+FULL_TEXT = """Tender No. CPWD/EE/2026/0417
+Last date of submission: 25-04-2026
+Estimated cost: Rs. 4.5 Crore
+EMD of Rs. 2,00,000 shall be submitted.
+""" + ELIGIBILITY
+
+
+@pytest.fixture(scope="module")
+def rules():
+    return extract_rule_fields({"eligibility criteria": ELIGIBILITY}, FULL_TEXT)
+
+
+def test_eligibility_fields(rules):
+    eligibility = rules["data"]["eligibility"]
+    assert eligibility["min_turnover"] == 50.0
+    assert eligibility["min_single_project_value"] == 150.0
+    assert eligibility["years_experience"] == 5
+    assert eligibility["required_certifications"] == ["ISO 9001"]
+    assert eligibility["msme_preference"] is True
+
+
+def test_headline_fields(rules):
+    data = rules["data"]
+    assert data["tender_id"] == "CPWD/EE/2026/0417"
+    assert data["deadline"] == "25-04-2026"
+    assert data["estimated_value"] == 450.0
+    assert data["bid_security"] == 2.0
+
+
+def test_negated_msme_exemption():
+    result = extract_rule_fields({"eligibility criteria": "MSEs are not eligible for exemption from EMD."})
+    assert result["data"]["eligibility"]["msme_preference"] is False
+
+
+@pytest.mark.parametrize("text, lakhs", [
+    ("Rs. 5 Crore", 500.0),
+    ("Rs 2,00,000", 2.0),
+    ("Rs. 50 Lakhs", 50.0),
+])
+def test_parse_amount_lakhs(text, lakhs):
+    assert parse_amount_lakhs(text) == lakhs
+
+
+def test_only_unconfident_fields_go_to_the_llm(rules):
+    assert pending_fields(rules, 0.8) == LLM_ONLY_FIELDS
+    assert "eligibility.years_experience" in pending_fields(rules, 0.95)
+
+    merged = apply_rule_fields({"title": "Road works", "eligibility": {"min_turnover": 10}}, rules, 0.8)
+    assert merged["title"] == "Road works"
+    assert merged["eligibility"]["min_turnover"] == 50.0  # rules win over the LLM
+
+
+def _eligibility(text):
+    result = extract_rule_fields({"eligibility criteria": text})
+    return result["data"]["eligibility"], result["confidence"]
+
+
+def test_unrecognised_certifications_go_to_the_llm():
+    eligibility, confidence = _eligibility(
+        "Bidder must hold ISO 9001 certification, NABL accreditation and a valid PSARA licence.")
+    assert eligibility["required_certifications"] == ["ISO 9001"]
+    assert confidence["eligibility.required_certifications"] < 0.8
+
+    _, confidence = _eligibility("Bidder must hold ISO 9001 and ISO 14001 certification.")
+    assert confidence["eligibility.required_certifications"] >= 0.8
+
+
+@pytest.mark.parametrize("text, certs", [
+    ("All materials shall conform to BIS standards.", []),
+    ("Bidder must hold a valid BIS licence (CM/L) for the product.", ["BIS"]),
+    ("Products must be certified by BIS.", ["BIS"]),
+])
+def test_bis_only_as_a_held_certification(text, certs):
+    assert _eligibility(text)[0]["required_certifications"] == certs
+
+
+def test_msme_preference_wording_and_absence():
+    eligibility, confidence = _eligibility("Preference shall be given to Micro & Small Enterprises (MSEs).")
+    assert eligibility["msme_preference"] is True
+    assert confidence["eligibility.msme_preference"] >= 0.8
+
+    _, confidence = _eligibility("Average annual turnover of Rs. 50 Lakhs.")
+    assert confidence["eligibility.msme_preference"] < 0.8  # no clause found: ask the LLM
+
+
+def test_rule_lists_keep_the_llm_extras(rules):
+    llm = {"eligibility": {"required_certifications": ["iso 9001", "NABL Accreditation"]}}
+    merged = apply_rule_fields(llm, rules, 0.8)
+    assert merged["eligibility"]["required_certifications"] == ["ISO 9001", "NABL Accreditation"]
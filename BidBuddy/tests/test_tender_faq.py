@@ -0,0 +1,47 @@
+import pytest
+
+from services.tender_faq import build_faq, match_faq, match_topic
+
+EXTRACTED = {
+    "deadline": "25-04-2026",
+    "bid_security": 2.0,
+    "documents_required": ["GST Certificate", "PAN Card"],
+    "eligibility": {"min_turnover": 50, "msme_preference": True},
+    "contract_duration": "12 months",
+}
+
+
+@pytest.mark.parametrize("question, topic", [
+    ("What is the deadline?", "deadline"),
+    ("What is the last date for bid submission?", "deadline"),
+    ("What is the EMD amount?", "emd"),
+    ("How much is the earnest money deposit?", "emd"),
+    ("Which documents are required?", "documents"),
+    ("What is the minimum turnover required?", "turnover"),
+    ("Does the tender give preference to MSEs?", "msme"),
+    ("What is the duration of the contract?", "duration"),
+])
+def test_canonical_questions_match(question, topic):
+    assert match_topic(question) == topic
+
+
+@pytest.mark.parametrize("question", [
+    "last date for queries",
+    "What is the tender opening date?",
+    "Has the deadline been extended?",
+    "Are MSMEs exempted from EMD?",
+    "Is there an MSME EMD exemption?",
+    "When is the EMD refunded?",
+    "Is our turnover of 2 crore enough?",
+])
+def test_other_questions_go_to_the_llm(question):
+    assert match_topic(question) is None
+    assert match_faq(build_faq(EXTRACTED), question) is None
+
+
+def test_answers_come_from_extracted_data():
+    faq = build_faq(EXTRACTED)
+    assert match_faq(faq, "What is the deadline?") == "The bid submission deadline is 25-04-2026."
+    assert match_faq(faq, "What is the EMD?") == "The EMD (bid security) is Rs. 2 Lakhs."
+    # No value extracted -> no canned answer
+    assert match_faq(build_faq({}), "What is the deadline?") is None
@@ -0,0 +1,22 @@
+import models
+from services.tender_index import EligibilityIndex
+
+COMPANY = {"annual_turnover": 100, "years_in_operation": 10, "certifications": []}
+
+
+def _tender(tender_id, parent_id=None):
+    return models.Tender(id=tender_id, parent_id=parent_id, user_id=1, title=f"Tender {tender_id}",
+                         status="extracted", extracted_data={"eligibility": {"min_turnover": 50}})
+
+
+def test_revisions_hide_their_parent_until_removed():
+    index = EligibilityIndex()
+    for tender in (_tender(1), _tender(2, parent_id=1), _tender(3, parent_id=1)):
+        index.add(tender)
+    assert index.candidates(COMPANY) == [2, 3]
+
+    index.add(_tender(3, parent_id=1))  # re-indexing a revision changes nothing
+    index.remove(3)
+    assert index.candidates(COMPANY) == [2]
+    index.remove(2)
+    assert index.candidates(COMPANY) == [1]
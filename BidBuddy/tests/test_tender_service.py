@@ -0,0 +1,98 @@
+import pytest
+
+from benchmarks.synthetic_pdf import write_pdf
+from services.gemini_client import _tender_structure_result
+from services.pdf_extractor import extract_text_from_pdf, extract_text_incremental
+from services.tender_service import (
+    GENERAL_FIELDS, cache_extraction, get_cached_extraction, is_final_extraction, merge_revision, revision_targets,
+)
+
+
+PREVIOUS = {
+    "title": "Road works",
+    "bid_security": 2.0,
+    "eligibility": {"min_turnover": 50, "years_experience": 5, "required_certifications": ["ISO 9001"]},
+    "documents_required": ["GST Certificate", "PAN Card"],
+}
+
+
+def test_merge_revision_overlays_only_touched_fields():
+    revised = {
+        "title": "Road works (revised)",
+        "bid_security": 2.5,
+        "eligibility": {"min_turnover": 80, "years_experience": None},
+    }
+    merged = merge_revision(PREVIOUS, revised, {"bid_security", "eligibility"})
+    assert merged["title"] == "Road works"  # not a touched field
+    assert merged["bid_security"] == 2.5
+    assert merged["eligibility"] == {"min_turnover": 80, "years_experience": 5,
+                                     "required_certifications": ["ISO 9001"]}
+    assert merged["documents_required"] == PREVIOUS["documents_required"]
+    assert PREVIOUS["eligibility"]["min_turnover"] == 50  # previous version left untouched
+
+
+def test_merge_revision_keeps_known_values_over_empty_ones():
+    merged = merge_revision(PREVIOUS, {"documents_required": [], "bid_security": None},
+                            {"documents_required", "bid_security"})
+    assert merged["documents_required"] == PREVIOUS["documents_required"]
+    assert merged["bid_security"] == 2.0
+
+
+EXTRACTION = {"page_count": 3, "full_text": "text", "sections": {}, "page_fingerprints": None,
+              "retrieval_index": None}
+
+
+@pytest.mark.parametrize("provisional", [
+    {"title": None, "_pending_fields": ["title"]},
+    {"title": None, "_note": "AI extraction failed — rule-based fields only"},
+])
+def test_provisional_results_are_not_served_from_the_cache(db, provisional):
+    cache_extraction(db, "abc", EXTRACTION, provisional)
+    assert get_cached_extraction(db, "abc") is None
+
+    cached = cache_extraction(db, "abc", EXTRACTION, {"title": "Road works"})
+    assert get_cached_extraction(db, "abc") is cached
+    assert cached.extracted_data == {"title": "Road works"}
+
+
+def test_failed_revision_keeps_the_previous_values():
+    previous = {**PREVIOUS, "issuing_authority": "PWD", "sector": "Civil",
+                "eligibility": {**PREVIOUS["eligibility"], "msme_preference": True}}
+    failed = _tender_structure_result("not json")
+    merged = merge_revision(previous, failed, set(GENERAL_FIELDS) | {"eligibility"})
+    assert {k: v for k, v in merged.items() if k != "_note"} == previous
+    assert not is_final_extraction(merged)
+
+
+def test_merge_revision_skips_placeholder_strings():
+    merged = merge_revision(PREVIOUS, {"title": "Unknown", "sector": "N/A", "bid_security": 2.5},
+                            {"title", "sector", "bid_security"})
+    assert merged["title"] == "Road works"
+    assert "sector" not in merged
+    assert merged["bid_security"] == 2.5
+
+
+def test_complete_sections_can_drop_list_entries():
+    revised = {"eligibility": {"min_turnover": None, "required_certifications": []}, "documents_required": []}
+    fields = {"eligibility", "documents_required"}
+    merged = merge_revision(PREVIOUS, revised, fields, complete={"eligibility"})
+    assert merged["eligibility"]["required_certifications"] == []
+    assert merged["eligibility"]["min_turnover"] == 50
+    assert merged["documents_required"] == PREVIOUS["documents_required"]  # not re-analysed in full
+
+
+def test_removed_pages_touch_their_old_section(tmp_path):
+    pages = [["NOTICE INVITING TENDER", "Road works tender, last date 25-04-2026."],
+             ["SCOPE OF WORK", "Resurfacing of 12 km of district roads in the block, including drainage."],
+             ["ELIGIBILITY CRITERIA", "Minimum average annual turnover of Rs. 50 Lakhs in the last three years."],
+             ["Bidders must hold ISO 9001 and ISO 14001 certification at the time of bidding."],
+             ["DOCUMENTS REQUIRED", "GST Certificate", "PAN Card"]]
+    write_pdf(str(tmp_path / "v1.pdf"), pages)
+    write_pdf(str(tmp_path / "v2.pdf"), pages[:3] + pages[4:])
+    v1 = extract_text_from_pdf(str(tmp_path / "v1.pdf"))
+    v2 = extract_text_incremental(str(tmp_path / "v2.pdf"), v1["full_text"], v1["page_fingerprints"])
+    assert v2["changed_pages"] == [] and v2["removed_pages"] == [4]
+
+    fields, sections, loose_text, complete = revision_targets(v2, v1["full_text"], v1["page_fingerprints"])
+    assert fields == {"eligibility"} and complete == {"eligibility"}
+    assert list(sections) == ["eligibility criteria"] and loose_text == ""
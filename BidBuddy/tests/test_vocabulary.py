@@ -0,0 +1,48 @@
+import pytest
+
+from services.vocabulary import (
+    CERTIFICATION, DOCUMENT, UNKNOWN_ID_BASE, required_terms, term_id, term_ids, vocab_ids,
+)
+
+
+@pytest.mark.parametrize("kind, text, expected", [
+    (CERTIFICATION, "ISO 9001:2015", 1),
+    (CERTIFICATION, "iso9001 certificate", 1),
+    (CERTIFICATION, "ISO/IEC 27001", 3),
+    (CERTIFICATION, "Occupational Health and Safety Management System", 4),
+    (DOCUMENT, "Audited Balance Sheet (3 years)", 103),
+    (DOCUMENT, "Audted balance sheet", 103),
+    (DOCUMENT, "Goods and Services Tax", 101),
+    (DOCUMENT, "EPF Registration Certificate", 116),
+    (DOCUMENT, "Udyam Registration Certificate", 111),
+])
+def test_names_resolve_to_their_term(kind, text, expected):
+    assert term_ids(kind, [text]) == [expected]
+
+
+@pytest.mark.parametrize("kind, text", [
+    (DOCUMENT, "Profit and Loss statement"),
+    (DOCUMENT, "Registration Certificate"),
+    (DOCUMENT, "CA Certificate"),
+    (CERTIFICATION, "CA Certificate"),
+])
+def test_generic_names_stay_unknown(kind, text):
+    assert term_id(kind, text) >= UNKNOWN_ID_BASE
+
+
+def test_unknown_names_match_their_spelling_variants():
+    assert term_id(DOCUMENT, "Profit and Loss statement") == term_id(DOCUMENT, "profit and loss  statement.")
+
+
+def test_compound_names_are_split():
+    assert required_terms(DOCUMENT, ["Company PAN and GST"]) == {102: "Company PAN", 101: "GST"}
+    assert required_terms(CERTIFICATION, ["ISO 9001 and ISO 14001"]) == {1: "ISO 9001", 2: "ISO 14001"}
+    assert term_ids(DOCUMENT, ["PAN & GST", "GST Certificate"]) == [102, 101]
+    # "or" offers alternatives, so it is not split
+    assert term_ids(CERTIFICATION, ["ISO 9001 or equivalent"]) == [1]
+
+
+def test_profile_holding_both_satisfies_compound_requirement():
+    stored = vocab_ids(["ISO 9001:2015", "ISO-14001"], ["PAN Card", "GSTIN"])
+    assert set(required_terms(CERTIFICATION, ["ISO 9001 and ISO 14001"])) <= set(stored["certifications"])
+    assert set(required_terms(DOCUMENT, ["Company PAN and GST"])) <= set(stored["documents"])